@@ -1,5 +1,9 @@
+import time
+from contextlib import closing
+
 import streamlit as st
-from harshith_pr_agent.services.review_service import run_graph_review
+from harshith_pr_agent.agents.review_graph import EXPERT_NODES
+from harshith_pr_agent.services.review_service import stream_graph_review
 
 st.set_page_config(
     page_title="Harshith PR Agent",
@@ -50,6 +54,40 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def cancel_review():
+    st.session_state["review_cancelled"] = True
+
+def render_expert_findings(expert, findings, skipped=False, degraded=None):
+    issues_count = len(findings) if findings else 0
+    status_icon = "✅" if issues_count == 0 else f"⚠️ {issues_count}"
+    if skipped and not findings:
+        st.caption(f"⏭️ {expert} Expert not run: no changed files in its scope.")
+        return
+    if degraded:
+        st.warning(f"⏱️ {expert} Expert partial review: {degraded}.")
+    
+    with st.expander(f"{status_icon} {expert} Expert ({issues_count} issues found)"):
+        if findings:
+            for i, finding in enumerate(findings, 1):
+                st.markdown(f"Issue #{i}")
+                st.markdown(f"📁 File: `{finding['file_path']}` 📍 Line: {finding['line_number']}")
+                
+                priority = finding.get('priority', 'Medium')
+                priority_color = {
+                    'High': '🔴', 
+                    'Medium': '🟡', 
+                    'Low': '🟢'
+                }.get(priority, '🟡')
+                st.markdown(f"Priority: {priority_color} {priority}")
+                
+                st.info(f"💬 Comment: {finding['comment']}")
+                
+                if finding.get('suggestion'):
+                    st.code(f"💡 Suggestion:\n{finding['suggestion']}", language="diff")
+                st.divider()
+        else:
+            st.success("🎉 No issues found by this expert! Great job!")
+
 col1, col2 = st.columns([2, 1])
 
 with col1:
@@ -73,55 +111,77 @@ with col1:
         help="When enabled, the AI agents will automatically post their review comments to the GitHub PR"
     )
 
+    force_rerun = st.checkbox(
+        "🔁 Re-run the analysis even if this commit was already reviewed",
+        help="Reviews are stored per commit; by default an already reviewed commit is shown instantly from the store"
+    )
+
+    if st.session_state.pop("review_cancelled", False):
+        st.warning("⏹️ Analysis cancelled.")
+
     if st.button("🚀 Start AI Analysis", type="primary", use_container_width=True):
         if not pr_url:
             st.warning("⚠️ Please enter a valid GitHub PR URL to begin analysis.")
         else:
+            # Clicking cancel reruns the script, which closes the stream below and cancels the review.
+            st.button("⏹️ Cancel analysis", on_click=cancel_review)
+            status = st.empty()
+            status.info("🤖 AI Expert Panel is analyzing your PR... Results appear below as each expert finishes.")
+
+            st.divider()
+
+            st.subheader("📊 Final Summary & Code Quality Assessment")
+            summary_placeholder = st.empty()
+            summary_placeholder.info("⏳ Waiting for the expert panel to finish...")
+            st.divider()
+
+            st.subheader("🔍 Detailed Expert Analysis")
+            experts_container = st.container()
+
             try:
-                with st.spinner("🤖 AI Expert Panel is analyzing your PR... Please wait while our agents review the code."):
-                    review_result = run_graph_review(pr_url, post_to_github=post_comments)
+                started = time.time()
+                experts_done = 0
+                review_result = {}
+                with closing(stream_graph_review(pr_url, post_to_github=post_comments, heartbeat_seconds=1,
+                                                 force=force_rerun)) as events:
+                    for event in events:
+                        if event["event"] == "stored":
+                            reviewed_at = time.strftime("%Y-%m-%d %H:%M", time.localtime(event["created_at"]))
+                            st.info(f"⚡ Commit `{event['head_sha'][:7]}` was already reviewed on {reviewed_at}; showing the stored review.")
+                        elif event["event"] == "resumed":
+                            st.info(f"⏯️ Resuming the interrupted review of commit `{event['head_sha'][:7]}`; finished experts are not run again.")
+                        elif event["event"] == "expert":
+                            experts_done += 1
+                            with experts_container:
+                                render_expert_findings(event["expert"], event["findings"], event.get("skipped", False),
+                                                       event.get("degraded"))
+                        elif event["event"] == "merged" and (event["merged"] or event["dropped"]):
+                            with experts_container:
+                                st.caption(f"🧹 {event['merged']} duplicate finding(s) merged, "
+                                           f"{event['dropped']} lower-priority finding(s) left out of the report.")
+                        elif event["event"] == "synthesis":
+                            summary_placeholder.markdown(event["synthesis"] or "No summary generated.")
+                        elif event["event"] == "done":
+                            review_result = event["result"]
+                        if event["event"] != "done":
+                            status.info(
+                                f"🤖 {experts_done} of {len(EXPERT_NODES)} experts done "
+                                f"({time.time() - started:.0f}s elapsed)..."
+                            )
 
-                st.success("✅ Analysis Complete!")
+                status.success("✅ Analysis Complete!")
                 
                 if post_comments:
                     st.success("🎯 Review comments have been posted to GitHub successfully!")
 
-                st.divider()
+                skipped_files = review_result.get('skipped_files') or []
+                if skipped_files:
+                    with st.expander(f"🙈 Not reviewed ({len(skipped_files)} files)"):
+                        for skipped in skipped_files:
+                            st.markdown(f"- `{skipped['file_path']}`: {skipped['reason']}")
 
-                st.subheader("📊 Final Summary & Code Quality Assessment")
-                st.markdown(review_result.get('synthesis', "No summary generated."))
-                st.divider()
-
-                st.subheader("🔍 Detailed Expert Analysis")
-                
-                reviews = review_result.get('reviews', {})
-                for expert, findings in reviews.items():
-                    issues_count = len(findings) if findings else 0
-                    status_icon = "✅" if issues_count == 0 else f"⚠️ {issues_count}"
-                    
-                    with st.expander(f"{status_icon} {expert} Expert ({issues_count} issues found)"):
-                        if findings:
-                            for i, finding in enumerate(findings, 1):
-                                st.markdown(f"Issue #{i}")
-                                st.markdown(f"📁 File: `{finding['file_path']}` 📍 Line: {finding['line_number']}")
-                                
-                                priority = finding.get('priority', 'Medium')
-                                priority_color = {
-                                    'High': '🔴', 
-                                    'Medium': '🟡', 
-                                    'Low': '🟢'
-                                }.get(priority, '🟡')
-                                st.markdown(f"Priority: {priority_color} {priority}")
-                                
-                                st.info(f"💬 Comment: {finding['comment']}")
-                                
-                                if finding.get('suggestion'):
-                                    st.code(f"💡 Suggestion:\n{finding['suggestion']}", language="diff")
-                                st.divider()
-                        else:
-                            st.success("🎉 No issues found by this expert! Great job!")
-                            
             except Exception as e:
+                status.empty()
                 st.error(f"❌ An error occurred during analysis: {e}")
                 st.exception(e)
 
@@ -0,0 +1,198 @@
+# batch_review.py
+"""
+Reviews many pull requests from the command line, e.g. for nightly sweeps.
+
+    python batch_review.py --repo owner/name --repo owner/other --concurrency 4 --output sweep.jsonl
+    python batch_review.py --urls-file prs.txt --max-llm-calls 500 --output sweep.jsonl --resume
+    python batch_review.py --repo owner/name --post --output sweep.jsonl
+
+Writes one JSON line per PR as soon as its review finishes, with the findings
+count and per-phase timings. --resume skips PRs that already have a successful
+line in the output file; reviews degraded by LLM timeouts are retried. --max-llm-calls caps the LLM calls of the whole run:
+PRs still running when the budget runs out fail, and the ones not yet started
+are recorded as skipped so a later --resume picks them up.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+
+from harshith_pr_agent.agents.resilience import LLMCallAborted
+
+load_dotenv()
+
+
+class LLMBudgetExceeded(LLMCallAborted):
+    """Raised inside a review when the batch's LLM call budget is used up."""
+
+
+class LLMCallBudget:
+    """Thread-safe count of LLM calls made by a batch, with an optional upper bound."""
+
+    def __init__(self, max_calls: int = None):
+        self.max_calls = max_calls
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            if self.max_calls is not None and self.calls >= self.max_calls:
+                raise LLMBudgetExceeded(f"LLM call budget of {self.max_calls} exhausted")
+            self.calls += 1
+
+    @property
+    def exhausted(self) -> bool:
+        with self._lock:
+            return self.max_calls is not None and self.calls >= self.max_calls
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    """Counts the LLM calls of one review against the batch budget, aborting the call once it is spent."""
+
+    run_inline = True
+    raise_error = True
+
+    def __init__(self, budget: LLMCallBudget):
+        self.budget = budget
+        self.calls = 0
+
+    def _take(self):
+        self.budget.take()
+        self.calls += 1
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._take()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._take()
+
+
+def load_pr_urls(args) -> list:
+    """Collects the PR URLs to review from --urls-file and the open PRs of every --repo, without duplicates."""
+    urls = []
+    if args.urls_file:
+        with open(args.urls_file, encoding="utf-8") as f:
+            urls.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    if args.repo:
+        from harshith_pr_agent.connectors.github_connector import get_github_connector
+
+        connector = get_github_connector()
+        for repo in args.repo:
+            open_prs = connector.list_open_prs(repo)
+            print(f"--- {repo}: {len(open_prs)} open PR(s) ---")
+            urls.extend(pr["pr_url"] for pr in open_prs)
+    urls = list(dict.fromkeys(urls))
+    return urls[:args.limit] if args.limit else urls
+
+
+def completed_pr_urls(path: str) -> set:
+    """PR URLs that already have a successful line in a previous output file."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == "ok":
+                done.add(record.get("pr_url"))
+    return done
+
+
+def review_record(pr_url: str, result: dict, seconds: float, llm_calls: int) -> dict:
+    """One JSONL output line for a finished review."""
+    from harshith_pr_agent.services.review_store import get_review_store
+
+    reviews = result.get("reviews") or {}
+    head_sha = result.get("head_sha", "")
+    stored = get_review_store().get_review(pr_url, head_sha) if head_sha else None
+    return {
+        "pr_url": pr_url,
+        # Degraded reviews are not stored; --resume reviews them again.
+        "status": "degraded" if result.get("degraded") else "ok",
+        "head_sha": head_sha,
+        "from_store": "stored_at" in result,
+        "findings": {expert: len(findings) for expert, findings in reviews.items()},
+        "skipped_files": len(result.get("skipped_files") or []),
+        "llm_calls": llm_calls,
+        "expert_calls": (result.get("routing") or {}).get("expert_calls"),
+        "degraded": result.get("degraded") or {},
+        "seconds": round(seconds, 4),
+        "timings": stored["timings"] if stored else {},
+    }
+
+
+def run_batch(args) -> int:
+    from harshith_pr_agent.services.review_service import run_graph_review
+
+    pr_urls = load_pr_urls(args)
+    done = completed_pr_urls(args.output) if args.resume else set()
+    pending = [url for url in pr_urls if url not in done]
+    print(f"--- Reviewing {len(pending)} PR(s) ({len(pr_urls) - len(pending)} already done) ---")
+
+    budget = LLMCallBudget(args.max_llm_calls)
+    out = open(args.output, "a" if args.resume else "w", encoding="utf-8")
+    out_lock = threading.Lock()
+    counts = {"ok": 0, "degraded": 0, "error": 0, "skipped": 0}
+
+    def write(record: dict):
+        with out_lock:
+            counts[record["status"]] += 1
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+
+    def review(pr_url: str):
+        if budget.exhausted:
+            write({"pr_url": pr_url, "status": "skipped", "error": "LLM call budget exhausted"})
+            return
+        counter = LLMCallCounter(budget)
+        started = time.perf_counter()
+        try:
+            result = run_graph_review(pr_url, post_to_github=args.post, config={"callbacks": [counter]},
+                                      force=args.force)
+        except Exception as e:
+            write({
+                "pr_url": pr_url, "status": "error", "error": f"{type(e).__name__}: {e}",
+                "llm_calls": counter.calls, "seconds": round(time.perf_counter() - started, 4),
+            })
+            return
+        write(review_record(pr_url, result, time.perf_counter() - started, counter.calls))
+
+    started = time.perf_counter()
+    with out, ThreadPoolExecutor(max_workers=max(args.concurrency, 1)) as pool:
+        list(pool.map(review, pending))
+    print(
+        f"--- Batch finished in {time.perf_counter() - started:.1f}s: {counts['ok']} reviewed, "
+        f"{counts['degraded']} degraded, {counts['error']} failed, {counts['skipped']} skipped, {budget.calls} LLM call(s) ---"
+    )
+    return 1 if counts["error"] else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Review many GitHub pull requests concurrently.")
+    parser.add_argument("--repo", action="append", help="owner/name whose open PRs to review; repeatable.")
+    parser.add_argument("--urls-file", help="File with one PR URL per line.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Reviews running at the same time.")
+    parser.add_argument("--output", required=True, help="JSONL file to write results to.")
+    parser.add_argument("--resume", action="store_true", help="Append to --output, skipping PRs already reviewed there.")
+    parser.add_argument("--max-llm-calls", type=int, help="Stop starting reviews once this many LLM calls were made.")
+    parser.add_argument("--limit", type=int, help="Review at most this many PRs.")
+    parser.add_argument("--post", action="store_true", help="Post the reviews to GitHub.")
+    parser.add_argument("--force", action="store_true", help="Re-review head SHAs that are already in the review store.")
+    args = parser.parse_args(argv)
+    if not args.repo and not args.urls_file:
+        parser.error("give at least one --repo or a --urls-file")
+    return args
+
+
+if __name__ == "__main__":
+    sys.exit(run_batch(parse_args()))
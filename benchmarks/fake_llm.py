@@ -0,0 +1,127 @@
+# benchmarks/fake_llm.py
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+FILE_PATH_RE = re.compile(r"^\+\+\+ b/(.+)$", re.MULTILINE)
+ADDED_LINE_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)", re.MULTILINE)
+
+
+def _prompt_text(prompt: Any) -> str:
+    if hasattr(prompt, "to_string"):
+        return prompt.to_string()
+    if isinstance(prompt, list):
+        return "\n".join(str(getattr(m, "content", m)) for m in prompt)
+    return str(prompt)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for ChatGoogleGenerativeAI.
+
+    Every call sleeps for `latency_seconds` (+/- `latency_jitter`) and returns
+    `output_tokens` tokens of text. Structured output yields up to
+    `findings_per_call` findings pointing at files and lines found in the prompt.
+    Responses are seeded from the prompt, so identical prompts give identical results.
+
+    To model a latency tail, a random `slow_rate` share of calls takes an extra
+    `slow_seconds` and a `failure_rate` share raises; these are drawn per call,
+    so a retried or hedged duplicate of a slow call is usually fast.
+    """
+
+    model: str = "fake-chat-model"
+    temperature: float = 0.0
+    latency_seconds: float = 0.5
+    latency_jitter: float = 0.1
+    output_tokens: int = 200
+    findings_per_call: int = 2
+    slow_rate: float = 0.0
+    slow_seconds: float = 0.0
+    failure_rate: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _rng(self, text: str) -> random.Random:
+        return random.Random(hashlib.sha256(f"{self.model}\x1f{text}".encode("utf-8")).hexdigest())
+
+    def _latency(self, rng: random.Random) -> float:
+        latency = max(self.latency_seconds + rng.uniform(-self.latency_jitter, self.latency_jitter), 0.0)
+        if self.slow_rate and random.random() < self.slow_rate:
+            latency += self.slow_seconds
+        return latency
+
+    def _maybe_fail(self):
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError("Simulated LLM failure (503 Service Unavailable)")
+
+    def _message(self, text: str, rng: random.Random, structured: bool) -> AIMessage:
+        content = " ".join(["lorem"] * self.output_tokens)
+        if structured:
+            content = json.dumps({"reviews": self._findings(text, rng)})
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": len(text) // 4 + 1,
+                "output_tokens": self.output_tokens,
+                "total_tokens": len(text) // 4 + 1 + self.output_tokens,
+            },
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                  structured: bool = False, **kwargs) -> ChatResult:
+        text = _prompt_text(messages)
+        rng = self._rng(text)
+        time.sleep(self._latency(rng))
+        self._maybe_fail()
+        return ChatResult(generations=[ChatGeneration(message=self._message(text, rng, structured))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                         structured: bool = False, **kwargs) -> ChatResult:
+        text = _prompt_text(messages)
+        rng = self._rng(text)
+        await asyncio.sleep(self._latency(rng))
+        self._maybe_fail()
+        return ChatResult(generations=[ChatGeneration(message=self._message(text, rng, structured))])
+
+    def _findings(self, text: str, rng: random.Random) -> List[dict]:
+        paths = FILE_PATH_RE.findall(text)
+        lines = [int(line) for line in ADDED_LINE_RE.findall(text)] or [1]
+        findings = []
+        for i in range(min(self.findings_per_call, len(paths))):
+            findings.append({
+                "file_path": rng.choice(paths),
+                "line_number": rng.choice(lines) + rng.randint(0, 3),
+                "comment": f"Synthetic finding {i} from {self.model}.",
+                "priority": rng.choice(["[CRITICAL]", "[SUGGESTION]", "[NITPICK]"]),
+                "suggestion": "pass",
+            })
+        return findings
+
+    def with_structured_output(self, schema, **kwargs):
+        # Goes through the chat model like the real structured output does, so callbacks see the call.
+        return self.bind(structured=True) | RunnableLambda(lambda message: schema(**json.loads(message.content)))
+
+
+def fake_chat_model_factory(latency_seconds: float = 0.5, latency_jitter: float = 0.1,
+                            output_tokens: int = 200, findings_per_call: int = 2,
+                            slow_rate: float = 0.0, slow_seconds: float = 0.0, failure_rate: float = 0.0):
+    """Returns a factory usable with registry.set_chat_model_factory."""
+    def factory(model: str, temperature: float) -> FakeChatModel:
+        return FakeChatModel(
+            model=model, temperature=temperature, latency_seconds=latency_seconds,
+            latency_jitter=latency_jitter, output_tokens=output_tokens, findings_per_call=findings_per_call,
+            slow_rate=slow_rate, slow_seconds=slow_seconds, failure_rate=failure_rate
+        )
+    return factory
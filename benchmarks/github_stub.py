@@ -0,0 +1,208 @@
+# benchmarks/github_stub.py
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DIFF_MEDIA_TYPE = "application/vnd.github.v3.diff"
+
+
+def synthetic_file_patch(rng: random.Random, lines_per_file: int) -> str:
+    """Builds one hunk of mixed context/added/removed Python-looking lines."""
+    start = rng.randint(1, 500)
+    body = []
+    old_count = new_count = 0
+    for i in range(lines_per_file):
+        kind = rng.random()
+        if kind < 0.6:
+            body.append(f" value_{i} = compute_{i}(value_{i - 1})")
+            old_count += 1
+            new_count += 1
+        elif kind < 0.8:
+            body.append(f"-value_{i} = legacy_{i}()")
+            old_count += 1
+        else:
+            body.append(f"+value_{i} = improved_{i}(cache=True)")
+            new_count += 1
+    return f"@@ -{start},{old_count} +{start},{new_count} @@ def function_{start}():\n" + "\n".join(body) + "\n"
+
+
+class SyntheticPR:
+    """A deterministic synthetic pull request with `file_count` changed files."""
+
+    def __init__(self, number: int, file_count: int, lines_per_file: int):
+        self.number = number
+        rng = random.Random(number)
+        self.head_sha = hashlib.sha1(f"head-{number}".encode()).hexdigest()
+        self.files = []
+        for i in range(file_count):
+            path = f"src/package_{i % 50}/module_{number}_{i}.py"
+            self.files.append({
+                "filename": path,
+                "status": "modified",
+                "patch": synthetic_file_patch(rng, lines_per_file),
+            })
+        self.metadata = {
+            "number": number,
+            "title": f"Synthetic PR #{number} touching {file_count} files",
+            "body": "Generated by the benchmark GitHub stub.",
+            "state": "open",
+            "html_url": f"https://github.com/bench/repo/pull/{number}",
+            "head": {"sha": self.head_sha},
+            "changed_files": file_count,
+        }
+
+    def diff(self) -> str:
+        return "".join(
+            f"diff --git a/{f['filename']} b/{f['filename']}\n--- a/{f['filename']}\n+++ b/{f['filename']}\n{f['patch']}"
+            for f in self.files
+        )
+
+
+class GitHubStub:
+    """
+    Local HTTP stand-in for the subset of the GitHub REST API the agent uses.
+
+    Serves synthetic PRs (metadata, diff, per-file patches, compare, comments,
+    reviews) with ETag support, and records when comments and reviews were
+    posted so callers can measure end-to-end latency.
+    """
+
+    def __init__(self, file_count: int = 10, lines_per_file: int = 40, latency_seconds: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.file_count = file_count
+        self.lines_per_file = lines_per_file
+        self.latency_seconds = latency_seconds
+        self._prs = {}
+        self._lock = threading.Lock()
+        self.comments = {}
+        self.reviews = {}
+        self.posted_at = {}
+        self.request_count = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="github-stub", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def pr(self, number: int) -> SyntheticPR:
+        with self._lock:
+            if number not in self._prs:
+                self._prs[number] = SyntheticPR(number, self.file_count, self.lines_per_file)
+            return self._prs[number]
+
+    def record_post(self, number: int, body: dict, kind: str = "comment"):
+        with self._lock:
+            posts = self.reviews if kind == "review" else self.comments
+            timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            post = {
+                "id": len(posts.get(number, [])) + 1,
+                "body": body.get("body", ""),
+                "submitted_at" if kind == "review" else "created_at": timestamp,
+            }
+            if kind == "review":
+                post["comments"] = body.get("comments", [])
+            posts.setdefault(number, []).append(post)
+            self.posted_at.setdefault(number, []).append(time.time())
+            return post
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: str, content_type: str = "application/json"):
+                payload = body.encode("utf-8")
+                etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.send_header("ETag", etag)
+                self.send_header("X-RateLimit-Limit", "5000")
+                self.send_header("X-RateLimit-Remaining", "4999")
+                self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _route(self, method: str):
+                with stub._lock:
+                    stub.request_count += 1
+                if stub.latency_seconds:
+                    time.sleep(stub.latency_seconds)
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                path = parsed.path
+
+                match = re.match(r"^/repos/[^/]+/[^/]+/pulls$", path)
+                if match and method == "GET":
+                    page = int(query.get("page", ["1"])[0])
+                    per_page = int(query.get("per_page", ["30"])[0])
+                    numbers = list(range(1, 11))[(page - 1) * per_page:page * per_page]
+                    return self._send(200, json.dumps([stub.pr(n).metadata for n in numbers]))
+
+                match = re.match(r"^/repos/[^/]+/[^/]+/pulls/(\d+)$", path)
+                if match and method == "GET":
+                    pr = stub.pr(int(match.group(1)))
+                    if DIFF_MEDIA_TYPE in self.headers.get("Accept", ""):
+                        return self._send(200, pr.diff(), "text/plain")
+                    return self._send(200, json.dumps(pr.metadata))
+
+                match = re.match(r"^/repos/[^/]+/[^/]+/pulls/(\d+)/files$", path)
+                if match and method == "GET":
+                    pr = stub.pr(int(match.group(1)))
+                    page = int(query.get("page", ["1"])[0])
+                    per_page = int(query.get("per_page", ["30"])[0])
+                    return self._send(200, json.dumps(pr.files[(page - 1) * per_page:page * per_page]))
+
+                match = re.match(r"^/repos/[^/]+/[^/]+/(?:issues/(\d+)/comments|pulls/(\d+)/reviews)$", path)
+                if match:
+                    number = int(match.group(1) or match.group(2))
+                    kind = "review" if match.group(2) else "comment"
+                    if method == "POST":
+                        length = int(self.headers.get("Content-Length", "0"))
+                        body = json.loads(self.rfile.read(length) or b"{}")
+                        return self._send(201, json.dumps(stub.record_post(number, body, kind)))
+                    with stub._lock:
+                        posts = list((stub.reviews if kind == "review" else stub.comments).get(number, []))
+                    page = int(query.get("page", ["1"])[0])
+                    per_page = int(query.get("per_page", ["30"])[0])
+                    return self._send(200, json.dumps(posts[(page - 1) * per_page:page * per_page]))
+
+                match = re.match(r"^/repos/[^/]+/[^/]+/compare/([^.]+)\.\.\.(.+)$", path)
+                if match and method == "GET":
+                    pr = stub.pr(1)
+                    return self._send(200, json.dumps({"status": "ahead", "files": pr.files[:max(1, len(pr.files) // 10)]}))
+
+                return self._send(404, json.dumps({"message": "Not Found"}))
+
+            def do_GET(self):
+                self._route("GET")
+
+            def do_POST(self):
+                self._route("POST")
+
+        return Handler
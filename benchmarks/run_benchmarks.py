@@ -0,0 +1,476 @@
+# benchmarks/run_benchmarks.py
+"""
+Offline benchmark harness for the PR review pipeline.
+
+Gemini is replaced by a deterministic fake chat model and the GitHub API by a
+local HTTP stub serving synthetic PRs, so runs need no credentials or network.
+
+    python -m benchmarks.run_benchmarks --files 10,1000 --reviews 20 --concurrency 4
+    python -m benchmarks.run_benchmarks --mode webhook --event-rate 5 --events 50
+    python -m benchmarks.run_benchmarks --mode startup --startup-runs 10
+    python -m benchmarks.run_benchmarks --mode ingest --ingest-requests 5000
+    python -m benchmarks.run_benchmarks --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json --tolerance 0.2
+
+Reports p50/p95/p99 end-to-end latency, per-node latency, throughput and peak
+RSS per scenario, and exits non-zero when any review, event or probe fails or a
+run regresses against a baseline.
+Startup mode measures how long a fresh process takes to accept its first webhook.
+Ingest mode measures how many webhook deliveries per second one core can answer,
+for handled events and for the ones the server ignores, without running jobs.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100.0 * len(ordered))
+    return ordered[min(len(ordered), max(rank, 1)) - 1]
+
+
+def latency_summary(values) -> dict:
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0,
+    }
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+WEBHOOK_SECRET = "benchmark"
+
+
+def webhook_delivery(event: str, payload, secret: str = WEBHOOK_SECRET) -> dict:
+    """Keyword arguments for test_client.post of a signed GitHub delivery."""
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    signature = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return {
+        "data": body,
+        "content_type": "application/json",
+        "headers": {"X-GitHub-Event": event, "X-Hub-Signature-256": signature},
+    }
+
+
+def configure_environment(args, stub_url: str, workdir: str):
+    """Points the agent at the stub and fake model; must run before the agent modules are imported."""
+    os.environ["GOOGLE_API_KEY"] = "benchmark"
+    os.environ["GITHUB_API_KEY"] = "benchmark"
+    os.environ["GITHUB_API_BASE_URL"] = stub_url
+    os.environ["REVIEW_STORE_PATH"] = os.path.join(workdir, "review_store.sqlite3")
+    os.environ["REVIEW_CHECKPOINT_PATH"] = os.path.join(workdir, "review_checkpoints.sqlite3")
+    os.environ["GITHUB_MAX_REQUESTS_PER_SECOND"] = str(args.github_rps)
+    os.environ["GITHUB_WEBHOOK_SECRET"] = WEBHOOK_SECRET
+    if args.cache:
+        os.environ["REVIEW_CACHE_PATH"] = os.path.join(workdir, "llm_cache.sqlite3")
+    else:
+        os.environ["REVIEW_CACHE_PATH"] = ""
+        os.environ["REVIEW_CACHE_MAX_ENTRIES"] = "0"
+
+
+def make_node_timer():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class NodeTimer(BaseCallbackHandler):
+        """Records the wall-clock duration of every LangGraph node run."""
+
+        run_inline = True
+
+        def __init__(self):
+            self._starts = {}
+            self._lock = threading.Lock()
+            self.durations = defaultdict(list)
+
+        def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+            node = (metadata or {}).get("langgraph_node")
+            if node and kwargs.get("name") == node:
+                with self._lock:
+                    self._starts[run_id] = (node, time.perf_counter())
+
+        def on_chain_end(self, outputs, *, run_id, **kwargs):
+            with self._lock:
+                entry = self._starts.pop(run_id, None)
+                if entry is not None:
+                    self.durations[entry[0]].append(time.perf_counter() - entry[1])
+
+        def on_chain_error(self, error, *, run_id, **kwargs):
+            with self._lock:
+                self._starts.pop(run_id, None)
+
+    return NodeTimer()
+
+
+def run_review_scenario(args, stub, file_count: int, first_pr: int) -> dict:
+    """Runs `args.reviews` full reviews through run_graph_review with bounded concurrency."""
+    from harshith_pr_agent.services.review_service import run_graph_review
+
+    stub.file_count = file_count
+    timer = make_node_timer()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def review(number: int):
+        started = time.perf_counter()
+        try:
+            run_graph_review(f"https://github.com/bench/repo/pull/{number}", post_to_github=True,
+                             config={"callbacks": [timer]})
+        except Exception as e:
+            with lock:
+                errors.append(repr(e))
+            return
+        with lock:
+            latencies.append(time.perf_counter() - started)
+
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(review, range(first_pr, first_pr + args.reviews)))
+    wall = time.perf_counter() - wall_started
+
+    return {
+        "mode": "review",
+        "files": file_count,
+        "end_to_end_seconds": latency_summary(latencies),
+        "node_seconds": {node: latency_summary(values) for node, values in sorted(timer.durations.items())},
+        "throughput_per_second": len(latencies) / wall if wall else 0.0,
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_webhook_scenario(args, stub, file_count: int, first_pr: int) -> dict:
+    """Posts 'opened' events to /webhook at a fixed rate and waits for every review comment."""
+    import webhook_server
+
+    stub.file_count = file_count
+    client = webhook_server.app.test_client()
+    sent_at = {}
+    statuses = defaultdict(int)
+    accept_latencies = []
+
+    interval = 1.0 / args.event_rate if args.event_rate > 0 else 0.0
+    wall_started = time.perf_counter()
+    for i in range(args.events):
+        number = first_pr + i
+        payload = {"action": "opened", "pull_request": {"html_url": f"https://github.com/bench/repo/pull/{number}"}}
+        sent, started = time.time(), time.perf_counter()
+        response = client.post("/webhook", **webhook_delivery("pull_request", payload))
+        accept_latencies.append(time.perf_counter() - started)
+        statuses[response.status_code] += 1
+        if response.status_code == 200:
+            sent_at[number] = sent
+        next_send = wall_started + (i + 1) * interval
+        time.sleep(max(0.0, next_send - time.perf_counter()))
+
+    deadline = time.time() + args.timeout
+    while time.time() < deadline and any(number not in stub.posted_at for number in sent_at):
+        time.sleep(0.05)
+    wall = time.perf_counter() - wall_started
+
+    latencies = [stub.posted_at[n][0] - t for n, t in sent_at.items() if n in stub.posted_at]
+    return {
+        "mode": "webhook",
+        "files": file_count,
+        "event_rate": args.event_rate,
+        "accept_seconds": latency_summary(accept_latencies),
+        "end_to_end_seconds": latency_summary(latencies),
+        "throughput_per_second": len(latencies) / wall if wall else 0.0,
+        "status_codes": dict(statuses),
+        "timed_out": len(sent_at) - len(latencies),
+        "errors": args.events - len(latencies),
+        "queue": webhook_server.job_queue.stats(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# Runs in a fresh interpreter: imports the webhook server and sends it one event.
+STARTUP_PROBE = """
+import hashlib, hmac, json, os, sys, time
+started = time.perf_counter()
+import webhook_server
+client = webhook_server.app.test_client()
+body = json.dumps({"action": "opened", "pull_request": {"html_url": "https://github.com/bench/repo/pull/1"}}).encode()
+signature = "sha256=" + hmac.new(os.environ["GITHUB_WEBHOOK_SECRET"].encode(), body, hashlib.sha256).hexdigest()
+response = client.post("/webhook", data=body, content_type="application/json",
+                       headers={"X-GitHub-Event": "pull_request", "X-Hub-Signature-256": signature})
+# stderr, since the review job started by the event logs to stdout.
+print("STARTUP " + json.dumps({
+    "import_seconds": webhook_server.startup_seconds,
+    "first_accept_seconds": time.perf_counter() - started,
+    "status": response.status_code,
+}), file=sys.stderr, flush=True)
+os._exit(0)
+"""
+
+
+def run_startup_scenario(args) -> dict:
+    """Starts fresh processes and times how long each takes to import the webhook server and accept an event."""
+    env = {**os.environ, "WEBHOOK_WARMUP": "0"}
+    imports, first_accepts, processes, statuses = [], [], [], defaultdict(int)
+    for _ in range(args.startup_runs):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-c", STARTUP_PROBE], env=env, capture_output=True, text=True, timeout=args.timeout,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        processes.append(time.perf_counter() - started)
+        lines = [line[len("STARTUP "):] for line in completed.stderr.splitlines() if line.startswith("STARTUP ")]
+        if completed.returncode != 0 or not lines:
+            statuses["failed"] += 1
+            continue
+        probe = json.loads(lines[-1])
+        imports.append(probe["import_seconds"])
+        first_accepts.append(probe["first_accept_seconds"])
+        statuses[probe["status"]] += 1
+    return {
+        "mode": "startup",
+        "files": 0,
+        "import_seconds": latency_summary(imports),
+        "end_to_end_seconds": latency_summary(first_accepts),
+        "process_seconds": latency_summary(processes),
+        "throughput_per_second": 0.0,
+        "status_codes": dict(statuses),
+        "errors": args.startup_runs - statuses[200],
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _ingest_payloads() -> dict:
+    """Deliveries shaped like GitHub's, padded to typical sizes: (event, body, signed) per kind."""
+    repository = {"full_name": "bench/repo", "description": "x" * 2000,
+                  "topics": [f"topic-{i}" for i in range(50)]}
+    sender = {"login": "octocat", "id": 1, "type": "User"}
+    pull_request = {
+        "html_url": "https://github.com/bench/repo/pull/1", "title": "Benchmark PR", "body": "y" * 8000,
+        "head": {"sha": "a" * 40, "repo": repository}, "base": {"sha": "b" * 40, "repo": repository},
+        "labels": [{"name": f"label-{i}", "color": "ededed"} for i in range(20)],
+    }
+    commits = [{"id": f"{i:040x}", "message": "z" * 500, "added": [f"src/file_{i}_{j}.py" for j in range(20)],
+                "modified": [], "removed": [], "author": sender} for i in range(100)]
+    issue = {"number": 1, "title": "Benchmark PR", "body": "y" * 4000,
+             "pull_request": {"html_url": "https://github.com/bench/repo/pull/1"}}
+    return {
+        "pull_request.opened": ("pull_request", {"action": "opened", "number": 1, "pull_request": pull_request,
+                                                 "repository": repository, "sender": sender}, True),
+        "pull_request.labeled": ("pull_request", {"action": "labeled", "number": 1, "pull_request": pull_request,
+                                                  "repository": repository, "sender": sender}, True),
+        "issue_comment.no_trigger": ("issue_comment", {"action": "created", "issue": issue,
+                                                       "comment": {"id": 1, "body": "Looks good to me."},
+                                                       "repository": repository, "sender": sender}, True),
+        "push": ("push", {"ref": "refs/heads/main", "before": "b" * 40, "after": "a" * 40, "commits": commits,
+                          "repository": repository, "sender": sender}, True),
+        "check_run": ("check_run", {"action": "completed", "check_run": {"output": {"text": "w" * 50000}},
+                                    "repository": repository, "sender": sender}, True),
+        "bad_signature": ("pull_request", {"action": "opened", "number": 1, "pull_request": pull_request,
+                                           "repository": repository, "sender": sender}, False),
+    }
+
+
+class _DiscardingQueue:
+    """Accepts every job without running it, so ingest mode measures the handler alone."""
+
+    def submit(self, key, func, *args, priority=None):
+        return "queued"
+
+    def stats(self) -> dict:
+        return {}
+
+
+def run_ingest_scenario(args) -> dict:
+    """Sends each kind of delivery to /webhook back to back and reports requests per second per core."""
+    import webhook_server
+
+    client = webhook_server.app.test_client()
+    real_queue, webhook_server.job_queue = webhook_server.job_queue, _DiscardingQueue()
+    events, all_latencies, statuses = {}, [], defaultdict(int)
+    cpu_total = wall_total = 0.0
+    try:
+        for kind, (event, payload, signed) in _ingest_payloads().items():
+            delivery = webhook_delivery(event, payload, WEBHOOK_SECRET if signed else "wrong-secret")
+            latencies = []
+            cpu_started, wall_started = time.process_time(), time.perf_counter()
+            for _ in range(args.ingest_requests):
+                started = time.perf_counter()
+                response = client.post("/webhook", **delivery)
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] += 1
+            cpu = time.process_time() - cpu_started
+            wall = time.perf_counter() - wall_started
+            cpu_total, wall_total = cpu_total + cpu, wall_total + wall
+            all_latencies.extend(latencies)
+            events[kind] = {
+                "status": response.status_code,
+                "payload_kb": len(delivery["data"]) / 1024,
+                "requests_per_core_second": len(latencies) / cpu if cpu else 0.0,
+                "latency_seconds": latency_summary(latencies),
+            }
+    finally:
+        webhook_server.job_queue = real_queue
+    return {
+        "mode": "ingest",
+        "files": 0,
+        "end_to_end_seconds": latency_summary(all_latencies),
+        "throughput_per_second": len(all_latencies) / wall_total if wall_total else 0.0,
+        "requests_per_core_second": len(all_latencies) / cpu_total if cpu_total else 0.0,
+        "events": events,
+        "status_codes": dict(statuses),
+        "errors": sum(count for status, count in statuses.items() if status >= 500),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare_to_baseline(results: list, baseline: dict, tolerance: float) -> list:
+    """Returns human-readable regressions of p95 latency and throughput beyond the tolerance."""
+    regressions = []
+    for result in results:
+        key = f"{result['mode']}:{result['files']}"
+        base = baseline.get(key)
+        if not base:
+            continue
+        p95, base_p95 = result["end_to_end_seconds"]["p95"], base["end_to_end_seconds"]["p95"]
+        if base_p95 and p95 > base_p95 * (1 + tolerance):
+            regressions.append(f"{key}: p95 {p95:.3f}s vs baseline {base_p95:.3f}s")
+        tput, base_tput = result["throughput_per_second"], base["throughput_per_second"]
+        if base_tput and tput < base_tput * (1 - tolerance):
+            regressions.append(f"{key}: throughput {tput:.2f}/s vs baseline {base_tput:.2f}/s")
+    return regressions
+
+
+def format_seconds(summary: dict, key: str) -> str:
+    """A percentile of a latency summary, or "n/a" when it has no samples."""
+    return f"{summary[key]:.3f}s" if summary["count"] else "n/a"
+
+
+def print_report(results: list):
+    for result in results:
+        e2e = result["end_to_end_seconds"]
+        print(
+            f"[{result['mode']:7}] files={result['files']:>6}  "
+            f"p50={format_seconds(e2e, 'p50')} p95={format_seconds(e2e, 'p95')} p99={format_seconds(e2e, 'p99')}  "
+            f"throughput={result['throughput_per_second']:.2f}/s  peak_rss={result['peak_rss_mb']:.0f}MB"
+            + (f"  errors={result['errors']}" if result.get("errors") else "")
+        )
+        for sample in result.get("error_samples", []):
+            print(f"            error: {sample}")
+        for node, summary in result.get("node_seconds", {}).items():
+            print(f"            {node:>16}: p50={format_seconds(summary, 'p50')} p95={format_seconds(summary, 'p95')}")
+        for kind, summary in result.get("events", {}).items():
+            print(
+                f"            {kind:>24}: {summary['status']} {summary['payload_kb']:7.1f}KB  "
+                f"{summary['requests_per_core_second']:8.0f} req/s/core  p99={summary['latency_seconds']['p99'] * 1000:.2f}ms"
+            )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the PR review pipeline.")
+    parser.add_argument("--mode", choices=["review", "webhook", "startup", "ingest", "all"], default="review")
+    parser.add_argument("--files", default="1,100,1000", help="Comma-separated changed-file counts per PR (1-10000).")
+    parser.add_argument("--lines-per-file", type=int, default=40)
+    parser.add_argument("--reviews", type=int, default=10, help="Reviews per scenario in review mode.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent reviews in review mode.")
+    parser.add_argument("--events", type=int, default=20, help="Webhook events per scenario.")
+    parser.add_argument("--event-rate", type=float, default=5.0, help="Webhook events per second.")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds to wait for webhook reviews.")
+    parser.add_argument("--startup-runs", type=int, default=5, help="Fresh processes started in startup mode.")
+    parser.add_argument("--ingest-requests", type=int, default=2000, help="Deliveries per event kind in ingest mode.")
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--llm-slow-rate", type=float, default=0.0, help="Share of LLM calls that hit the latency tail.")
+    parser.add_argument("--llm-slow-seconds", type=float, default=10.0, help="Extra latency of a tail LLM call.")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0, help="Share of LLM calls that fail.")
+    parser.add_argument("--output-tokens", type=int, default=200)
+    parser.add_argument("--findings", type=int, default=2, help="Findings per expert LLM call.")
+    parser.add_argument("--github-latency", type=float, default=0.0, help="Added latency per stub request.")
+    parser.add_argument("--github-rps", type=float, default=10.0, help="Per-token GitHub request rate allowed by the scheduler.")
+    parser.add_argument("--cache", action="store_true", help="Keep the LLM result cache enabled.")
+    parser.add_argument("--output", help="Write the JSON results to this path.")
+    parser.add_argument("--baseline", help="Compare against a baseline written by --save-baseline.")
+    parser.add_argument("--save-baseline", help="Write the results as a baseline to this path.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression vs. baseline.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    file_counts = [int(n) for n in args.files.split(",") if n.strip()]
+
+    from benchmarks.github_stub import GitHubStub
+    stub = GitHubStub(lines_per_file=args.lines_per_file, latency_seconds=args.github_latency)
+    stub_url = stub.start()
+    workdir = tempfile.mkdtemp(prefix="pr-agent-bench-")
+    configure_environment(args, stub_url, workdir)
+
+    from benchmarks.fake_llm import fake_chat_model_factory
+    from harshith_pr_agent.agents.registry import set_chat_model_factory
+    set_chat_model_factory(fake_chat_model_factory(
+        latency_seconds=args.llm_latency, latency_jitter=args.llm_jitter,
+        output_tokens=args.output_tokens, findings_per_call=args.findings,
+        slow_rate=args.llm_slow_rate, slow_seconds=args.llm_slow_seconds, failure_rate=args.llm_failure_rate
+    ))
+
+    results = []
+    next_pr = 1000
+    try:
+        if args.mode in ("startup", "all"):
+            results.append(run_startup_scenario(args))
+        if args.mode in ("ingest", "all"):
+            results.append(run_ingest_scenario(args))
+        for file_count in file_counts:
+            if args.mode in ("review", "all"):
+                results.append(run_review_scenario(args, stub, file_count, next_pr))
+                next_pr += args.reviews
+            if args.mode in ("webhook", "all"):
+                results.append(run_webhook_scenario(args, stub, file_count, next_pr))
+                next_pr += args.events
+    finally:
+        stub.stop()
+
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    failed = [result for result in results if result.get("errors")]
+    for result in failed:
+        print(f"FAILED {result['mode']}:{result['files']}: {result['errors']} error(s)")
+    if args.save_baseline and failed:
+        print("--- Not writing a baseline from a run with errors ---")
+    elif args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({f"{r['mode']}:{r['files']}": r for r in results}, f, indent=2)
+        print(f"--- Baseline written to {args.save_baseline} ---")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
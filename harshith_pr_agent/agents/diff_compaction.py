@@ -0,0 +1,260 @@
+# harshith_pr_agent/agents/diff_compaction.py
+
+import fnmatch
+import os
+from typing import List, Optional
+
+from .diff_sharding import (
+    HUNK_HEADER_RE, estimate_tokens, parse_file_changes, parse_file_paths, split_diff_by_file, split_file_into_hunks
+)
+
+DEFAULT_IGNORE_GLOBS = [
+    # Lockfiles
+    "*.lock", "package-lock.json", "npm-shrinkwrap.json", "pnpm-lock.yaml", "go.sum",
+    # Vendored and build output
+    "vendor/*", "*/vendor/*", "node_modules/*", "*/node_modules/*", "third_party/*",
+    "dist/*", "build/*",
+    # Generated code and minified assets
+    "*_pb2.py", "*_pb2_grpc.py", "*.pb.go", "*.generated.*", "*.min.js", "*.min.css", "*.map",
+    # Binary assets
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.ico", "*.pdf", "*.zip", "*.woff", "*.woff2", "*.ttf",
+]
+
+# Extra comma-separated globs, e.g. "docs/generated/*,*.snap".
+EXTRA_IGNORE_GLOBS = [g.strip() for g in os.getenv("REVIEW_IGNORE_GLOBS", "").split(",") if g.strip()]
+
+# Token budget for the whole diff one persona sees, across all of its shards; applied after routing.
+PERSONA_TOKEN_BUDGET = int(os.getenv("REVIEW_PERSONA_TOKEN_BUDGET", "60000"))
+# Size of the PR diff fetched from GitHub at most; each persona's share is then fitted to its budget.
+FETCH_TOKEN_BUDGET = int(os.getenv("REVIEW_FETCH_TOKEN_BUDGET", str(PERSONA_TOKEN_BUDGET * 4)))
+
+# Lines longer than this are a strong sign of minified or generated content.
+MINIFIED_LINE_LENGTH = 1000
+
+GENERATED_MARKERS = ("@generated", "DO NOT EDIT", "Code generated by")
+
+
+def _significant_lines(lines: List[str]) -> List[str]:
+    """Lines with trailing whitespace stripped and blank lines left out; indentation and inner spacing still count."""
+    return [line.rstrip() for line in lines if line.strip()]
+
+
+def _is_whitespace_only(hunk: str) -> bool:
+    removed, added = [], []
+    for line in hunk.splitlines()[1:]:
+        if line.startswith("-"):
+            removed.append(line[1:])
+        elif line.startswith("+"):
+            added.append(line[1:])
+    return _significant_lines(removed) == _significant_lines(added)
+
+
+def ignore_reason(path: str, ignore_globs: List[str] = None) -> Optional[str]:
+    """Returns why a path is never reviewed (the ignore glob it matches), or None."""
+    ignore_globs = ignore_globs if ignore_globs is not None else DEFAULT_IGNORE_GLOBS + EXTRA_IGNORE_GLOBS
+    for pattern in ignore_globs:
+        if fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(os.path.basename(path), pattern):
+            return f"matches ignore pattern `{pattern}`"
+    return None
+
+
+def _skip_reason(path: str, file_diff: str, hunks: List[str], ignore_globs: List[str]) -> Optional[str]:
+    reason = ignore_reason(path, ignore_globs)
+    if reason is not None:
+        return reason
+    if "\nBinary files " in file_diff or "\nGIT binary patch" in file_diff:
+        return "binary file"
+    if not hunks:
+        return "pure rename" if "\nrename from " in file_diff else "no content changes"
+
+    added = [line for hunk in hunks for line in hunk.splitlines()[1:] if line.startswith("+")]
+    if any(len(line) > MINIFIED_LINE_LENGTH for line in added):
+        return "minified content"
+    if any(marker in line for line in added[:20] for marker in GENERATED_MARKERS):
+        return "generated file"
+    return None
+
+
+def trim_hunk_context(hunk: str, keep: int) -> str:
+    """
+    Reduces a hunk to its changed lines plus `keep` context lines around them.
+
+    Context runs longer than 2 * keep split the hunk in two, with line headers
+    recomputed so the result is still a valid unified diff.
+    """
+    lines = hunk.splitlines(keepends=True)
+    match = HUNK_HEADER_RE.match(lines[0].rstrip("\n"))
+    if not match:
+        return hunk
+    body = lines[1:]
+    changed = [i for i, line in enumerate(body) if line.startswith(("+", "-"))]
+    if not changed:
+        return ""
+
+    kept = set()
+    for i in changed:
+        kept.update(range(max(0, i - keep), min(len(body), i + keep + 1)))
+    # "\ No newline at end of file" markers belong to the line before them.
+    kept.update(i for i, line in enumerate(body) if line.startswith("\\") and i - 1 in kept)
+
+    old_line, new_line = int(match.group(1)), int(match.group(3))
+    context = match.group(5)
+    pieces = []
+    current = None
+    for i, line in enumerate(body):
+        if i in kept:
+            if current is None:
+                current = {"old": old_line, "new": new_line, "old_count": 0, "new_count": 0, "lines": []}
+            current["lines"].append(line)
+        elif current is not None:
+            pieces.append(current)
+            current = None
+
+        if line.startswith("-"):
+            old_line += 1
+            if i in kept:
+                current["old_count"] += 1
+        elif line.startswith("+"):
+            new_line += 1
+            if i in kept:
+                current["new_count"] += 1
+        elif not line.startswith("\\"):
+            old_line += 1
+            new_line += 1
+            if i in kept:
+                current["old_count"] += 1
+                current["new_count"] += 1
+    if current is not None:
+        pieces.append(current)
+
+    return "".join(
+        f"@@ -{p['old']},{p['old_count']} +{p['new']},{p['new_count']} @@{context}\n" + "".join(p["lines"])
+        for p in pieces
+    )
+
+
+def compact_diff(diff: str, ignore_globs: List[str] = None) -> dict:
+    """
+    Removes low-value content from a unified diff before it is sent to the LLM.
+
+    Ignored, binary, renamed-only, minified and generated files are dropped and
+    whitespace-only hunks (trailing whitespace and blank lines; re-indentation
+    is kept, since it can change what the code does) are collapsed. The token budget is applied later, per
+    persona, by fit_to_budget. Returns the compacted diff together with per-file
+    token estimates and a record of everything that was left out.
+    """
+    ignore_globs = ignore_globs if ignore_globs is not None else DEFAULT_IGNORE_GLOBS + EXTRA_IGNORE_GLOBS
+    original_tokens = estimate_tokens(diff or "")
+
+    skipped = []
+    rendered = []
+    file_tokens = {}
+    for file_diff in split_diff_by_file(diff or ""):
+        change = parse_file_changes(file_diff)[0]
+        path = change["new_path"] or change["old_path"] or "unknown"
+        header, hunks = split_file_into_hunks(file_diff)
+
+        reason = _skip_reason(path, file_diff, hunks, ignore_globs)
+        if reason is None:
+            kept_hunks = [hunk for hunk in hunks if not _is_whitespace_only(hunk)]
+            if not kept_hunks:
+                reason = "whitespace-only changes"
+            elif len(kept_hunks) < len(hunks):
+                skipped.append({"file_path": path, "reason": f"{len(hunks) - len(kept_hunks)} whitespace-only hunk(s)"})
+            hunks = kept_hunks
+        if reason is not None:
+            skipped.append({"file_path": path, "reason": reason})
+            continue
+        rendered.append(header + "".join(hunks))
+        file_tokens[path] = estimate_tokens(rendered[-1])
+
+    compacted = "".join(rendered)
+    return {
+        "diff": compacted,
+        "skipped": skipped,
+        "file_tokens": file_tokens,
+        "original_tokens": original_tokens,
+        "compacted_tokens": estimate_tokens(compacted)
+    }
+
+
+def _kept_hunks(header_tokens: int, hunk_tokens: List[int], cap: int) -> int:
+    """How many leading hunks of a file fit in `cap` tokens, header included."""
+    used, kept = header_tokens, 0
+    for tokens in hunk_tokens:
+        if used + tokens > cap:
+            break
+        used += tokens
+        kept += 1
+    return kept
+
+
+def fit_to_budget(diff: str, token_budget: int = PERSONA_TOKEN_BUDGET) -> dict:
+    """
+    Fits the diff one persona reviews into its token budget.
+
+    Context lines are trimmed first (down to 3, 1, then none). If the diff is
+    still too large, every file keeps its leading hunks up to the same per-file
+    cap, the largest cap that fits: large files lose their last hunks instead
+    of being left out, and a file is only dropped when even its first hunk is
+    over the cap. What the cap leaves of the budget goes to the next hunks in
+    diff order. Returns {"diff", "skipped"}.
+    """
+    files = []
+    for file_diff in split_diff_by_file(diff or ""):
+        header, hunks = split_file_into_hunks(file_diff)
+        old_path, new_path = parse_file_paths(header)
+        files.append({"file_path": new_path or old_path or "unknown", "header": header, "hunks": hunks})
+
+    def size(f: dict, hunks: List[str]) -> int:
+        return estimate_tokens(f["header"] + "".join(hunks))
+
+    for keep in (None, 3, 1, 0):
+        if keep is not None:
+            for f in files:
+                f["hunks"] = [hunk for hunk in (trim_hunk_context(h, keep) for h in f["hunks"]) if hunk]
+        if sum(size(f, f["hunks"]) for f in files) <= token_budget:
+            return {"diff": "".join(f["header"] + "".join(f["hunks"]) for f in files), "skipped": []}
+
+    sizes = [(estimate_tokens(f["header"]), [estimate_tokens(h) for h in f["hunks"]]) for f in files]
+
+    def total(cap: int) -> int:
+        kept_tokens = 0
+        for header_tokens, hunk_tokens in sizes:
+            kept = _kept_hunks(header_tokens, hunk_tokens, cap)
+            if kept:
+                kept_tokens += header_tokens + sum(hunk_tokens[:kept])
+        return kept_tokens
+
+    # Largest per-file cap whose kept hunks still fit the budget.
+    low, high = 0, max(header + sum(hunks) for header, hunks in sizes)
+    while low < high:
+        cap = (low + high + 1) // 2
+        if total(cap) <= token_budget:
+            low = cap
+        else:
+            high = cap - 1
+
+    kept_counts = [_kept_hunks(header_tokens, hunk_tokens, low) for header_tokens, hunk_tokens in sizes]
+    # The budget left under the cap goes to the next hunks in diff order, e.g. when all files are the same size.
+    left = token_budget - total(low)
+    for i, (header_tokens, hunk_tokens) in enumerate(sizes):
+        while kept_counts[i] < len(hunk_tokens):
+            cost = hunk_tokens[kept_counts[i]] + (0 if kept_counts[i] else header_tokens)
+            if cost > left:
+                break
+            left -= cost
+            kept_counts[i] += 1
+
+    rendered, skipped = [], []
+    for f, kept in zip(files, kept_counts):
+        if not kept:
+            skipped.append({"file_path": f["file_path"], "reason": "exceeds the review token budget"})
+            continue
+        if kept < len(f["hunks"]):
+            skipped.append({
+                "file_path": f["file_path"],
+                "reason": f"{len(f['hunks']) - kept} of {len(f['hunks'])} hunk(s) over the review token budget"
+            })
+        rendered.append(f["header"] + "".join(f["hunks"][:kept]))
+    return {"diff": "".join(rendered), "skipped": skipped}
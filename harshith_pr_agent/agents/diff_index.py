@@ -0,0 +1,134 @@
+# harshith_pr_agent/agents/diff_index.py
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+from .diff_sharding import HUNK_HEADER_RE, parse_file_paths, split_diff_by_file, split_file_into_hunks
+
+# How many lines a finding may be moved to land on a line GitHub accepts comments on.
+SNAP_MAX_LINES = int(os.getenv("REVIEW_SNAP_MAX_LINES", "3"))
+
+
+def normalize_path(path: str) -> str:
+    """Strips the prefixes LLMs tend to add to diff paths (a/, b/, ./, /)."""
+    path = (path or "").strip().strip("`")
+    if path.startswith(("a/", "b/")):
+        path = path[2:]
+    while path.startswith(("./", "/")):
+        path = path[2:] if path.startswith("./") else path[1:]
+    return path
+
+
+class DiffIndex:
+    """
+    Compact index of a unified diff, built once per review.
+
+    For every file it maps each new-file line that appears in the diff (added
+    or context) to its diff position, so validating and snapping a finding to
+    a commentable line is a constant number of dict lookups.
+    """
+
+    def __init__(self, files: Dict[str, Dict[int, int]]):
+        self.files = files
+
+    @classmethod
+    def from_diff(cls, diff: str) -> "DiffIndex":
+        files = {}
+        for file_diff in split_diff_by_file(diff):
+            header, hunks = split_file_into_hunks(file_diff)
+            _, new_path = parse_file_paths(header)
+            if new_path is None or not hunks:
+                continue
+            positions = {}
+            # GitHub counts positions from the line after the file's first hunk header.
+            position = 0
+            for hunk_number, hunk in enumerate(hunks):
+                hunk_lines = hunk.splitlines()
+                match = HUNK_HEADER_RE.match(hunk_lines[0])
+                if hunk_number:
+                    # Later hunk headers take up a position of their own.
+                    position += 1
+                if not match:
+                    position += len(hunk_lines) - 1
+                    continue
+                new_line = int(match.group(3))
+                for line in hunk_lines[1:]:
+                    position += 1
+                    if line.startswith("-") or line.startswith("\\"):
+                        continue
+                    positions[new_line] = position
+                    new_line += 1
+            files[new_path] = positions
+        return cls(files)
+
+    def position(self, file_path: str, line_number: int) -> Optional[int]:
+        """Returns the diff position of a new-file line, or None if it is not part of the diff."""
+        positions = self.files.get(normalize_path(file_path))
+        return positions.get(line_number) if positions else None
+
+    def snap(self, file_path: str, line_number: int, max_distance: int = SNAP_MAX_LINES) -> Optional[Tuple[str, int]]:
+        """
+        Returns (path, line) of the commentable line closest to the given one,
+        looking at most max_distance lines away, or None if there is none.
+        """
+        path = normalize_path(file_path)
+        positions = self.files.get(path)
+        if not positions:
+            return None
+        try:
+            line_number = int(line_number)
+        except (TypeError, ValueError):
+            return None
+        if line_number in positions:
+            return path, line_number
+        for distance in range(1, max_distance + 1):
+            if line_number + distance in positions:
+                return path, line_number + distance
+            if line_number - distance in positions:
+                return path, line_number - distance
+        return None
+
+    def snap_findings(self, findings: List[dict]) -> List[dict]:
+        """Moves findings onto their nearest commentable line; findings that can't be placed are kept unchanged."""
+        snapped = []
+        for finding in findings:
+            target = self.snap(finding.get("file_path"), finding.get("line_number"))
+            if target is None:
+                snapped.append(finding)
+            else:
+                snapped.append({**finding, "file_path": target[0], "line_number": target[1]})
+        return snapped
+
+    def is_commentable(self, finding: dict) -> bool:
+        return self.position(finding.get("file_path"), finding.get("line_number")) is not None
+
+
+def format_inline_comment(expert: str, finding: dict) -> str:
+    """Formats one finding as the body of an inline review comment."""
+    experts = " + ".join([expert, *finding.get("also_flagged_by", [])])
+    body = f"**{finding['priority']}** ({experts} Expert) {finding['comment']}"
+    if finding.get("suggestion"):
+        body += f"\n\n```suggestion\n{finding['suggestion']}\n```"
+    return body
+
+
+def build_inline_comments(reviews: dict, index: DiffIndex) -> Tuple[List[dict], dict]:
+    """
+    Splits the experts' findings into inline review comments for commentable
+    lines and the remaining findings, per expert, that have to go in the review body.
+    """
+    comments = []
+    remaining = {}
+    for expert, findings in reviews.items():
+        remaining[expert] = []
+        for finding in index.snap_findings(findings):
+            if index.is_commentable(finding):
+                comments.append({
+                    "path": finding["file_path"],
+                    "line": finding["line_number"],
+                    "side": "RIGHT",
+                    "body": format_inline_comment(expert, finding),
+                })
+            else:
+                remaining[expert].append(finding)
+    return comments, remaining
@@ -0,0 +1,239 @@
+# harshith_pr_agent/agents/diff_sharding.py
+
+import os
+import re
+from typing import List, Optional, Tuple
+
+# Rough token budget for the diff portion of a single expert prompt.
+SHARD_TOKEN_BUDGET = int(os.getenv("REVIEW_SHARD_TOKEN_BUDGET", "12000"))
+
+# Average characters per token; good enough for budgeting without a tokenizer.
+CHARS_PER_TOKEN = 4
+
+HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@(.*)$")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of LLM tokens in a piece of text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_diff_by_file(diff: str) -> List[str]:
+    """Splits a unified diff into one section per changed file."""
+    sections = []
+    current = []
+    for line in diff.splitlines(keepends=True):
+        if line.startswith("diff --git ") and current:
+            sections.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("".join(current))
+    return sections
+
+
+def split_file_into_hunks(file_diff: str) -> Tuple[str, List[str]]:
+    """Splits a single file's diff into its header and its hunks."""
+    header = []
+    hunks = []
+    current = None
+    for line in file_diff.splitlines(keepends=True):
+        if line.startswith("@@"):
+            if current is not None:
+                hunks.append("".join(current))
+            current = [line]
+        elif current is None:
+            header.append(line)
+        else:
+            current.append(line)
+    if current is not None:
+        hunks.append("".join(current))
+    return "".join(header), hunks
+
+
+def _split_hunk(hunk: str, token_budget: int) -> List[str]:
+    """Splits an oversized hunk into smaller hunks with recomputed line headers."""
+    lines = hunk.splitlines(keepends=True)
+    match = HUNK_HEADER_RE.match(lines[0].rstrip("\n"))
+    if not match:
+        return [hunk]
+
+    old_line, new_line = int(match.group(1)), int(match.group(3))
+    context = match.group(5)
+    pieces = []
+    body, body_tokens = [], 0
+    start_old, start_new = old_line, new_line
+    old_count = new_count = 0
+
+    def flush():
+        header = f"@@ -{start_old},{old_count} +{start_new},{new_count} @@{context}\n"
+        pieces.append(header + "".join(body))
+
+    for line in lines[1:]:
+        line_tokens = estimate_tokens(line)
+        if body and body_tokens + line_tokens > token_budget:
+            flush()
+            start_old, start_new = old_line, new_line
+            body, body_tokens = [], 0
+            old_count = new_count = 0
+        body.append(line)
+        body_tokens += line_tokens
+        if line.startswith("-"):
+            old_line += 1
+            old_count += 1
+        elif line.startswith("+"):
+            new_line += 1
+            new_count += 1
+        elif not line.startswith("\\"):
+            old_line += 1
+            new_line += 1
+            old_count += 1
+            new_count += 1
+    if body:
+        flush()
+    return pieces
+
+
+def _split_file(file_diff: str, token_budget: int) -> List[str]:
+    """Splits a file that does not fit the budget into hunk-sized chunks."""
+    header, hunks = split_file_into_hunks(file_diff)
+    hunk_budget = max(token_budget - estimate_tokens(header), 1)
+
+    chunks = []
+    current, current_tokens = [], 0
+    for hunk in hunks:
+        for piece in ([hunk] if estimate_tokens(hunk) <= hunk_budget else _split_hunk(hunk, hunk_budget)):
+            piece_tokens = estimate_tokens(piece)
+            if current and current_tokens + piece_tokens > hunk_budget:
+                chunks.append(header + "".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append(header + "".join(current))
+    return chunks or [file_diff]
+
+
+def shard_diff(diff: str, token_budget: int = SHARD_TOKEN_BUDGET) -> List[str]:
+    """
+    Splits a unified diff into shards that each fit the token budget.
+
+    Small files are packed together so that the number of LLM calls stays low,
+    while files that exceed the budget are split along hunk boundaries (and
+    very large hunks along line boundaries). Each shard is a valid diff on its own.
+    """
+    if not diff or not diff.strip():
+        return []
+
+    shards = []
+    current, current_tokens = [], 0
+    for file_diff in split_diff_by_file(diff):
+        file_tokens = estimate_tokens(file_diff)
+        pieces = [file_diff] if file_tokens <= token_budget else _split_file(file_diff, token_budget)
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece)
+            if current and current_tokens + piece_tokens > token_budget:
+                shards.append("".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        shards.append("".join(current))
+    return shards
+
+
+def _strip_path_prefix(path: str) -> str:
+    path = path.strip()
+    if path == "/dev/null":
+        return None
+    if path.startswith(("a/", "b/")):
+        return path[2:]
+    return path
+
+
+def parse_file_paths(header: str) -> Tuple[Optional[str], Optional[str]]:
+    """Returns a file diff header's old and new path (None when the file was added or deleted)."""
+    old_path = new_path = None
+    for line in header.splitlines():
+        if line.startswith("--- "):
+            old_path = _strip_path_prefix(line[4:])
+        elif line.startswith("+++ "):
+            new_path = _strip_path_prefix(line[4:])
+        elif line.startswith("diff --git ") and old_path is None and new_path is None:
+            # Fallback for diffs without ---/+++ lines (e.g. pure renames or binary files).
+            parts = line[len("diff --git "):].split(" b/", 1)
+            if len(parts) == 2:
+                old_path, new_path = _strip_path_prefix(parts[0]), parts[1].strip()
+        elif line.startswith("rename from "):
+            old_path = line[len("rename from "):].strip()
+        elif line.startswith("rename to "):
+            new_path = line[len("rename to "):].strip()
+    return old_path, new_path
+
+
+def parse_file_changes(diff: str) -> List[dict]:
+    """
+    Parses a unified diff into a list of per-file change records.
+
+    Each record holds the file's old and new path (None when the file was added
+    or deleted), its hunks as (old_start, old_count, new_start, new_count) tuples,
+    the old-side line numbers that were removed, and an old-to-new line mapping
+    for the unchanged context lines inside the hunks.
+    """
+    changes = []
+    for file_diff in split_diff_by_file(diff):
+        header, hunks = split_file_into_hunks(file_diff)
+        old_path, new_path = parse_file_paths(header)
+
+        hunk_ranges = []
+        removed_lines = set()
+        context_lines = {}
+        for hunk in hunks:
+            hunk_lines = hunk.splitlines()
+            match = HUNK_HEADER_RE.match(hunk_lines[0])
+            if not match:
+                continue
+            old_start, new_start = int(match.group(1)), int(match.group(3))
+            hunk_ranges.append((
+                old_start, int(match.group(2) or 1),
+                new_start, int(match.group(4) or 1),
+            ))
+            old_line, new_line = old_start, new_start
+            for line in hunk_lines[1:]:
+                if line.startswith("-"):
+                    removed_lines.add(old_line)
+                    old_line += 1
+                elif line.startswith("+"):
+                    new_line += 1
+                elif not line.startswith("\\"):
+                    context_lines[old_line] = new_line
+                    old_line += 1
+                    new_line += 1
+        changes.append({
+            "old_path": old_path,
+            "new_path": new_path,
+            "hunks": hunk_ranges,
+            "removed_lines": removed_lines,
+            "context_lines": context_lines
+        })
+    return changes
+
+
+def remap_line(line_number: int, change: dict) -> Optional[int]:
+    """
+    Maps an old-side line number through a file change to its new-side line number.
+
+    Returns None when the line itself was removed or rewritten by the change.
+    """
+    if line_number in change["removed_lines"]:
+        return None
+    if line_number in change["context_lines"]:
+        return change["context_lines"][line_number]
+
+    shift = 0
+    for old_start, old_count, new_start, new_count in change["hunks"]:
+        # A hunk with old_count == 0 inserts lines after old_start.
+        hunk_is_above = line_number > old_start if old_count == 0 else line_number >= old_start + old_count
+        if hunk_is_above:
+            shift += new_count - old_count
+    return line_number + shift
@@ -0,0 +1,127 @@
+# harshith_pr_agent/agents/findings.py
+
+import os
+from typing import Dict, List
+
+from .diff_index import normalize_path
+from .retrieval import tokenize
+
+# Findings on the same file within this many lines of each other may describe the same issue.
+DEDUPE_LINE_WINDOW = int(os.getenv("REVIEW_DEDUPE_LINE_WINDOW", "3"))
+# Minimum Jaccard similarity of the comment terms for two nearby findings to be merged.
+DEDUPE_SIMILARITY = float(os.getenv("REVIEW_DEDUPE_SIMILARITY", "0.3"))
+# Upper bound on the findings sent to the synthesizer and listed in the report.
+MAX_FINDINGS = int(os.getenv("REVIEW_MAX_FINDINGS", "40"))
+# Characters of a comment kept in the synthesizer digest.
+DIGEST_COMMENT_CHARS = 240
+
+PRIORITY_RANK = {"[CRITICAL]": 0, "[SUGGESTION]": 1, "[NITPICK]": 2}
+
+
+def priority_rank(finding: dict) -> int:
+    return PRIORITY_RANK.get(finding.get("priority"), len(PRIORITY_RANK))
+
+
+def _similarity(terms: set, other: set) -> float:
+    if not terms or not other:
+        return 0.0
+    return len(terms & other) / len(terms | other)
+
+
+class _Cluster:
+    """Findings from one or more experts that describe the same issue."""
+
+    def __init__(self, expert: str, finding: dict, terms: set, order: int):
+        self.members = [(expert, finding)]
+        self.line = finding.get("line_number") or 0
+        self.terms = terms
+        self.order = order
+
+    def accepts(self, finding: dict, terms: set) -> bool:
+        line = finding.get("line_number") or 0
+        return abs(line - self.line) <= DEDUPE_LINE_WINDOW and _similarity(terms, self.terms) >= DEDUPE_SIMILARITY
+
+    def add(self, expert: str, finding: dict, terms: set):
+        self.members.append((expert, finding))
+        self.terms |= terms
+
+    def best(self):
+        """The member kept for the cluster: highest priority, then the earliest reported."""
+        return min(self.members, key=lambda member: priority_rank(member[1]))
+
+
+def dedupe_findings(reviews: Dict[str, List[dict]], max_findings: int = MAX_FINDINGS) -> dict:
+    """
+    Merges findings that flag the same issue and keeps the most important ones.
+
+    Findings on the same file, within DEDUPE_LINE_WINDOW lines and with similar
+    comments are clustered across experts (and across shards of one expert).
+    Each cluster keeps its highest-priority finding, tagged with the other
+    experts that raised it. Clusters are then ranked by priority and by how
+    many experts agree, and only the top `max_findings` are kept.
+
+    Returns {"reviews": {expert: [finding, ...]}, "merged": n, "dropped": n}; every
+    input expert is present in the result, possibly with an empty list.
+    """
+    clusters_by_file = {}
+    clusters = []
+    total = 0
+    for expert, findings in reviews.items():
+        for finding in findings or []:
+            total += 1
+            terms = set(tokenize(finding.get("comment", "")))
+            file_clusters = clusters_by_file.setdefault(normalize_path(finding.get("file_path")), [])
+            cluster = next((c for c in file_clusters if c.accepts(finding, terms)), None)
+            if cluster is None:
+                cluster = _Cluster(expert, finding, terms, len(clusters))
+                file_clusters.append(cluster)
+                clusters.append(cluster)
+            else:
+                cluster.add(expert, finding, terms)
+
+    def rank(cluster: _Cluster) -> tuple:
+        experts = {expert for expert, _ in cluster.members}
+        return priority_rank(cluster.best()[1]), -len(experts), cluster.order
+
+    ranked = sorted(clusters, key=rank)
+    kept = sorted(ranked[:max_findings] if max_findings > 0 else ranked, key=lambda c: c.order)
+
+    deduped = {expert: [] for expert in reviews}
+    for cluster in kept:
+        expert, finding = cluster.best()
+        others = sorted({other for other, _ in cluster.members if other != expert})
+        deduped[expert].append({**finding, "also_flagged_by": others} if others else finding)
+    return {"reviews": deduped, "merged": total - len(clusters), "dropped": len(clusters) - len(kept)}
+
+
+def format_findings_digest(reviews: Dict[str, List[dict]]) -> str:
+    """One line per finding, most important first, without code suggestions, for the synthesis prompt."""
+    entries = [(expert, finding) for expert, findings in reviews.items() for finding in findings]
+    if not entries:
+        return "No findings."
+    entries.sort(key=lambda entry: priority_rank(entry[1]))
+    lines = []
+    for expert, finding in entries:
+        experts = ", ".join([expert, *finding.get("also_flagged_by", [])])
+        comment = " ".join(finding.get("comment", "").split())
+        if len(comment) > DIGEST_COMMENT_CHARS:
+            comment = comment[:DIGEST_COMMENT_CHARS].rstrip() + "..."
+        lines.append(
+            f"- {finding.get('priority', '')} [{experts}] {finding.get('file_path')}:{finding.get('line_number')} {comment}"
+        )
+    return "\n".join(lines)
+
+
+def format_degraded_summary(reviews: Dict[str, List[dict]]) -> str:
+    """Summary used when the synthesizer did not answer in time: the finding counts by priority, without a score."""
+    counts = {}
+    for findings in reviews.values():
+        for finding in findings:
+            priority = finding.get("priority") or "[UNRANKED]"
+            counts[priority] = counts.get(priority, 0) + 1
+    lines = ["_The summary could not be generated in time, so this review has no quality score._", ""]
+    if not counts:
+        lines.append("The experts reported no findings.")
+    for priority in sorted(counts, key=lambda p: PRIORITY_RANK.get(p, len(PRIORITY_RANK))):
+        lines.append(f"- {priority}: {counts[priority]} finding(s)")
+    return "\n".join(lines)
@@ -0,0 +1,204 @@
+# harshith_pr_agent/agents/llm_cache.py
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+CACHE_PATH = os.getenv("REVIEW_CACHE_PATH", ".review_cache.sqlite3")
+CACHE_MAX_ENTRIES = int(os.getenv("REVIEW_CACHE_MAX_ENTRIES", "1024"))
+CACHE_MAX_DISK_ENTRIES = int(os.getenv("REVIEW_CACHE_MAX_DISK_ENTRIES", "50000"))
+CACHE_TTL_SECONDS = float(os.getenv("REVIEW_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+_MISSING = object()
+
+
+def content_hash(text: str) -> str:
+    """Returns a stable hex digest for a piece of text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class LLMResultCache:
+    """
+    Content-addressed cache for LLM results.
+
+    Results are kept in an in-memory LRU tier backed by an optional on-disk
+    SQLite tier, both evicted by size and TTL. Values must be JSON serializable.
+    """
+
+    def __init__(self, path: Optional[str] = CACHE_PATH, max_entries: int = CACHE_MAX_ENTRIES,
+                 max_disk_entries: int = CACHE_MAX_DISK_ENTRIES, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()
+        # _lock guards the memory tier and the counters; SQLite calls hold only _db_lock,
+        # so a slow disk read on a worker thread never blocks memory hits on the event loop.
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._disk_writes = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model: str, persona: str, template: str, content: str) -> str:
+        """Builds a cache key from the model, persona, prompt template and prompt content."""
+        parts = [model, persona, content_hash(template), content_hash(content)]
+        return content_hash("\x1f".join(parts))
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def _memory_get(self, key: str, now: float) -> Any:
+        entry = self._memory.get(key)
+        if entry is None:
+            return _MISSING
+        created_at, value = entry
+        if self._expired(created_at, now):
+            del self._memory[key]
+            return _MISSING
+        self._memory.move_to_end(key)
+        self._stats["memory_hits"] += 1
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Returns the cached value for a key, or the default on a miss."""
+        now = time.time()
+        with self._lock:
+            value = self._memory_get(key, now)
+        if value is not _MISSING:
+            return value
+
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is _MISSING:
+                self._stats["misses"] += 1
+                return default
+            self._stats["disk_hits"] += 1
+            return value
+
+    def set(self, key: str, value: Any):
+        """Stores a value in both cache tiers."""
+        now = time.time()
+        with self._lock:
+            self._memory_put(key, value, now)
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            self._disk_writes += 1
+            if self._disk_writes % 100 == 0:
+                self._evict_disk(now)
+            self._db.commit()
+        with self._lock:
+            self._stats["writes"] += 1
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        """
+        Async counterpart of get for use on the event loop: memory hits are served
+        inline, and the SQLite tier is read on a worker thread so it never blocks the loop.
+        """
+        with self._lock:
+            value = self._memory_get(key, time.time())
+        if value is not _MISSING:
+            return value
+        if self._db is None:
+            with self._lock:
+                self._stats["misses"] += 1
+            return default
+        return await asyncio.to_thread(self.get, key, default)
+
+    async def aset(self, key: str, value: Any):
+        """Async counterpart of set; the SQLite write runs on a worker thread."""
+        if self._db is None:
+            self.set(key, value)
+            return
+        await asyncio.to_thread(self.set, key, value)
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the current size of each tier."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+        if self._db is not None:
+            with self._db_lock:
+                stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return stats
+
+    def clear(self):
+        """Removes every entry from both cache tiers."""
+        with self._lock:
+            self._memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def _memory_put(self, key: str, value: Any, created_at: float):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _disk_get(self, key: str, now: float) -> Any:
+        if self._db is None:
+            return _MISSING
+        with self._db_lock:
+            row = self._db.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return _MISSING
+            raw_value, created_at = row
+            if self._expired(created_at, now):
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._db.commit()
+                return _MISSING
+            self._db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        value = json.loads(raw_value)
+        # Promote to the memory tier, keeping the original creation time for TTL purposes.
+        with self._lock:
+            self._memory_put(key, value, created_at)
+        return value
+
+    def _evict_disk(self, now: float):
+        evicted = 0
+        if self.ttl_seconds > 0:
+            evicted += self._db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+        evicted += self._db.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        ).rowcount
+        with self._lock:
+            self._stats["evictions"] += evicted
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResultCache:
+    """Returns the process-wide LLM result cache."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMResultCache()
+        return _default_cache
@@ -57,16 +57,8 @@ SYNTHESIS_PROMPT = """
 You are the Lead Architect on a code review panel. You have received feedback from your three specialist agents: Maintainability, Performance, and Security.
 Your task is to synthesize their findings into a single, high-level summary for the Pull Request.
 
-Collected Feedback from Specialists:
-
-Maintainability Expert:
-{maintainability_feedback}
-
-Performance Expert:
-{performance_feedback}
-
-Security Expert:
-{security_feedback}
+Collected Feedback from Specialists (duplicates merged, most important first; each line is priority, [experts], file:line and comment):
+{findings}
 
 Your Synthesis:
 
@@ -79,16 +71,24 @@ Conclude with an overall assessment and a final "Code Quality Score" from 1 to 1
 
 CHATBOT_PROMPT = """
 You are an AI code review assistant. A developer is asking a follow-up question about your initial review of their Pull Request.
-Your task is to answer the question based on the full context provided.
+Your task is to answer the question based on the context provided. The code changes and findings below are the parts of the Pull Request most relevant to the question, not necessarily all of it.
 
-**CONTEXT 1: The Original Code Changes (diff):**
+**CONTEXT 1: The Relevant Code Changes (diff):**
 ```diff
 {diff}
-CONTEXT 2: Your Initial Full Review Report:
+```
+CONTEXT 2: Your Initial Review Summary:
 {initial_report}
-CONTEXT 3: The Developer's Follow-up Question:
+
+CONTEXT 3: Relevant Findings from the Expert Panel:
+{findings}
+
+CONTEXT 4: Earlier Questions and Your Answers in this Conversation:
+{history}
+
+CONTEXT 5: The Developer's Follow-up Question:
 "{question}"
 
 Your Answer:
 Based on all the context, provide a direct, helpful, and concise answer to the developer's question. Address them as if you are in a conversation.
-"""
\ No newline at end of file
+"""
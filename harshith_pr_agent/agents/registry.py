@@ -0,0 +1,74 @@
+# harshith_pr_agent/agents/registry.py
+
+import threading
+from typing import Callable, Hashable
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+_resources = {}
+_lock = threading.Lock()
+_creation_locks = {}
+
+# Builds chat model clients; replaceable so benchmarks can run against a fake model.
+_chat_model_factory = ChatGoogleGenerativeAI
+
+
+def get_or_create(kind: str, key: Hashable, factory: Callable):
+    """
+    Returns the process-wide resource of the given kind and key, building it with factory on first use.
+
+    Creation is serialized per resource, so concurrent first requests build it
+    exactly once while lookups of existing resources never wait on a build.
+    """
+    registry_key = (kind, key)
+    resource = _resources.get(registry_key)
+    if resource is not None:
+        return resource
+
+    with _lock:
+        creation_lock = _creation_locks.setdefault(registry_key, threading.Lock())
+    with creation_lock:
+        resource = _resources.get(registry_key)
+        if resource is None:
+            resource = factory()
+            _resources[registry_key] = resource
+        return resource
+
+
+def clear_registry():
+    """Drops every cached resource, e.g. after configuration changes or in benchmarks."""
+    with _lock:
+        _resources.clear()
+        _creation_locks.clear()
+
+
+def set_chat_model_factory(factory: Callable):
+    """Replaces the chat model constructor (called as factory(model=..., temperature=...)) and drops cached resources."""
+    global _chat_model_factory
+    _chat_model_factory = factory
+    clear_registry()
+
+
+def get_chat_model(model: str, temperature: float) -> ChatGoogleGenerativeAI:
+    """Returns the shared chat model client for a model name and temperature."""
+    return get_or_create(
+        "chat_model", (model, temperature),
+        lambda: _chat_model_factory(model=model, temperature=temperature)
+    )
+
+
+def get_prompt_template(template: str) -> ChatPromptTemplate:
+    """Returns the shared prompt template parsed from a template string."""
+    return get_or_create("prompt", template, lambda: ChatPromptTemplate.from_template(template))
+
+
+def get_chain(template: str, model: str, temperature: float, output_schema=None):
+    """Returns the shared prompt | model chain, optionally with structured output."""
+    def build():
+        llm = get_chat_model(model, temperature)
+        if output_schema is not None:
+            llm = llm.with_structured_output(output_schema)
+        return get_prompt_template(template) | llm
+
+    return get_or_create("chain", (template, model, temperature, output_schema), build)
@@ -0,0 +1,201 @@
+# harshith_pr_agent/agents/resilience.py
+
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Optional, Tuple
+
+from harshith_pr_agent.services.metrics import record_llm_outcome
+
+# Upper bound on a single LLM attempt, hedged duplicate included.
+LLM_CALL_TIMEOUT_SECONDS = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "60"))
+# Attempts against a model before falling back to FALLBACK_MODEL.
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+# Base of the exponential backoff between attempts; the wait is drawn uniformly below it (full jitter).
+LLM_RETRY_BACKOFF_SECONDS = float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", "1"))
+# A duplicate request is sent once an attempt is slower than this percentile of the
+# model's recent latencies, and the first answer wins. 0 disables hedging.
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+# Latencies needed before the percentile is trusted; until then the static delay is used.
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_DELAY_SECONDS", "20"))
+LATENCY_WINDOW = 200
+# Smaller model asked once the primary model keeps failing; empty to degrade straight away.
+FALLBACK_MODEL = os.getenv("REVIEW_FALLBACK_MODEL", "gemini-1.5-flash-8b")
+# Time held back from the primary model's attempts so the fallback model still gets a chance.
+FALLBACK_RESERVE_SECONDS = float(os.getenv("LLM_FALLBACK_RESERVE_SECONDS", "15"))
+
+# A review has its summary within this many seconds of starting, degraded if need be.
+REVIEW_SLA_SECONDS = float(os.getenv("REVIEW_SLA_SECONDS", "300"))
+# Upper bound on one expert node; experts also stop SYNTHESIS_RESERVE_SECONDS before the review SLA.
+EXPERT_NODE_DEADLINE_SECONDS = float(os.getenv("EXPERT_NODE_DEADLINE_SECONDS", "120"))
+SYNTHESIS_RESERVE_SECONDS = float(os.getenv("SYNTHESIS_RESERVE_SECONDS", "30"))
+
+
+class LLMCallAborted(RuntimeError):
+    """Raised from inside an LLM call (e.g. by a callback) to stop it; never retried, hedged or degraded."""
+
+
+class LLMUnavailable(RuntimeError):
+    """Raised when neither the model nor its fallback answered before the deadline."""
+
+
+class LatencyTracker:
+    """Recent latencies of successful LLM calls per model, used to pick the hedging delay."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_key: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(model_key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, model_key: str, percentile: float) -> Optional[float]:
+        """The latency percentile of the model, or None until it has LLM_HEDGE_MIN_SAMPLES calls."""
+        with self._lock:
+            samples = sorted(self._samples.get(model_key, ()))
+        if not samples or len(samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(int(len(samples) * percentile / 100), len(samples) - 1)]
+
+    def hedge_delay(self, model_key: str) -> Optional[float]:
+        """Seconds after which a duplicate request is sent, or None when hedging is off."""
+        if LLM_HEDGE_PERCENTILE <= 0:
+            return None
+        delay = self.percentile(model_key, LLM_HEDGE_PERCENTILE)
+        return LLM_HEDGE_DELAY_SECONDS if delay is None else delay
+
+
+_latency_tracker = LatencyTracker()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Returns the process-wide LLM latency tracker."""
+    return _latency_tracker
+
+
+def review_deadline(started_at: float = None) -> float:
+    """Wall-clock time by which a review started at `started_at` (default now) must be summarized."""
+    return (started_at or time.time()) + REVIEW_SLA_SECONDS
+
+
+def configured_deadline(config: Optional[dict]) -> Optional[float]:
+    """The "review_deadline" of a graph run config, if the caller set one."""
+    return ((config or {}).get("configurable") or {}).get("review_deadline")
+
+
+def expert_deadline(deadline: Optional[float]) -> float:
+    """Deadline of an expert node starting now, leaving the synthesizer its share of the review deadline."""
+    node_deadline = time.time() + EXPERT_NODE_DEADLINE_SECONDS
+    if deadline:
+        node_deadline = min(node_deadline, deadline - SYNTHESIS_RESERVE_SECONDS)
+    return node_deadline
+
+
+def _describe(error: Optional[BaseException]) -> str:
+    if error is None:
+        return "no time left"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timed out"
+    return f"{type(error).__name__}: {error}"
+
+
+async def _hedged_ainvoke(chain, input_data: dict, model_key: str, timeout: float):
+    """
+    One attempt at invoking `chain`. If it is still running after the model's
+    hedging delay, a duplicate request is sent and the first successful answer
+    is used; the other request is cancelled. Raises asyncio.TimeoutError when
+    nothing answered within `timeout`, or the error of the last failed request.
+    """
+    tracker = get_latency_tracker()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    hedge_at = None
+    delay = tracker.hedge_delay(model_key)
+    if delay is not None and delay < timeout:
+        hedge_at = started + delay
+    started_at = {asyncio.ensure_future(chain.ainvoke(input_data)): started}
+    error = None
+    try:
+        while started_at:
+            now = loop.time()
+            remaining = started + timeout - now
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            wait = remaining if hedge_at is None else min(remaining, max(hedge_at - now, 0))
+            done, _ = await asyncio.wait(started_at, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task_started = started_at.pop(task)
+                if task.exception() is None:
+                    tracker.record(model_key, loop.time() - task_started)
+                    if task_started != started:
+                        record_llm_outcome("hedge_won")
+                    return task.result()
+                error = task.exception()
+                if isinstance(error, LLMCallAborted):
+                    raise error
+            if hedge_at is not None and loop.time() >= hedge_at and started_at:
+                hedge_at = None
+                record_llm_outcome("hedged")
+                started_at[asyncio.ensure_future(chain.ainvoke(input_data))] = loop.time()
+        raise error
+    finally:
+        for task in started_at:
+            task.cancel()
+
+
+async def resilient_ainvoke(chain, input_data: dict, model_key: str, deadline: float,
+                            fallback_chain=None, fallback_key: str = None) -> Tuple[object, str]:
+    """
+    Invokes `chain` with a timeout per attempt, hedged duplicates for slow
+    attempts and jittered exponential backoff between failed attempts, all
+    before `deadline` (a time.time() value). When the model does not answer,
+    `fallback_chain` gets one attempt with the time left.
+
+    Returns (result, model key that answered). Raises LLMUnavailable when
+    nothing answered in time; LLMCallAborted is re-raised as is.
+    """
+    if fallback_key == model_key:
+        fallback_chain = None
+    reserve = FALLBACK_RESERVE_SECONDS if fallback_chain is not None else 0
+    error = None
+    for attempt in range(LLM_MAX_ATTEMPTS):
+        budget = min(LLM_CALL_TIMEOUT_SECONDS, deadline - time.time() - reserve)
+        if budget <= 0:
+            break
+        try:
+            result = await _hedged_ainvoke(chain, input_data, model_key, budget)
+            record_llm_outcome("ok")
+            return result, model_key
+        except LLMCallAborted:
+            record_llm_outcome("aborted")
+            raise
+        except Exception as e:
+            error = e
+            record_llm_outcome("timeout" if isinstance(e, asyncio.TimeoutError) else "error")
+        if attempt + 1 < LLM_MAX_ATTEMPTS:
+            backoff = random.uniform(0, LLM_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+            backoff = min(backoff, max(deadline - time.time() - reserve, 0))
+            print(f"--- {model_key} attempt {attempt + 1} failed ({_describe(error)}), retrying in {backoff:.1f}s ---")
+            record_llm_outcome("retry")
+            await asyncio.sleep(backoff)
+
+    budget = min(LLM_CALL_TIMEOUT_SECONDS, deadline - time.time())
+    if fallback_chain is not None and budget > 0:
+        print(f"--- {model_key} unavailable ({_describe(error)}), falling back to {fallback_key} ---")
+        try:
+            result = await _hedged_ainvoke(fallback_chain, input_data, fallback_key, budget)
+            record_llm_outcome("fallback")
+            return result, fallback_key
+        except LLMCallAborted:
+            record_llm_outcome("aborted")
+            raise
+        except Exception as e:
+            error = e
+            record_llm_outcome("fallback_failed")
+    raise LLMUnavailable(f"no answer from {model_key} before the deadline ({_describe(error)})")
@@ -0,0 +1,65 @@
+# harshith_pr_agent/agents/retrieval.py
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import List, Tuple
+
+IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+CAMEL_CASE_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+STOP_WORDS = frozenset({
+    "the", "and", "for", "this", "that", "with", "what", "why", "how", "does", "is", "are", "was", "can",
+    "you", "your", "it", "in", "of", "to", "on", "a", "an", "be", "do", "we", "or", "if", "not", "self",
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased terms of a text; identifiers are also split on snake_case and camelCase boundaries."""
+    terms = []
+    for identifier in IDENTIFIER_RE.findall(text):
+        parts = [p for chunk in identifier.split("_") for p in CAMEL_CASE_RE.findall(chunk)]
+        for term in {identifier, *parts}:
+            term = term.lower()
+            if len(term) > 1 and term not in STOP_WORDS:
+                terms.append(term)
+    return terms
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of documents.
+
+    Postings are kept per term, so a search only touches the documents that
+    share a term with the query.
+    """
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_lengths = []
+        self.postings = defaultdict(list)
+        for doc_id, document in enumerate(documents):
+            terms = Counter(tokenize(document))
+            self.doc_lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                self.postings[term].append((doc_id, frequency))
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def search(self, query: str, top_k: int = None) -> List[Tuple[int, float]]:
+        """Returns (document index, score) pairs with a positive score, best first."""
+        scores = defaultdict(float)
+        doc_count = len(self.doc_lengths)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / (self.avg_length or 1))
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:top_k] if top_k else ranked
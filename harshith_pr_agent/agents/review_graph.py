@@ -1,95 +1,304 @@
 # harshith_pr_agent/agents/review_graph.py
 
+import asyncio
+import json
 import os
-from typing import TypedDict
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.graph import StateGraph, END
+from typing import Annotated, List, TypedDict
+from langgraph.graph import StateGraph, START, END
 
+from .diff_index import normalize_path
+from .diff_sharding import parse_file_paths, split_diff_by_file, split_file_into_hunks
+from .routing import route_diff
+from .findings import dedupe_findings, format_degraded_summary, format_findings_digest
+from .llm_cache import LLMResultCache, get_llm_cache
+from .registry import get_chain, get_or_create
+from .resilience import (
+    FALLBACK_MODEL, LLMUnavailable, configured_deadline, expert_deadline, resilient_ainvoke, review_deadline
+)
+from harshith_pr_agent.services.concurrency import llm_semaphore
+from harshith_pr_agent.agents.token_usage import get_token_usage_handler
+from harshith_pr_agent.services.metrics import record_cache, record_llm_outcome, span
+from harshith_pr_agent.services.review_checkpoints import get_checkpoint_store
 from .prompts import BASE_PROMPT_TEMPLATE, PERSONAS, SYNTHESIS_PROMPT, PRReviewPanel
 
+# Maximum number of graph nodes (expert LLM calls) allowed to run at the same time.
+MAX_CONCURRENCY = int(os.getenv("REVIEW_MAX_CONCURRENCY", "3"))
+
+# Maximum number of diff shards a single persona reviews at the same time.
+SHARD_MAX_CONCURRENCY = int(os.getenv("REVIEW_SHARD_MAX_CONCURRENCY", "4"))
+
+EXPERT_MODEL = "gemini-1.5-flash"
+EXPERT_TEMPERATURE = 0
+# Cheaper tier for small or low-risk shards; empty to always use EXPERT_MODEL.
+EXPERT_FAST_MODEL = os.getenv("REVIEW_FAST_MODEL", "gemini-1.5-flash-8b")
+SYNTHESIS_MODEL = "gemini-1.5-flash"
+SYNTHESIS_TEMPERATURE = 0.3
+
+EXPERT_NODES = {
+    "maintainability": "Maintainability",
+    "performance": "Performance",
+    "security": "Security",
+}
+
+
+def merge_reviews(current: dict, update: dict) -> dict:
+    """Reducer that merges the per-persona results of parallel expert branches."""
+    merged = dict(current or {})
+    merged.update(update or {})
+    return merged
+
 
 class GraphState(TypedDict):
     pr_url: str
     title: str
     description: str
     diff: str
-    reviews: dict 
-    synthesis: str 
+    persona_shards: dict
+    routing: dict
+    skipped_files: List[dict]
+    prior_reviews: dict
+    reviews: Annotated[dict, merge_reviews]
+    findings_stats: dict
+    synthesis: str
+    # Persona (or "Synthesizer") -> why its result is incomplete.
+    degraded: Annotated[dict, merge_reviews]
 
-def create_review_graph():
-    """Creates the LangGraph agent for the expert panel review."""
-    
+
+def file_sections(diff: str) -> List[tuple]:
+    """Splits a shard into (path, diff section) pairs in diff order, joining the sections of the same file."""
+    sections = {}
+    for file_diff in split_diff_by_file(diff):
+        header, _ = split_file_into_hunks(file_diff)
+        old_path, new_path = parse_file_paths(header)
+        path = new_path or old_path or ""
+        sections[path] = sections.get(path, "") + file_diff
+    return list(sections.items())
+
+
+def graph_run_config(config: dict = None) -> dict:
+    """
+    Returns the runtime config used when invoking the review graph, merged with
+    an optional caller config whose callbacks run alongside the token usage callback.
+
+    The caller's "configurable" carries the checkpoint "thread_id" (required when
+    checkpointing is enabled) and the "review_deadline" (a time.time() value).
+    """
+    config = dict(config or {})
+    callbacks = [get_token_usage_handler(), *config.pop("callbacks", [])]
+    return {"max_concurrency": MAX_CONCURRENCY, **config, "callbacks": callbacks}
+
+def create_review_graph(cache: LLMResultCache = None, checkpointer=None):
+    """
+    Creates the LangGraph agent for the expert panel review.
+
+    The expert and synthesis nodes are coroutines, so the compiled graph must be
+    run with ainvoke/astream. With a checkpointer, the state is saved after every
+    node so a failed run can be resumed.
+    """
     
-    llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0)
+    cache = cache or get_llm_cache()
+    # Chains and clients come from the process-wide registry and are built once.
+    chain = get_chain(BASE_PROMPT_TEMPLATE, EXPERT_MODEL, EXPERT_TEMPERATURE, PRReviewPanel)
+    fast_chain = (
+        get_chain(BASE_PROMPT_TEMPLATE, EXPERT_FAST_MODEL, EXPERT_TEMPERATURE, PRReviewPanel)
+        if EXPERT_FAST_MODEL else chain
+    )
+    synthesis_chain = get_chain(SYNTHESIS_PROMPT, SYNTHESIS_MODEL, SYNTHESIS_TEMPERATURE)
+    expert_model_key = f"{EXPERT_MODEL}@{EXPERT_TEMPERATURE}"
+    fast_model_key = f"{EXPERT_FAST_MODEL}@{EXPERT_TEMPERATURE}"
+    synthesis_model_key = f"{SYNTHESIS_MODEL}@{SYNTHESIS_TEMPERATURE}"
+    # Asked when the primary model times out or keeps failing.
+    expert_fallback_chain = (
+        get_chain(BASE_PROMPT_TEMPLATE, FALLBACK_MODEL, EXPERT_TEMPERATURE, PRReviewPanel) if FALLBACK_MODEL else None
+    )
+    synthesis_fallback_chain = (
+        get_chain(SYNTHESIS_PROMPT, FALLBACK_MODEL, SYNTHESIS_TEMPERATURE) if FALLBACK_MODEL else None
+    )
+    expert_fallback_key = f"{FALLBACK_MODEL}@{EXPERT_TEMPERATURE}"
+    synthesis_fallback_key = f"{FALLBACK_MODEL}@{SYNTHESIS_TEMPERATURE}"
     
    
-    def run_expert_reviewer(state: GraphState, persona_name: str) -> dict:
+    async def run_expert_reviewer(state: GraphState, persona_name: str, config: dict) -> dict:
         """Runs a single expert reviewer persona."""
         print(f"--- Running {persona_name} Expert ---")
+        with span("expert", persona=persona_name) as expert_span:
+            return await review_as_persona(state, persona_name, expert_span, configured_deadline(config))
+
+    async def review_as_persona(state: GraphState, persona_name: str, expert_span, deadline: float = None) -> dict:
         persona_details = PERSONAS[persona_name]
         
-        
-        structured_llm = llm.with_structured_output(PRReviewPanel)
-        
-        
-        prompt_template = ChatPromptTemplate.from_template(BASE_PROMPT_TEMPLATE)
+        # 3. Prepare the shards routed to this persona
+        shards = [shard for shard in (state.get("persona_shards") or {}).get(persona_name, []) if shard["diff"].strip()]
 
-        
-        chain = prompt_template | structured_llm
-        
-        # 3. Prepare the input variables for the template
-        input_data = {
-            "persona": persona_details["persona"],
-            "persona_description": persona_details["persona_description"],
-            "title": state["title"],
-            "description": state["description"],
-            "diff": state["diff"]
-        }
-        
-        
-        review_panel = chain.invoke(input_data)
-       
+        # Findings are cached per file of a shard, keyed by the model, persona, prompt and that file's diff
+        # alone: a push that changes one file, or an edited PR title or description, only sends the
+        # changed files to the LLM again. Cached findings were made with the title and description current
+        # when the file was first reviewed.
+        shard_sections = []
+        for shard in shards:
+            model_key = fast_model_key if shard["fast"] else expert_model_key
+            shard_sections.append([
+                (path, section, cache.make_key(model_key, persona_name, BASE_PROMPT_TEMPLATE, section))
+                for path, section in file_sections(shard["diff"])
+            ])
+        cached = {}
+        for sections in shard_sections:
+            for _, _, key in sections:
+                if key not in cached:
+                    cached[key] = await cache.aget(key)
+        shard_results = [
+            [finding for _, _, key in sections for finding in cached[key] or []] for sections in shard_sections
+        ]
+        missing = [[section for section in sections if cached[section[2]] is None] for sections in shard_sections]
+        pending = [i for i, sections in enumerate(missing) if sections]
+        files = sum(len(sections) for sections in shard_sections)
+        misses = sum(len(sections) for sections in missing)
+        print(f"--- {persona_name}: {files - misses} file(s) cached, {misses} to review in {len(pending)} shard(s) ---")
+        record_cache(files - misses, misses)
+        expert_span.set("shards", len(shards))
+        expert_span.set("fast_shards", sum(shard["fast"] for shard in shards))
+
+        # Map: review the uncached files of every shard concurrently. Reduce: fold the findings into one panel.
+        shard_slots = asyncio.Semaphore(SHARD_MAX_CONCURRENCY)
+        deadline = expert_deadline(deadline)
+
+        async def review_shard(diff: str, fast: bool):
+            model_key = fast_model_key if fast else expert_model_key
+            input_data = {
+                "persona": persona_details["persona"],
+                "persona_description": persona_details["persona_description"],
+                "title": state["title"],
+                "description": state["description"],
+                "diff": diff
+            }
+            async with shard_slots, llm_semaphore():
+                try:
+                    return await resilient_ainvoke(
+                        fast_chain if fast else chain, input_data, model_key, deadline,
+                        expert_fallback_chain, expert_fallback_key
+                    )
+                except LLMUnavailable as e:
+                    print(f"--- {persona_name}: shard not reviewed, {e} ---")
+                    record_llm_outcome("degraded")
+                    return None, None
+
+        failed = 0
+        if pending:
+            shard_panels = await asyncio.gather(*(
+                review_shard("".join(section for _, section, _ in missing[i]), shards[i]["fast"]) for i in pending
+            ))
+            for i, (panel, model_key) in zip(pending, shard_panels):
+                if model_key is None:
+                    failed += 1
+                if panel is None:
+                    continue
+                findings = [r.dict() for r in panel.reviews]
+                shard_results[i].extend(findings)
+                # Fallback answers are not cached, so the next run asks the primary model again.
+                if model_key != (fast_model_key if shards[i]["fast"] else expert_model_key):
+                    continue
+                by_path = {}
+                for finding in findings:
+                    by_path.setdefault(normalize_path(finding.get("file_path")), []).append(finding)
+                for path, _, key in missing[i]:
+                    await cache.aset(key, by_path.get(normalize_path(path), []))
+
+        review_panel = PRReviewPanel(
+            reviews=[review for result in shard_results for review in result]
+        )
 
         review_dicts = [r.dict() for r in review_panel.reviews]
+
+        # Incremental reviews carry over the still-valid findings from the previous head.
+        prior_findings = (state.get("prior_reviews") or {}).get(persona_name, [])
+        review_dicts = prior_findings + review_dicts
         
-        current_reviews = state.get("reviews", {})
-        current_reviews[persona_name] = review_dicts
-        return {"reviews": current_reviews}
+        # Only this persona's slice is returned; merge_reviews combines the branches.
+        if failed:
+            expert_span.set("degraded_shards", failed)
+            return {
+                "reviews": {persona_name: review_dicts},
+                "degraded": {persona_name: f"{failed} of {len(pending)} shard(s) could not be reviewed"}
+            }
+        return {"reviews": {persona_name: review_dicts}}
 
-    def run_maintainability_reviewer(state: GraphState):
-        return run_expert_reviewer(state, "Maintainability")
+    def run_router(state: GraphState):
+        """Decides which files each persona reviews and splits them into shards that fit one expert prompt."""
+        with span("routing") as routing_span:
+            routed = route_diff(state["diff"], list(EXPERT_NODES.values()), EXPERT_FAST_MODEL)
+            calls = routed["routing"]["expert_calls"]
+            routing_span.set("expert_calls", calls["planned"])
+            routing_span.set("expert_calls_saved", calls["saved"])
+        personas = ", ".join(
+            f"{persona} {decision['files']} file(s)/{decision['shards']} shard(s)"
+            for persona, decision in routed["routing"]["personas"].items()
+        )
+        print(f"--- Routed diff: {personas}; {calls['saved']} expert call(s) saved, {calls['fast']} on the fast tier ---")
+        # What did not fit a persona's token budget joins the files left out before the review.
+        over_budget = {}
+        for persona, entries in routed["skipped"].items():
+            for entry in entries:
+                over_budget.setdefault((entry["file_path"], entry["reason"]), []).append(persona)
+        skipped_files = (state.get("skipped_files") or []) + [
+            {"file_path": path, "reason": f"{reason} ({', '.join(personas)})"}
+            for (path, reason), personas in over_budget.items()
+        ]
+        return {"persona_shards": routed["shards"], "routing": routed["routing"], "skipped_files": skipped_files}
 
-    def run_performance_reviewer(state: GraphState):
-        return run_expert_reviewer(state, "Performance")
+    def select_experts(state: GraphState) -> List[str]:
+        """Conditional edge: only the personas with files routed to them run."""
+        persona_shards = state.get("persona_shards") or {}
+        selected = [node_name for node_name, persona_name in EXPERT_NODES.items() if persona_shards.get(persona_name)]
+        return selected or ["merger"]
 
-    def run_security_reviewer(state: GraphState):
-        return run_expert_reviewer(state, "Security")
+    def make_expert_node(persona_name: str):
+        async def run_persona_reviewer(state: GraphState, config: dict):
+            return await run_expert_reviewer(state, persona_name, config)
+        return run_persona_reviewer
 
-    def run_synthesizer(state: GraphState):
+    def run_merger(state: GraphState):
+        """Merges duplicate findings across experts and keeps the most important ones."""
+        # Personas that were routed no files keep their carried-over findings and still appear in the report.
+        reviews = {
+            persona_name: (state.get("prior_reviews") or {}).get(persona_name, [])
+            for persona_name in EXPERT_NODES.values()
+        }
+        reviews.update(state.get("reviews") or {})
+        merged = dedupe_findings(reviews)
+        print(f"--- Merged {merged['merged']} duplicate finding(s), dropped {merged['dropped']} over the cap ---")
+        return {"reviews": merged["reviews"], "findings_stats": {"merged": merged["merged"], "dropped": merged["dropped"]}}
+
+    async def run_synthesizer(state: GraphState, config: dict):
         """Synthesizes the reviews from all experts."""
         print("--- Synthesizing All Reviews ---")
-        reviews = state["reviews"]
-        
-        
-        text_llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.3)
-        
-       
-        synthesis_prompt_template = ChatPromptTemplate.from_template(SYNTHESIS_PROMPT)
+        # The findings arrive deduplicated from the merger; the digest leaves out suggestions.
+        synthesis_input = {"findings": format_findings_digest(state.get("reviews", {}))}
 
-        
-        synthesis_chain = synthesis_prompt_template | text_llm
-        
-       
-        synthesis_input = {
-            "maintainability_feedback": reviews.get("Maintainability", "No feedback."),
-            "performance_feedback": reviews.get("Performance", "No feedback."),
-            "security_feedback": reviews.get("Security", "No feedback.")
-        }
-        
-        
-        synthesis_result = synthesis_chain.invoke(synthesis_input).content
-        # ===================================================================================
+        cache_key = cache.make_key(
+            synthesis_model_key, "Synthesizer", SYNTHESIS_PROMPT, json.dumps(synthesis_input, sort_keys=True, default=str)
+        )
+        with span("synthesis"):
+            synthesis_result = await cache.aget(cache_key)
+            record_cache(int(synthesis_result is not None), int(synthesis_result is None))
+            if synthesis_result is None:
+                try:
+                    async with llm_semaphore():
+                        message, model_key = await resilient_ainvoke(
+                            synthesis_chain, synthesis_input, synthesis_model_key,
+                            configured_deadline(config) or review_deadline(),
+                            synthesis_fallback_chain, synthesis_fallback_key
+                        )
+                except LLMUnavailable as e:
+                    # The review still finishes within its SLA, with a summary built from the findings alone.
+                    print(f"--- Synthesis degraded, {e} ---")
+                    record_llm_outcome("degraded")
+                    return {
+                        "synthesis": format_degraded_summary(state.get("reviews", {})),
+                        "degraded": {"Synthesizer": str(e)}
+                    }
+                synthesis_result = message.content
+                if model_key == synthesis_model_key:
+                    await cache.aset(cache_key, synthesis_result)
 
         return {"synthesis": synthesis_result}
 
@@ -97,16 +306,31 @@ def create_review_graph():
     workflow = StateGraph(GraphState)
 
    
-    workflow.add_node("maintainability", run_maintainability_reviewer)
-    workflow.add_node("performance", run_performance_reviewer)
-    workflow.add_node("security", run_security_reviewer)
+    workflow.add_node("router", run_router)
+    for node_name, persona_name in EXPERT_NODES.items():
+        workflow.add_node(node_name, make_expert_node(persona_name))
+    workflow.add_node("merger", run_merger)
     workflow.add_node("synthesizer", run_synthesizer)
     
-    
-    workflow.set_entry_point("maintainability")
-    workflow.add_edge("maintainability", "performance")
-    workflow.add_edge("performance", "security")
-    workflow.add_edge("security", "synthesizer")
+    # The router picks the experts with files to review; they run in parallel and
+    # the merger runs once they are all done, before the synthesizer.
+    workflow.add_edge(START, "router")
+    workflow.add_conditional_edges("router", select_experts, [*EXPERT_NODES, "merger"])
+    for node_name in EXPERT_NODES:
+        workflow.add_edge(node_name, "merger")
+    workflow.add_edge("merger", "synthesizer")
     workflow.add_edge("synthesizer", END)
 
-    return workflow.compile()
\ No newline at end of file
+    return workflow.compile(checkpointer=checkpointer)
+
+def get_review_graph(cache: LLMResultCache = None):
+    """
+    Returns the process-wide compiled review graph, compiling it on first use.
+    It is checkpointed in the review checkpoint store unless checkpointing is disabled.
+    """
+    cache_key = "default" if cache is None else id(cache)
+    checkpointer = get_checkpoint_store()
+    return get_or_create(
+        "review_graph", (EXPERT_MODEL, EXPERT_FAST_MODEL, SYNTHESIS_MODEL, FALLBACK_MODEL, cache_key, id(checkpointer)),
+        lambda: create_review_graph(cache, checkpointer)
+    )
@@ -0,0 +1,125 @@
+# harshith_pr_agent/agents/routing.py
+
+import os
+import re
+from typing import List, Set
+
+from .diff_compaction import PERSONA_TOKEN_BUDGET, fit_to_budget
+from .diff_sharding import estimate_tokens, parse_file_paths, shard_diff, split_diff_by_file, split_file_into_hunks
+
+# Set to 0 to have every persona review every file with the default model.
+ROUTING_ENABLED = os.getenv("REVIEW_ROUTING", "1") == "1"
+# Shards no larger than this (or touching only docs and tests) go to the fast model tier.
+FAST_TIER_MAX_TOKENS = int(os.getenv("REVIEW_FAST_TIER_MAX_TOKENS", "1000"))
+
+DOC_EXTENSIONS = (".md", ".markdown", ".rst", ".txt", ".adoc")
+CONFIG_EXTENSIONS = (".yml", ".yaml", ".toml", ".ini", ".cfg", ".conf", ".json", ".env", ".properties", ".xml")
+CONFIG_NAMES = ("dockerfile", "requirements.txt", "setup.py", "setup.cfg", "pipfile", "makefile", "procfile")
+TEST_PATH_RE = re.compile(r"(^|/)(tests?|__tests__|spec)/|(^|/)test_[^/]*$|_test\.[a-z]+$|\.(test|spec)\.[a-z]+$")
+DOC_PATH_RE = re.compile(r"(^|/)docs?/")
+# Paths and added lines that make a change worth a security review.
+SENSITIVE_RE = re.compile(
+    r"auth|login|passw|secret|token|credential|session|cookie|csrf|jwt|oauth|permission|crypt|hashlib|hmac|"
+    r"ssl|tls|cert|subprocess|os\.system|popen|exec\(|eval\(|pickle|yaml\.load|deserial|shell=|"
+    r"\bsql\b|select\s.+\sfrom|insert\s+into|update\s.+\sset|delete\s+from|\.execute\(|cursor|raw\(|"
+    r"request\.|upload|redirect|cors|\.env\b|api_key|private_key",
+    re.IGNORECASE
+)
+
+# Which file kinds each persona reviews: a file is routed to a persona when it has any of these tags.
+PERSONA_SCOPES = {
+    "Maintainability": {"code", "test", "config", "docs"},
+    "Performance": {"code"},
+    "Security": {"sensitive", "config"},
+}
+
+
+def classify_file(path: str, file_diff: str) -> Set[str]:
+    """
+    Tags a changed file from its path, extension and added lines:
+    "docs", "test", "config" or "code", plus "sensitive" when it touches auth,
+    crypto, subprocesses, SQL, secrets or similar.
+    """
+    lowered = (path or "").lower()
+    name = lowered.rsplit("/", 1)[-1]
+    if lowered.endswith(DOC_EXTENSIONS) or (DOC_PATH_RE.search(lowered) and not lowered.endswith(".py")):
+        tags = {"docs"}
+    elif TEST_PATH_RE.search(lowered):
+        tags = {"test"}
+    elif lowered.endswith(CONFIG_EXTENSIONS) or name in CONFIG_NAMES or name.startswith(".env"):
+        tags = {"config"}
+    else:
+        tags = {"code"}
+
+    added = "\n".join(line[1:] for line in file_diff.splitlines() if line.startswith("+") and not line.startswith("+++"))
+    if "docs" not in tags and (SENSITIVE_RE.search(lowered) or SENSITIVE_RE.search(added)):
+        tags.add("sensitive")
+    return tags
+
+
+def _is_low_risk(tags: Set[str]) -> bool:
+    return "sensitive" not in tags and bool(tags & {"docs", "test"})
+
+
+def route_diff(diff: str, personas: List[str], fast_model: str = None,
+               token_budget: int = PERSONA_TOKEN_BUDGET) -> dict:
+    """
+    Decides which files each persona reviews and which model tier each shard uses.
+    Each persona's files are fitted to `token_budget` before they are sharded.
+
+    Returns {"shards": {persona: [{"diff": shard, "fast": bool}, ...]}, "routing": decisions,
+    "skipped": {persona: [{"file_path", "reason"}, ...]}}, where the decisions record the
+    file tags, each persona's files, and the expert LLM calls planned against reviewing
+    every file with every persona, and "skipped" what did not fit a persona's budget.
+    """
+    files = []
+    for file_diff in split_diff_by_file(diff):
+        header, _ = split_file_into_hunks(file_diff)
+        old_path, new_path = parse_file_paths(header)
+        path = new_path or old_path or ""
+        files.append((path, file_diff, classify_file(path, file_diff) if ROUTING_ENABLED else {"code"}))
+
+    baseline_shards = len(shard_diff(diff))
+    shards, skipped = {}, {}
+    decisions = {"enabled": ROUTING_ENABLED, "files": {path: sorted(tags) for path, _, tags in files}, "personas": {}}
+    for persona in personas:
+        scope = PERSONA_SCOPES.get(persona)
+        selected = [(path, file_diff, tags) for path, file_diff, tags in files
+                    if not ROUTING_ENABLED or scope is None or tags & scope]
+        tags_by_path = {path: tags for path, _, tags in selected}
+        fitted = fit_to_budget("".join(file_diff for _, file_diff, _ in selected), token_budget)
+        skipped[persona] = fitted["skipped"]
+        persona_shards = []
+        for shard in shard_diff(fitted["diff"]):
+            shard_tags = [tags_by_path.get(path, set()) for path in _shard_paths(shard)]
+            fast = bool(fast_model) and ROUTING_ENABLED and (
+                all(_is_low_risk(tags) for tags in shard_tags)
+                or (estimate_tokens(shard) <= FAST_TIER_MAX_TOKENS and not any("sensitive" in t for t in shard_tags))
+            )
+            persona_shards.append({"diff": shard, "fast": fast})
+        shards[persona] = persona_shards
+        decisions["personas"][persona] = {
+            "files": len(selected),
+            "skipped_files": len(files) - len(selected),
+            "shards": len(persona_shards),
+            "fast_shards": sum(shard["fast"] for shard in persona_shards),
+            "over_budget_files": len(fitted["skipped"]),
+        }
+
+    planned = sum(len(persona_shards) for persona_shards in shards.values())
+    decisions["expert_calls"] = {
+        "planned": planned,
+        "fast": sum(d["fast_shards"] for d in decisions["personas"].values()),
+        "without_routing": baseline_shards * len(personas),
+        "saved": baseline_shards * len(personas) - planned,
+    }
+    return {"shards": shards, "routing": decisions, "skipped": skipped}
+
+
+def _shard_paths(shard: str) -> List[str]:
+    paths = []
+    for file_diff in split_diff_by_file(shard):
+        header, _ = split_file_into_hunks(file_diff)
+        old_path, new_path = parse_file_paths(header)
+        paths.append(new_path or old_path or "")
+    return paths
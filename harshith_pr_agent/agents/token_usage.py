@@ -0,0 +1,42 @@
+# harshith_pr_agent/agents/token_usage.py
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from harshith_pr_agent.services.metrics import record_tokens
+
+
+def _usage_from_result(response) -> tuple:
+    """Extracts (prompt, completion) token counts from an LLMResult, whichever way the provider reports them."""
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+    if prompt or completion:
+        return prompt, completion
+    usage = (response.llm_output or {}).get("token_usage") or (response.llm_output or {}).get("usage_metadata") or {}
+    return (
+        usage.get("prompt_tokens", usage.get("prompt_token_count", 0)),
+        usage.get("completion_tokens", usage.get("candidates_token_count", 0)),
+    )
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """Callback that adds the token usage of every LLM call to the span it runs in."""
+
+    run_inline = True
+
+    def on_llm_end(self, response, **kwargs):
+        prompt, completion = _usage_from_result(response)
+        if prompt or completion:
+            record_tokens(prompt, completion)
+
+
+_token_usage_handler = TokenUsageHandler()
+
+
+def get_token_usage_handler() -> TokenUsageHandler:
+    """Returns the shared token usage callback to attach to LLM runs."""
+    return _token_usage_handler
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import threading
+import weakref
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+from .github_connector import (
+    DIFF_MEDIA_TYPE, MAX_PR_FILES, PAGE_CONCURRENCY, PAGE_SIZE, FilesDiffBuilder, GitHubConnector
+)
+from .http_client import (
+    CONNECT_TIMEOUT, MAX_RETRIES, MAX_RETRY_WAIT_SECONDS, POOL_SIZE, READ_TIMEOUT,
+    is_retryable, retry_delay
+)
+from harshith_pr_agent.services.concurrency import github_semaphore
+from .rate_limiter import request_priority
+from harshith_pr_agent.services.metrics import record_retry, record_throttle
+
+
+class AsyncGitHubConnector(GitHubConnector):
+    """
+    GitHubConnector whose API calls are coroutines over a pooled httpx.AsyncClient.
+
+    The retry policy and ETag cache are shared with the synchronous connector.
+    The httpx client is bound to the loop that created it, so use
+    get_async_github_connector() for a shared per-loop instance, or an
+    `async with` block for a short-lived one.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def _arequest(self, method: str, url: str, headers: dict = None, **kwargs) -> httpx.Response:
+        """Async counterpart of GitHubConnector._request."""
+        priority = request_priority(method)
+        for attempt in range(MAX_RETRIES + 1):
+            api_key, waited = await self.rate_limiter.aacquire(priority)
+            if waited:
+                record_throttle(waited)
+            request_headers = {**self.headers, "Authorization": f"token {api_key}", **(headers or {})}
+            try:
+                async with github_semaphore():
+                    response = await self.client.request(method, url, headers=request_headers, **kwargs)
+            except httpx.TransportError as e:
+                if method.upper() != "GET" or attempt == MAX_RETRIES:
+                    raise
+                delay = retry_delay(attempt)
+                print(f"--- GitHub {method} {url} failed ({e}), retrying in {delay:.1f}s ---")
+                record_retry()
+                await asyncio.sleep(delay)
+                continue
+
+            rate_limited = self._record_rate_limit(api_key, response)
+            if attempt == MAX_RETRIES or not is_retryable(method, response.status_code, response.headers, response.text):
+                return response
+            if rate_limited:
+                delay = self.rate_limiter.estimated_wait(priority)
+            else:
+                delay = retry_delay(attempt, response.headers)
+            if delay > MAX_RETRY_WAIT_SECONDS:
+                return response
+            print(f"--- GitHub {method} {url} returned {response.status_code}, retrying in {delay:.1f}s ---")
+            record_retry()
+            if not rate_limited:
+                await asyncio.sleep(delay)
+        return response
+
+    async def _aconditional_get(self, url: str, accept: str = None) -> str:
+        """Async counterpart of GitHubConnector._conditional_get."""
+        headers = {"Accept": accept} if accept else {}
+        cache_key = (self._cache_scope, url, accept or self.headers["Accept"])
+        cached = self.etag_cache.get(cache_key)
+        if cached is not None:
+            headers["If-None-Match"] = cached[0]
+
+        response = await self._arequest("GET", url, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            self.etag_cache.record_hit()
+            return cached[1]
+        response.raise_for_status()
+        etag = response.headers.get("ETag")
+        if etag:
+            self.etag_cache.put(cache_key, etag, response.text)
+        return response.text
+
+    async def _aget_json(self, url: str):
+        return json.loads(await self._aconditional_get(url))
+
+    async def _aiter_pages(self, url: str, params: dict = None, total: int = None) -> AsyncIterator[Dict]:
+        """
+        Async counterpart of _iter_pages that keeps up to PAGE_CONCURRENCY page
+        requests in flight once the first page turns out to be full. With
+        `total` known (e.g. a PR's changed_files), only the pages needed are
+        requested. Items are yielded in order; leaving the loop early cancels
+        the page requests still in flight.
+        """
+        last_page = -(-total // PAGE_SIZE) if total is not None else None
+        in_flight = {}
+        next_page = page = 1
+        try:
+            while True:
+                window = PAGE_CONCURRENCY if last_page is not None or page > 1 else 1
+                while len(in_flight) < window and (last_page is None or next_page <= last_page):
+                    task = asyncio.ensure_future(self._aget_json(self._page_url(url, next_page, params)))
+                    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                    in_flight[next_page] = task
+                    next_page += 1
+                if page not in in_flight:
+                    return
+                items = await in_flight.pop(page)
+                for item in items:
+                    yield item
+                if len(items) < PAGE_SIZE:
+                    return
+                page += 1
+        finally:
+            for task in in_flight.values():
+                task.cancel()
+
+    async def aget_pr_metadata(self, pr_url: str) -> dict:
+        return self._metadata_from_pull(await self._aget_json(self._pull_api_url(pr_url)))
+
+    async def aget_pr_diff(self, pr_url: str) -> str:
+        return await self._aconditional_get(self._pull_api_url(pr_url), accept=DIFF_MEDIA_TYPE)
+
+    def aiter_pr_files(self, pr_url: str, changed_files: int = None) -> AsyncIterator[Dict]:
+        """Yields the changed files of a PR, fetching pages concurrently."""
+        total = min(changed_files, MAX_PR_FILES) if changed_files is not None else None
+        return self._aiter_pages(self._pull_files_api_url(pr_url), total=total)
+
+    async def aget_pr_files_diff(self, pr_url: str, skip_path: Callable[[str], Optional[str]] = None,
+                                 max_chars: int = None, changed_files: int = None) -> dict:
+        """
+        Async counterpart of get_pr_files_diff: builds the PR diff from concurrently
+        fetched pages of the files endpoint and stops at the size budget.
+        """
+        builder = FilesDiffBuilder(skip_path, max_chars)
+        files = self.aiter_pr_files(pr_url, changed_files)
+        try:
+            async for file_entry in files:
+                if not builder.add(file_entry):
+                    break
+        finally:
+            await files.aclose()
+        return builder.result()
+
+    async def acompare_commits(self, pr_url: str, base_sha: str, head_sha: str) -> dict:
+        return self._comparison_from_compare(await self._aget_json(self._compare_api_url(pr_url, base_sha, head_sha)))
+
+    async def apost_comment(self, pr_url: str, comment: str):
+        print("--- Posting comment to GitHub ---")
+        response = await self._arequest("POST", self._issue_comments_api_url(pr_url), json={"body": comment})
+        response.raise_for_status()
+        print("--- Comment posted successfully ---")
+
+    def aiter_pr_comments(self, pr_url: str) -> AsyncIterator[Dict]:
+        return self._aiter_pages(self._issue_comments_api_url(pr_url))
+
+    async def aget_pr_comments(self, pr_url: str) -> List[Dict]:
+        print("--- Fetching PR comments from GitHub ---")
+        return [comment async for comment in self.aiter_pr_comments(pr_url)]
+
+    async def acreate_review(self, pr_url: str, body: str, comments: List[Dict], commit_id: str = None):
+        print(f"--- Posting review with {len(comments)} inline comment(s) to GitHub ---")
+        response = await self._arequest(
+            "POST", self._reviews_api_url(pr_url), json=self._review_payload(body, comments, commit_id)
+        )
+        response.raise_for_status()
+        print("--- Review posted successfully ---")
+
+    def aiter_pr_reviews(self, pr_url: str) -> AsyncIterator[Dict]:
+        return self._aiter_pages(self._reviews_api_url(pr_url))
+
+    async def aget_pr_reviews(self, pr_url: str) -> List[Dict]:
+        return [review async for review in self.aiter_pr_reviews(pr_url)]
+
+
+_loop_connectors = weakref.WeakKeyDictionary()
+_loop_connectors_lock = threading.Lock()
+
+
+def get_async_github_connector() -> AsyncGitHubConnector:
+    """Returns the shared AsyncGitHubConnector of the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _loop_connectors_lock:
+        connector = _loop_connectors.get(loop)
+        if connector is None:
+            connector = AsyncGitHubConnector()
+            _loop_connectors[loop] = connector
+        return connector
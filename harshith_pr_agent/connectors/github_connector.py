@@ -1,21 +1,137 @@
+import hashlib
+import json
 import os
+import threading
+import time
+from urllib.parse import urlencode
 import requests
 from dotenv import load_dotenv
 from .base_connector import BaseConnector
-from typing import List, Dict
+from .http_client import (
+    MAX_RETRIES, MAX_RETRY_WAIT_SECONDS, REQUEST_TIMEOUT,
+    get_etag_cache, get_http_session, is_retryable, is_secondary_rate_limit, retry_delay
+)
+from .rate_limiter import configured_api_keys, get_rate_limit_scheduler, request_priority
+from harshith_pr_agent.services.metrics import record_retry, record_throttle
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+DIFF_MEDIA_TYPE = "application/vnd.github.v3.diff"
+
+# Items per page of list endpoints (GitHub's maximum) and pages fetched at once by the async connector.
+PAGE_SIZE = 100
+PAGE_CONCURRENCY = int(os.getenv("GITHUB_PAGE_CONCURRENCY", "4"))
+# GitHub lists at most this many files of a pull request.
+MAX_PR_FILES = 3000
+
+load_dotenv()
 
 class GitHubConnector(BaseConnector):
     def __init__(self):
-        load_dotenv()
-        self.api_key = os.getenv("GITHUB_API_KEY")
-        if not self.api_key:
+        api_keys = configured_api_keys()
+        if not api_keys:
             raise ValueError("GITHUB_API_KEY not found in .env file")
+        self.api_key = api_keys[0]
+        # Shared by every connector in the process; picks the token each request is sent with.
+        self.rate_limiter = get_rate_limit_scheduler()
         
         self.headers = {
             "Authorization": f"token {self.api_key}",
             "Accept": "application/vnd.github.v3+json"
         }
-        self.api_base_url = "https://api.github.com"
+        self.api_base_url = os.getenv("GITHUB_API_BASE_URL", "https://api.github.com").rstrip("/")
+        self.session = get_http_session()
+        self.etag_cache = get_etag_cache()
+        # Conditional-request cache entries are scoped to the credentials that fetched them.
+        self._cache_scope = hashlib.sha256(",".join(api_keys).encode("utf-8")).hexdigest()[:16]
+
+    def _acquire_token(self, priority: int) -> str:
+        api_key, waited = self.rate_limiter.acquire(priority)
+        if waited:
+            record_throttle(waited)
+        return api_key
+
+    def _record_rate_limit(self, api_key: str, response) -> bool:
+        """Feeds a response's rate-limit headers to the scheduler; returns whether it was rate limited."""
+        body = response.text if response.status_code in (403, 429) else ""
+        self.rate_limiter.record_response(api_key, response.status_code, response.headers, body)
+        return is_secondary_rate_limit(response.status_code, response.headers, body)
+
+    def _request(self, method: str, url: str, headers: dict = None, **kwargs) -> requests.Response:
+        """
+        Sends a request over the pooled session once the rate-limit scheduler
+        allows it, retrying 5xx responses with backoff and rate-limited ones
+        on whichever token is ready first.
+        """
+        priority = request_priority(method)
+        for attempt in range(MAX_RETRIES + 1):
+            api_key = self._acquire_token(priority)
+            request_headers = {**self.headers, "Authorization": f"token {api_key}", **(headers or {})}
+            try:
+                response = self.session.request(method, url, headers=request_headers, timeout=REQUEST_TIMEOUT, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # Only idempotent requests are safe to resend after a network failure.
+                if method.upper() != "GET" or attempt == MAX_RETRIES:
+                    raise
+                delay = retry_delay(attempt)
+                print(f"--- GitHub {method} {url} failed ({e}), retrying in {delay:.1f}s ---")
+                record_retry()
+                time.sleep(delay)
+                continue
+
+            rate_limited = self._record_rate_limit(api_key, response)
+            if attempt == MAX_RETRIES or not is_retryable(method, response.status_code, response.headers, response.text):
+                return response
+            if rate_limited:
+                # The scheduler has paused this token for every caller; the next acquire waits as needed.
+                delay = self.rate_limiter.estimated_wait(priority)
+            else:
+                delay = retry_delay(attempt, response.headers)
+            if delay > MAX_RETRY_WAIT_SECONDS:
+                return response
+            print(f"--- GitHub {method} {url} returned {response.status_code}, retrying in {delay:.1f}s ---")
+            record_retry()
+            if not rate_limited:
+                time.sleep(delay)
+        return response
+
+    def _conditional_get(self, url: str, accept: str = None) -> str:
+        """GETs a URL with If-None-Match, serving 304 Not Modified responses from the ETag cache."""
+        headers = {"Accept": accept} if accept else {}
+        cache_key = (self._cache_scope, url, accept or self.headers["Accept"])
+        cached = self.etag_cache.get(cache_key)
+        if cached is not None:
+            headers["If-None-Match"] = cached[0]
+
+        response = self._request("GET", url, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            self.etag_cache.record_hit()
+            return cached[1]
+        response.raise_for_status()
+        etag = response.headers.get("ETag")
+        if etag:
+            self.etag_cache.put(cache_key, etag, response.text)
+        return response.text
+
+    def _get_json(self, url: str):
+        return json.loads(self._conditional_get(url))
+
+    @staticmethod
+    def _page_url(url: str, page: int, params: dict = None) -> str:
+        return f"{url}?{urlencode({**(params or {}), 'per_page': PAGE_SIZE, 'page': page})}"
+
+    def _iter_pages(self, url: str, params: dict = None) -> Iterator[Dict]:
+        """
+        Yields the items of a paginated list endpoint, requesting the next page
+        only once the previous one is consumed; pages go through the ETag cache.
+        """
+        page = 1
+        while True:
+            items = self._get_json(self._page_url(url, page, params))
+            yield from items
+            # A page shorter than PAGE_SIZE is the last one.
+            if len(items) < PAGE_SIZE:
+                return
+            page += 1
 
     def _parse_pr_url(self, pr_url: str) -> dict:
         try:
@@ -25,37 +141,198 @@ class GitHubConnector(BaseConnector):
         except IndexError:
             raise ValueError("Invalid GitHub PR URL format.")
 
-    def get_pr_metadata(self, pr_url: str) -> dict:
+    def _repo_api_url(self, pr_url: str) -> str:
         url_parts = self._parse_pr_url(pr_url)
-        api_url = f"{self.api_base_url}/repos/{url_parts['owner']}/{url_parts['repo']}/pulls/{url_parts['pr_number']}"
-        response = requests.get(api_url, headers=self.headers)
-        response.raise_for_status()
-        data = response.json()
-        return {"title": data.get("title", ""), "description": data.get("body", "")}
+        return f"{self.api_base_url}/repos/{url_parts['owner']}/{url_parts['repo']}"
+
+    def _pull_api_url(self, pr_url: str) -> str:
+        return f"{self._repo_api_url(pr_url)}/pulls/{self._parse_pr_url(pr_url)['pr_number']}"
+
+    def _issue_comments_api_url(self, pr_url: str) -> str:
+        return f"{self._repo_api_url(pr_url)}/issues/{self._parse_pr_url(pr_url)['pr_number']}/comments"
+
+    def _reviews_api_url(self, pr_url: str) -> str:
+        return f"{self._pull_api_url(pr_url)}/reviews"
+
+    @staticmethod
+    def _review_payload(body: str, comments: List[Dict], commit_id: str = None) -> dict:
+        payload = {"body": body, "event": "COMMENT", "comments": comments}
+        if commit_id:
+            payload["commit_id"] = commit_id
+        return payload
+
+    def _compare_api_url(self, pr_url: str, base_sha: str, head_sha: str) -> str:
+        return f"{self._repo_api_url(pr_url)}/compare/{base_sha}...{head_sha}"
+
+    @staticmethod
+    def _metadata_from_pull(data: dict) -> dict:
+        return {
+            "title": data.get("title", ""),
+            "description": data.get("body", ""),
+            "head_sha": data.get("head", {}).get("sha", ""),
+            "changed_files": data.get("changed_files")
+        }
+
+    def _comparison_from_compare(self, data: dict) -> dict:
+        files = data.get("files", [])
+        return {
+            "status": data.get("status", ""),
+            # The compare API lists at most 300 files; beyond that the diff is incomplete.
+            "truncated": len(files) >= 300,
+            "files": [f["filename"] for f in files],
+            "diff": "".join(self._build_file_diff(f) for f in files)
+        }
+
+    def get_pr_metadata(self, pr_url: str) -> dict:
+        return self._metadata_from_pull(self._get_json(self._pull_api_url(pr_url)))
 
     def get_pr_diff(self, pr_url: str) -> str:
-        url_parts = self._parse_pr_url(pr_url)
-        api_url = f"{self.api_base_url}/repos/{url_parts['owner']}/{url_parts['repo']}/pulls/{url_parts['pr_number']}"
-        diff_headers = self.headers.copy()
-        diff_headers["Accept"] = "application/vnd.github.v3.diff"
-        response = requests.get(api_url, headers=diff_headers)
-        response.raise_for_status()
-        return response.text
+        return self._conditional_get(self._pull_api_url(pr_url), accept=DIFF_MEDIA_TYPE)
+
+    def _pull_files_api_url(self, pr_url: str) -> str:
+        return f"{self._pull_api_url(pr_url)}/files"
+
+    def iter_pr_files(self, pr_url: str) -> Iterator[Dict]:
+        """Yields the changed files of a PR (filename, status, patch, ...) from the paginated files endpoint."""
+        return self._iter_pages(self._pull_files_api_url(pr_url))
+
+    def get_pr_files_diff(self, pr_url: str, skip_path: Callable[[str], Optional[str]] = None,
+                          max_chars: int = None) -> dict:
+        """
+        Builds the PR's unified diff file by file from the files endpoint.
+
+        See FilesDiffBuilder for the arguments and the result; pages stop being
+        requested once the size budget is reached.
+        """
+        return build_files_diff(self.iter_pr_files(pr_url), skip_path, max_chars)
+
+    def compare_commits(self, pr_url: str, base_sha: str, head_sha: str) -> dict:
+        """Fetches the changes between two commits of the PR's repository as a unified diff."""
+        return self._comparison_from_compare(self._get_json(self._compare_api_url(pr_url, base_sha, head_sha)))
+
+    @staticmethod
+    def _build_file_diff(file_entry: dict) -> str:
+        """Rebuilds a unified diff section from a file entry of the compare/files API."""
+        new_path = file_entry["filename"]
+        old_path = file_entry.get("previous_filename", new_path)
+        status = file_entry.get("status")
+        section = f"diff --git a/{old_path} b/{new_path}\n"
+        section += "--- /dev/null\n" if status == "added" else f"--- a/{old_path}\n"
+        section += "+++ /dev/null\n" if status == "removed" else f"+++ b/{new_path}\n"
+        patch = file_entry.get("patch")
+        if patch:
+            section += patch if patch.endswith("\n") else patch + "\n"
+        return section
         
     def post_comment(self, pr_url: str, comment: str):
         print("--- Posting comment to GitHub ---")
-        url_parts = self._parse_pr_url(pr_url)
-        api_url = f"{self.api_base_url}/repos/{url_parts['owner']}/{url_parts['repo']}/issues/{url_parts['pr_number']}/comments"
         payload = {"body": comment}
-        response = requests.post(api_url, headers=self.headers, json=payload)
+        response = self._request("POST", self._issue_comments_api_url(pr_url), json=payload)
         response.raise_for_status()
         print("--- Comment posted successfully ---")
 
+    def iter_pr_comments(self, pr_url: str) -> Iterator[Dict]:
+        """Yields the conversation comments of a PR, oldest first, across every page."""
+        return self._iter_pages(self._issue_comments_api_url(pr_url))
+
     def get_pr_comments(self, pr_url: str) -> List[Dict]:
         """Fetches all comments from a given PR URL."""
         print("--- Fetching PR comments from GitHub ---")
-        url_parts = self._parse_pr_url(pr_url)
-        api_url = f"{self.api_base_url}/repos/{url_parts['owner']}/{url_parts['repo']}/issues/{url_parts['pr_number']}/comments"
-        response = requests.get(api_url, headers=self.headers)
+        return list(self.iter_pr_comments(pr_url))
+
+    def create_review(self, pr_url: str, body: str, comments: List[Dict], commit_id: str = None):
+        """
+        Posts a pull request review with all inline comments in a single API call.
+
+        Each comment is a {"path", "line", "side", "body"} dict for a line that is part of the diff.
+        """
+        print(f"--- Posting review with {len(comments)} inline comment(s) to GitHub ---")
+        response = self._request("POST", self._reviews_api_url(pr_url), json=self._review_payload(body, comments, commit_id))
         response.raise_for_status()
-        return response.json()
\ No newline at end of file
+        print("--- Review posted successfully ---")
+
+    def iter_pr_reviews(self, pr_url: str) -> Iterator[Dict]:
+        """Yields the reviews submitted on a PR across every page."""
+        return self._iter_pages(self._reviews_api_url(pr_url))
+
+    def get_pr_reviews(self, pr_url: str) -> List[Dict]:
+        """Fetches the reviews submitted on a PR."""
+        return list(self.iter_pr_reviews(pr_url))
+
+    def iter_open_prs(self, repo: str) -> Iterator[Dict]:
+        """Yields the open pull requests of an "owner/repo" repository, oldest first."""
+        owner, _, name = repo.partition("/")
+        if not owner or not name:
+            raise ValueError("Repository must be given as owner/repo.")
+        url = f"{self.api_base_url}/repos/{owner}/{name}/pulls"
+        for pr in self._iter_pages(url, {"state": "open", "sort": "created", "direction": "asc"}):
+            yield {"number": pr["number"], "pr_url": pr["html_url"], "title": pr.get("title", ""),
+                   "head_sha": pr.get("head", {}).get("sha", "")}
+
+    def list_open_prs(self, repo: str) -> List[Dict]:
+        """Lists the open pull requests of an "owner/repo" repository, oldest first."""
+        return list(self.iter_open_prs(repo))
+
+class FilesDiffBuilder:
+    """
+    Accumulates file entries of the files/compare endpoints into one unified diff.
+
+    `skip_path(path)` returns a reason to leave a file out (e.g. an ignore glob)
+    or None; skipped files never get a diff section. Once the patches reach
+    `max_chars`, add() returns False and the caller stops fetching.
+    """
+
+    def __init__(self, skip_path: Callable[[str], Optional[str]] = None, max_chars: int = None):
+        self.skip_path = skip_path
+        self.max_chars = max_chars
+        self.sections = []
+        self.skipped = []
+        self.chars = 0
+        self.files_seen = 0
+        self.truncated = False
+
+    def add(self, file_entry: dict) -> bool:
+        self.files_seen += 1
+        path = file_entry["filename"]
+        reason = self.skip_path(path) if self.skip_path else None
+        if reason is not None:
+            self.skipped.append({"file_path": path, "reason": reason})
+            return True
+        size = len(file_entry.get("patch") or "")
+        if self.max_chars is not None and self.chars + size > self.max_chars:
+            self.skipped.append({
+                "file_path": path, "reason": "over the diff size budget (later files were not fetched either)"
+            })
+            self.truncated = True
+            return False
+        self.chars += size
+        self.sections.append(GitHubConnector._build_file_diff(file_entry))
+        return True
+
+    def result(self) -> dict:
+        """{"diff", "skipped", "truncated", "files_seen"}."""
+        return {"diff": "".join(self.sections), "skipped": self.skipped, "truncated": self.truncated,
+                "files_seen": self.files_seen}
+
+
+def build_files_diff(file_entries: Iterable[Dict], skip_path: Callable[[str], Optional[str]] = None,
+                     max_chars: int = None) -> dict:
+    """Builds a unified diff from file entries, consuming them only until the size budget is reached."""
+    builder = FilesDiffBuilder(skip_path, max_chars)
+    for file_entry in file_entries:
+        if not builder.add(file_entry):
+            break
+    return builder.result()
+
+
+_shared_connector = None
+_shared_connector_lock = threading.Lock()
+
+
+def get_github_connector() -> GitHubConnector:
+    """Returns the process-wide GitHubConnector."""
+    global _shared_connector
+    with _shared_connector_lock:
+        if _shared_connector is None:
+            _shared_connector = GitHubConnector()
+        return _shared_connector
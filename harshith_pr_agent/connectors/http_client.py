@@ -0,0 +1,105 @@
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT = float(os.getenv("GITHUB_CONNECT_TIMEOUT_SECONDS", "5"))
+READ_TIMEOUT = float(os.getenv("GITHUB_READ_TIMEOUT_SECONDS", "30"))
+MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "4"))
+BACKOFF_SECONDS = float(os.getenv("GITHUB_BACKOFF_SECONDS", "1"))
+MAX_RETRY_WAIT_SECONDS = float(os.getenv("GITHUB_MAX_RETRY_WAIT_SECONDS", "60"))
+POOL_SIZE = int(os.getenv("GITHUB_POOL_SIZE", "16"))
+ETAG_CACHE_MAX_ENTRIES = int(os.getenv("GITHUB_ETAG_CACHE_MAX_ENTRIES", "512"))
+
+REQUEST_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+
+class ETagCache:
+    """Thread-safe LRU of (ETag, body) pairs used to answer 304 Not Modified responses."""
+
+    def __init__(self, max_entries: int = ETAG_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def get(self, key: tuple) -> Optional[Tuple[str, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, etag: str, body: str):
+        with self._lock:
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+
+
+def is_secondary_rate_limit(status_code: int, headers, body: str) -> bool:
+    """Detects GitHub's secondary (abuse) rate limit and exhausted primary limit responses."""
+    if status_code == 429:
+        return True
+    if status_code != 403:
+        return False
+    if "Retry-After" in headers or headers.get("X-RateLimit-Remaining") == "0":
+        return True
+    return "rate limit" in (body or "").lower()
+
+
+def is_retryable(method: str, status_code: int, headers, body: str) -> bool:
+    """Rate-limited requests are always safe to retry; 5xx only for idempotent methods."""
+    if is_secondary_rate_limit(status_code, headers, body):
+        return True
+    return method.upper() in ("GET", "HEAD") and status_code >= 500
+
+
+def retry_delay(attempt: int, headers=None) -> float:
+    """Returns how long to wait before the next attempt, honouring GitHub's rate-limit headers."""
+    headers = headers or {}
+    retry_after = headers.get("Retry-After")
+    if retry_after is not None:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    if headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+        return max(float(headers["X-RateLimit-Reset"]) - time.time(), 0) + 1
+    # Exponential backoff with full jitter.
+    return random.uniform(0, BACKOFF_SECONDS * (2 ** attempt))
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Returns the process-wide pooled HTTP session used for GitHub API calls."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+_etag_cache = ETagCache()
+
+
+def get_etag_cache() -> ETagCache:
+    """Returns the process-wide ETag cache shared by all connectors."""
+    return _etag_cache
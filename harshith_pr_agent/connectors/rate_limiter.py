@@ -0,0 +1,284 @@
+# harshith_pr_agent/connectors/rate_limiter.py
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from .http_client import is_secondary_rate_limit, retry_delay
+
+# Steady request rate and burst allowed per token before GitHub's secondary limits kick in.
+REQUESTS_PER_SECOND = float(os.getenv("GITHUB_MAX_REQUESTS_PER_SECOND", "10"))
+REQUEST_BURST = int(os.getenv("GITHUB_REQUEST_BURST", "20"))
+# GitHub asks for content-creating requests (comments, reviews) to be spaced out.
+WRITES_PER_MINUTE = float(os.getenv("GITHUB_MAX_WRITES_PER_MINUTE", "60"))
+# Part of the primary hourly limit kept back for writes once the rest is used up.
+RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "50"))
+# Below this share of the primary limit, requests are paced to make the rest last until the reset.
+PACING_THRESHOLD = float(os.getenv("GITHUB_PACING_THRESHOLD", "0.25"))
+
+# Lanes: lower values are served first when requests have to wait.
+PRIORITY_WRITE = 0
+PRIORITY_INTERACTIVE = 5
+PRIORITY_BULK = 10
+
+WRITE_METHODS = ("POST", "PATCH", "PUT", "DELETE")
+
+# Upper bound on how long a waiting request sleeps before re-checking the scheduler.
+MAX_POLL_SECONDS = 0.25
+
+_priority_override = contextvars.ContextVar("github_priority", default=None)
+
+
+@contextmanager
+def github_priority(priority: int):
+    """Runs the GitHub requests made inside the block in the given lane, e.g. PRIORITY_INTERACTIVE for chatbot replies."""
+    token = _priority_override.set(priority)
+    try:
+        yield
+    finally:
+        _priority_override.reset(token)
+
+
+def request_priority(method: str) -> int:
+    """Lane of a request: an explicit github_priority() block, else writes ahead of bulk reads."""
+    override = _priority_override.get()
+    if override is not None:
+        return override
+    return PRIORITY_WRITE if method.upper() in WRITE_METHODS else PRIORITY_BULK
+
+
+class _TokenState:
+    """Rate-limit bookkeeping for one API token."""
+
+    def __init__(self, api_key: str, burst: int):
+        self.api_key = api_key
+        self.bucket = float(burst)
+        self.refilled_at = time.monotonic()
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self.blocked_until = 0.0
+        self.next_write_at = 0.0
+
+
+class RateLimitScheduler:
+    """
+    Process-wide scheduler for GitHub API requests.
+
+    Every request first takes a slot from the scheduler. It spaces requests
+    out per token with a token bucket, and slows down as a token's primary
+    limit (X-RateLimit-Remaining/Reset) runs low. The last
+    RATE_LIMIT_RESERVE requests are kept for writes. A token is paused for
+    everyone after a Retry-After or a secondary limit. When several tokens
+    are configured, each request goes to the token that is ready first.
+    Waiting requests are served by lane (writes, then interactive, then
+    bulk fetches) and FIFO within a lane. Both threads and coroutines can
+    wait on it.
+    """
+
+    def __init__(self, api_keys: List[str], requests_per_second: float = REQUESTS_PER_SECOND,
+                 burst: int = REQUEST_BURST, writes_per_minute: float = WRITES_PER_MINUTE,
+                 reserve: int = RATE_LIMIT_RESERVE, pacing_threshold: float = PACING_THRESHOLD):
+        if not api_keys:
+            raise ValueError("RateLimitScheduler needs at least one API key")
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.write_interval = 60.0 / writes_per_minute if writes_per_minute > 0 else 0.0
+        self.reserve = reserve
+        self.pacing_threshold = pacing_threshold
+        self._tokens = [_TokenState(api_key, burst) for api_key in api_keys]
+        self._by_key = {state.api_key: state for state in self._tokens}
+        self._waiters = []
+        self._abandoned = set()
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stats = {"requests": 0, "throttled": 0, "throttled_seconds": 0.0, "rate_limited": 0}
+
+    @property
+    def api_keys(self) -> List[str]:
+        return [state.api_key for state in self._tokens]
+
+    def _refill(self, state: _TokenState, now: float):
+        if state.reset_at is not None and time.time() >= state.reset_at:
+            # The primary window rolled over; the next response reports the new budget.
+            state.remaining = state.reset_at = None
+        rate = self._rate(state)
+        state.bucket = min(float(self.burst), state.bucket + (now - state.refilled_at) * rate)
+        state.refilled_at = now
+
+    def _rate(self, state: _TokenState) -> float:
+        """Requests per second for a token, slowed once its primary budget runs low so the rest lasts until the reset."""
+        rate = self.requests_per_second
+        if state.remaining is None or state.reset_at is None:
+            return rate
+        if state.limit is None or state.remaining < state.limit * self.pacing_threshold:
+            seconds_left = max(state.reset_at - time.time(), 1.0)
+            rate = min(rate, max(state.remaining - self.reserve, 1) / seconds_left)
+        return rate
+
+    def _ready_at(self, state: _TokenState, priority: int, now: float) -> float:
+        """Monotonic time at which this token can take a request of the given lane."""
+        ready = max(now, state.blocked_until)
+        if state.remaining is not None and state.reset_at is not None:
+            budget = state.remaining if priority == PRIORITY_WRITE else state.remaining - self.reserve
+            if budget <= 0:
+                ready = max(ready, now + max(state.reset_at - time.time(), 0) + 1)
+        if state.bucket < 1:
+            ready = max(ready, now + (1 - state.bucket) / self._rate(state))
+        if priority == PRIORITY_WRITE:
+            ready = max(ready, state.next_write_at)
+        return ready
+
+    def _try_acquire(self, waiter: tuple) -> Tuple[Optional[str], float]:
+        """
+        Takes a slot for the waiter if a token is ready for it; otherwise returns how long to wait.
+
+        Requests queued ahead have precedence: a later one only goes first when
+        the token it takes still has a slot left for each of them (e.g. reads
+        while a write waits for write pacing).
+        """
+        while self._waiters and self._waiters[0] in self._abandoned:
+            self._abandoned.discard(heapq.heappop(self._waiters))
+        ahead = 0
+        if self._waiters[0] != waiter:
+            ahead = sum(1 for other in self._waiters if other < waiter and other not in self._abandoned)
+
+        priority = waiter[0]
+        now = time.monotonic()
+        best, best_ready = None, None
+        for state in self._tokens:
+            self._refill(state, now)
+            ready = self._ready_at(state, priority, now)
+            if best is None or ready < best_ready or (
+                ready == best_ready and (state.remaining or 0) > (best.remaining or 0)
+            ):
+                best, best_ready = state, ready
+        if best_ready > now:
+            return None, best_ready - now
+        if ahead and best.bucket < ahead + 1:
+            return None, (ahead + 1 - best.bucket) / self._rate(best)
+
+        if ahead:
+            self._waiters.remove(waiter)
+            heapq.heapify(self._waiters)
+        else:
+            heapq.heappop(self._waiters)
+        best.bucket -= 1
+        if best.remaining is not None:
+            best.remaining -= 1
+        if priority == PRIORITY_WRITE:
+            best.next_write_at = now + self.write_interval
+        self._stats["requests"] += 1
+        self._cond.notify_all()
+        return best.api_key, 0.0
+
+    def _enqueue(self, priority: int) -> tuple:
+        waiter = (priority, next(self._seq))
+        heapq.heappush(self._waiters, waiter)
+        return waiter
+
+    def _record_wait(self, started: float):
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            self._stats["throttled"] += 1
+            self._stats["throttled_seconds"] += waited
+        return waited
+
+    def acquire(self, priority: int = PRIORITY_BULK) -> Tuple[str, float]:
+        """Blocks until a request may be sent; returns the API key to use and the seconds waited."""
+        started = time.monotonic()
+        with self._cond:
+            waiter = self._enqueue(priority)
+            try:
+                while True:
+                    api_key, wait = self._try_acquire(waiter)
+                    if api_key is not None:
+                        return api_key, self._record_wait(started)
+                    self._cond.wait(timeout=min(wait, MAX_POLL_SECONDS))
+            except BaseException:
+                self._abandoned.add(waiter)
+                raise
+
+    async def aacquire(self, priority: int = PRIORITY_BULK) -> Tuple[str, float]:
+        """Coroutine counterpart of acquire that sleeps on the event loop instead of blocking it."""
+        started = time.monotonic()
+        with self._cond:
+            waiter = self._enqueue(priority)
+        try:
+            while True:
+                with self._cond:
+                    api_key, wait = self._try_acquire(waiter)
+                    if api_key is not None:
+                        return api_key, self._record_wait(started)
+                await asyncio.sleep(min(wait, MAX_POLL_SECONDS))
+        except BaseException:
+            with self._cond:
+                self._abandoned.add(waiter)
+            raise
+
+    def record_response(self, api_key: str, status_code: int, headers, body: str = ""):
+        """Updates a token's limits from a response and pauses it after rate limiting."""
+        with self._cond:
+            state = self._by_key.get(api_key)
+            if state is None:
+                return
+            try:
+                if headers.get("X-RateLimit-Remaining") is not None:
+                    state.remaining = int(headers["X-RateLimit-Remaining"])
+                if headers.get("X-RateLimit-Limit") is not None:
+                    state.limit = int(headers["X-RateLimit-Limit"])
+                if headers.get("X-RateLimit-Reset") is not None:
+                    state.reset_at = float(headers["X-RateLimit-Reset"])
+            except ValueError:
+                pass
+            if is_secondary_rate_limit(status_code, headers, body):
+                self._stats["rate_limited"] += 1
+                state.blocked_until = max(state.blocked_until, time.monotonic() + retry_delay(0, headers))
+                state.bucket = min(state.bucket, 0.0)
+            self._cond.notify_all()
+
+    def estimated_wait(self, priority: int = PRIORITY_BULK) -> float:
+        """Seconds until any token could take a request of this lane, ignoring other waiters."""
+        with self._cond:
+            now = time.monotonic()
+            for state in self._tokens:
+                self._refill(state, now)
+            return max(min(self._ready_at(state, priority, now) for state in self._tokens) - now, 0.0)
+
+    def stats(self) -> dict:
+        with self._cond:
+            remaining = [state.remaining for state in self._tokens if state.remaining is not None]
+            return {
+                **self._stats,
+                "tokens": len(self._tokens),
+                "waiting": len(self._waiters) - len(self._abandoned),
+                "rate_limit_remaining": min(remaining) if remaining else None,
+                "rate_limit_remaining_total": sum(remaining) if remaining else None,
+            }
+
+
+def configured_api_keys() -> List[str]:
+    """API tokens from GITHUB_API_KEYS (comma-separated, e.g. several app installation tokens) or GITHUB_API_KEY."""
+    keys = [key.strip() for key in os.getenv("GITHUB_API_KEYS", "").split(",") if key.strip()]
+    if not keys and os.getenv("GITHUB_API_KEY"):
+        keys = [os.getenv("GITHUB_API_KEY")]
+    return keys
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_rate_limit_scheduler() -> RateLimitScheduler:
+    """Returns the process-wide scheduler for the configured GitHub tokens."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RateLimitScheduler(configured_api_keys())
+        return _scheduler
@@ -0,0 +1,140 @@
+# harshith_pr_agent/services/chat_context.py
+
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import List, Optional
+
+from harshith_pr_agent.agents.diff_sharding import (
+    estimate_tokens, parse_file_paths, split_diff_by_file, split_file_into_hunks
+)
+from harshith_pr_agent.agents.retrieval import BM25Index
+
+# Token budget for the diff hunks and findings put in one chatbot prompt.
+CHATBOT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHATBOT_CONTEXT_TOKEN_BUDGET", "6000"))
+# Previous questions and answers on the same PR included in the prompt.
+CHATBOT_HISTORY_TURNS = int(os.getenv("CHATBOT_HISTORY_TURNS", "3"))
+CHAT_CONTEXT_MAX_ENTRIES = int(os.getenv("CHAT_CONTEXT_MAX_ENTRIES", "128"))
+
+# Share of the context budget reserved for the expert findings.
+FINDINGS_BUDGET_SHARE = 0.25
+MAX_ANSWER_CHARS_IN_HISTORY = 1500
+
+
+class ChatContext:
+    """
+    Everything the chatbot needs about one PR at one head SHA: the parsed diff
+    hunks, the stored report and findings, a BM25 index over both, and the
+    questions already answered.
+    """
+
+    def __init__(self, pr_url: str, head_sha: str, diff: str, report: str, reviews: dict,
+                 report_version: float = None, history: deque = None):
+        self.pr_url = pr_url
+        self.head_sha = head_sha
+        self.report = report
+        self.report_version = report_version
+        self.history = history if history is not None else deque(maxlen=CHATBOT_HISTORY_TURNS)
+        self._lock = threading.Lock()
+
+        self.hunks = []
+        for file_diff in split_diff_by_file(diff):
+            header, file_hunks = split_file_into_hunks(file_diff)
+            old_path, new_path = parse_file_paths(header)
+            path = new_path or old_path or ""
+            for hunk in file_hunks:
+                self.hunks.append((path, hunk))
+
+        self.findings = [
+            f"- [{expert}] `{finding['file_path']}` line {finding['line_number']} "
+            f"{finding.get('priority', '')}: {finding['comment']}"
+            for expert, expert_findings in (reviews or {}).items()
+            for finding in expert_findings
+        ]
+        self.hunk_index = BM25Index([f"{path}\n{hunk}" for path, hunk in self.hunks])
+        self.finding_index = BM25Index(self.findings)
+
+    def select(self, question: str, token_budget: int = CHATBOT_CONTEXT_TOKEN_BUDGET) -> dict:
+        """
+        Returns the diff hunks and findings most relevant to a question within
+        the token budget. Small PRs that fit the budget are returned whole.
+        """
+        findings_budget = int(token_budget * FINDINGS_BUDGET_SHARE)
+        findings = _select_within_budget(self.findings, self.finding_index, question, findings_budget)
+        hunk_budget = token_budget - sum(estimate_tokens(self.findings[i]) for i in findings)
+        # Each hunk is costed with its file's ---/+++ lines, so the rendered diff stays within the budget.
+        hunk_texts = [f"--- a/{path}\n+++ b/{path}\n{hunk}" for path, hunk in self.hunks]
+        hunks = _select_within_budget(hunk_texts, self.hunk_index, question, hunk_budget)
+
+        diff_parts = []
+        last_path = None
+        for i in sorted(hunks):
+            path, hunk = self.hunks[i]
+            if path != last_path:
+                diff_parts.append(f"--- a/{path}\n+++ b/{path}\n")
+                last_path = path
+            diff_parts.append(hunk if hunk.endswith("\n") else hunk + "\n")
+        return {
+            "diff": "".join(diff_parts),
+            "findings": "\n".join(self.findings[i] for i in sorted(findings)),
+            "hunks_selected": len(hunks),
+            "hunks_total": len(self.hunks),
+        }
+
+    def history_text(self) -> str:
+        with self._lock:
+            turns = list(self.history)
+        if not turns:
+            return "No previous questions."
+        return "\n\n".join(f"Q: {question}\nA: {answer}" for question, answer in turns)
+
+    def add_exchange(self, question: str, answer: str):
+        with self._lock:
+            self.history.append((question, answer[:MAX_ANSWER_CHARS_IN_HISTORY]))
+
+
+def _select_within_budget(texts: List[str], index: BM25Index, query: str, token_budget: int) -> List[int]:
+    """Picks texts by BM25 rank (document order when nothing matches) until the budget is spent."""
+    if sum(estimate_tokens(text) for text in texts) <= token_budget:
+        return list(range(len(texts)))
+    ranked = [doc_id for doc_id, _ in index.search(query)] or list(range(len(texts)))
+    selected = []
+    used = 0
+    for doc_id in ranked:
+        cost = estimate_tokens(texts[doc_id])
+        if used + cost > token_budget:
+            continue
+        selected.append(doc_id)
+        used += cost
+    return selected
+
+
+class ChatContextCache:
+    """Thread-safe LRU of ChatContext objects keyed by PR URL."""
+
+    def __init__(self, max_entries: int = CHAT_CONTEXT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, pr_url: str) -> Optional[ChatContext]:
+        with self._lock:
+            context = self._entries.get(pr_url)
+            if context is not None:
+                self._entries.move_to_end(pr_url)
+            return context
+
+    def put(self, context: ChatContext):
+        with self._lock:
+            self._entries[context.pr_url] = context
+            self._entries.move_to_end(context.pr_url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_default_cache = ChatContextCache()
+
+
+def get_chat_context_cache() -> ChatContextCache:
+    """Returns the process-wide chatbot context cache."""
+    return _default_cache
@@ -0,0 +1,111 @@
+# harshith_pr_agent/services/concurrency.py
+
+import asyncio
+import contextlib
+import os
+import queue
+import threading
+import weakref
+from typing import Any, AsyncIterator, Coroutine, Iterator
+
+# Upper bounds on in-flight calls per event loop.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+GITHUB_MAX_CONCURRENCY = int(os.getenv("GITHUB_MAX_CONCURRENCY", "8"))
+
+_semaphores = weakref.WeakKeyDictionary()
+_semaphores_lock = threading.Lock()
+
+
+def loop_semaphore(name: str, limit: int) -> asyncio.Semaphore:
+    """
+    Returns the named semaphore for the running event loop.
+
+    asyncio primitives are bound to a single loop, so each loop gets its own
+    set of semaphores; a long-lived loop (such as the async webhook engine)
+    therefore shares one limit across every review it runs.
+    """
+    loop = asyncio.get_running_loop()
+    with _semaphores_lock:
+        per_loop = _semaphores.setdefault(loop, {})
+        if name not in per_loop:
+            per_loop[name] = asyncio.Semaphore(limit)
+        return per_loop[name]
+
+
+def llm_semaphore() -> asyncio.Semaphore:
+    """Limits concurrent LLM calls on the running event loop."""
+    return loop_semaphore("llm", LLM_MAX_CONCURRENCY)
+
+
+def github_semaphore() -> asyncio.Semaphore:
+    """Limits concurrent GitHub API calls on the running event loop."""
+    return loop_semaphore("github", GITHUB_MAX_CONCURRENCY)
+
+
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns the process-wide event loop that runs async reviews for synchronous callers.
+
+    Running every review on one long-lived loop lets the LLM/GitHub semaphores
+    and loop-bound clients be shared by the whole process.
+    """
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="review-event-loop", daemon=True).start()
+            _background_loop = loop
+        return _background_loop
+
+
+def run_coroutine_sync(coro: Coroutine) -> Any:
+    """Runs a coroutine on the background loop and blocks until it finishes."""
+    future = asyncio.run_coroutine_threadsafe(coro, get_background_loop())
+    try:
+        return future.result()
+    except BaseException:
+        future.cancel()
+        raise
+
+
+def iterate_async_sync(async_iterator: AsyncIterator, idle_timeout: float = None, idle_item: Any = None) -> Iterator:
+    """
+    Iterates an async generator on the background loop from synchronous code.
+
+    Items are yielded as soon as they are produced. With an idle_timeout,
+    idle_item is yielded whenever nothing arrived for that long, which lets
+    callers such as Streamlit refresh the page or notice a cancellation.
+    Closing the returned generator cancels the async generator.
+    """
+    items = queue.Queue()
+    finished = object()
+
+    async def pump():
+        try:
+            async with contextlib.aclosing(async_iterator):
+                async for item in async_iterator:
+                    items.put((item, None))
+        except BaseException as e:
+            items.put((finished, e))
+            raise
+        items.put((finished, None))
+
+    future = asyncio.run_coroutine_threadsafe(pump(), get_background_loop())
+    try:
+        while True:
+            try:
+                item, error = items.get(timeout=idle_timeout)
+            except queue.Empty:
+                yield idle_item
+                continue
+            if item is finished:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        future.cancel()
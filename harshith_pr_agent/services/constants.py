@@ -0,0 +1,7 @@
+# harshith_pr_agent/services/constants.py
+# Kept free of heavy imports: the webhook server reads these before the review pipeline is loaded.
+
+# Hidden marker ending every comment and review the bot posts. The webhook ignores comments
+# carrying it, so the bot never answers its own reports, which mention the trigger phrase.
+BOT_SIGNATURE = "<!-- harshith-pr-agent -->"
+REPORT_TITLE = "## Harshith PR Agent Review"
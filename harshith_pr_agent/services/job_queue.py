@@ -0,0 +1,225 @@
+# harshith_pr_agent/services/job_queue.py
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Callable, Hashable
+
+from .concurrency import get_background_loop
+
+WORKER_COUNT = int(os.getenv("WEBHOOK_WORKERS", "4"))
+MAX_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "100"))
+ASYNC_MAX_IN_FLIGHT = int(os.getenv("WEBHOOK_ASYNC_MAX_IN_FLIGHT", "200"))
+
+# Lower values run first.
+PRIORITY_CHATBOT = 0
+PRIORITY_REVIEW = 10
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class Job:
+    """A unit of background work, identified by a coalescing key."""
+
+    def __init__(self, key: Hashable, priority: int, seq: int, func: Callable, args: tuple):
+        self.key = key
+        self.priority = priority
+        self.seq = seq
+        self.func = func
+        self.args = args
+        self.enqueued_at = time.time()
+        self.triggers = 1
+
+
+class ReviewJobQueue:
+    """
+    Bounded priority job queue served by a fixed pool of worker threads.
+
+    Jobs that share a key are coalesced while pending, so a burst of triggers
+    for the same PR collapses into a single run, and two jobs with the same key
+    never run at the same time.
+    """
+
+    def __init__(self, worker_count: int = WORKER_COUNT, max_queue_size: int = MAX_QUEUE_SIZE):
+        self.worker_count = worker_count
+        self.max_queue_size = max_queue_size
+        self._heap = []
+        self._pending = {}
+        self._deferred = {}
+        self._running = set()
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._busy = 0
+        self._counters = {"submitted": 0, "coalesced": 0, "rejected": 0, "completed": 0, "failed": 0}
+        self._workers = []
+        self._stopping = False
+
+    def start(self):
+        """Starts the worker threads if they are not running yet."""
+        with self._cond:
+            if self._workers:
+                return
+            for i in range(self.worker_count):
+                worker = threading.Thread(target=self._worker_loop, name=f"review-worker-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, key: Hashable, func: Callable, *args, priority: int = PRIORITY_REVIEW) -> str:
+        """
+        Enqueues a job and returns "queued" or "coalesced".
+
+        Raises QueueFullError when the queue is at capacity.
+        """
+        self.start()
+        with self._cond:
+            job = self._pending.get(key) or self._deferred.get(key)
+            if job is not None:
+                # The latest trigger wins, but the job keeps the most urgent priority it was given.
+                job.func, job.args = func, args
+                job.triggers += 1
+                self._counters["coalesced"] += 1
+                if priority < job.priority:
+                    job.priority = priority
+                    if key in self._pending:
+                        job.seq = next(self._seq)
+                        heapq.heappush(self._heap, (job.priority, job.seq, key))
+                return "coalesced"
+
+            if len(self._pending) + len(self._deferred) >= self.max_queue_size:
+                self._counters["rejected"] += 1
+                raise QueueFullError(f"Job queue is full ({self.max_queue_size} pending jobs)")
+
+            job = Job(key, priority, next(self._seq), func, args)
+            self._pending[key] = job
+            heapq.heappush(self._heap, (job.priority, job.seq, key))
+            self._counters["submitted"] += 1
+            self._cond.notify()
+            return "queued"
+
+    def stats(self) -> dict:
+        """Returns queue depth, worker utilization and job counters for monitoring."""
+        with self._cond:
+            depth = len(self._pending) + len(self._deferred)
+            return {
+                "queue_depth": depth,
+                "max_queue_size": self.max_queue_size,
+                "workers": self.worker_count,
+                "busy_workers": self._busy,
+                "worker_utilization": self._busy / self.worker_count if self.worker_count else 0.0,
+                **self._counters
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stops the workers once they finish their current job."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _next_job(self) -> Job:
+        with self._cond:
+            while True:
+                while self._heap:
+                    _, seq, key = heapq.heappop(self._heap)
+                    job = self._pending.get(key)
+                    if job is None or job.seq != seq:
+                        continue  # Stale heap entry left behind by a priority bump.
+                    del self._pending[key]
+                    if key in self._running:
+                        # Wait for the in-flight run of this key before starting another one.
+                        self._deferred[key] = job
+                        continue
+                    self._running.add(key)
+                    self._busy += 1
+                    return job
+                if self._stopping:
+                    return None
+                self._cond.wait()
+
+    def _finish_job(self, job: Job, failed: bool):
+        with self._cond:
+            self._running.discard(job.key)
+            self._busy -= 1
+            self._counters["failed" if failed else "completed"] += 1
+            deferred = self._deferred.pop(job.key, None)
+            if deferred is not None:
+                deferred.seq = next(self._seq)
+                self._pending[job.key] = deferred
+                heapq.heappush(self._heap, (deferred.priority, deferred.seq, job.key))
+                self._cond.notify()
+
+    def _worker_loop(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            failed = False
+            try:
+                job.func(*job.args)
+            except Exception as e:
+                failed = True
+                print(f"--- [Worker] Job {job.key} failed: {e} ---")
+            finally:
+                self._finish_job(job, failed)
+
+
+class AsyncReviewJobQueue(ReviewJobQueue):
+    """
+    ReviewJobQueue whose jobs are coroutine functions run on the shared background event loop.
+
+    A dispatcher thread hands jobs to the loop, and worker_count bounds how many
+    jobs are in flight at once, so a single process can keep hundreds of reviews
+    waiting on LLM and GitHub I/O without a thread per review.
+    """
+
+    def __init__(self, worker_count: int = ASYNC_MAX_IN_FLIGHT, max_queue_size: int = MAX_QUEUE_SIZE):
+        super().__init__(worker_count=worker_count, max_queue_size=max_queue_size)
+        self._loop = None
+        self._slots = threading.Semaphore(worker_count)
+
+    def start(self):
+        """Starts the dispatcher thread if it is not running yet."""
+        with self._cond:
+            if self._workers:
+                return
+            self._loop = get_background_loop()
+            dispatcher = threading.Thread(target=self._dispatch_loop, name="review-dispatcher", daemon=True)
+            dispatcher.start()
+            self._workers = [dispatcher]
+
+    def shutdown(self, wait: bool = True):
+        """Stops dispatching and, if wait is set, blocks until in-flight jobs finish."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if wait and self._workers:
+            self._workers[0].join()
+            for _ in range(self.worker_count):
+                self._slots.acquire()
+
+    def _dispatch_loop(self):
+        while True:
+            self._slots.acquire()
+            job = self._next_job()
+            if job is None:
+                self._slots.release()
+                return
+            asyncio.run_coroutine_threadsafe(self._run_job(job), self._loop)
+
+    async def _run_job(self, job: Job):
+        failed = False
+        try:
+            await job.func(*job.args)
+        except Exception as e:
+            failed = True
+            print(f"--- [Worker] Job {job.key} failed: {e} ---")
+        finally:
+            self._finish_job(job, failed)
+            self._slots.release()
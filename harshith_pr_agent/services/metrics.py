@@ -0,0 +1,345 @@
+# harshith_pr_agent/services/metrics.py
+
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+
+# Optional JSONL file receiving one trace record per review/chatbot run.
+TRACE_PATH = os.getenv("REVIEW_TRACE_PATH", "")
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(label_key: tuple, extra: tuple = ()) -> str:
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        f'{k}="' + v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for k, v in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> list:
+        with self._lock:
+            return [f"{self.name}{_format_labels(key)} {_format_value(v)}" for key, v in sorted(self._values.items())]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = DURATION_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self) -> list:
+        lines = []
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, (('le', _format_value(bound)),))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series['sum'])}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the process's metrics and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get(Counter, name, help_text)
+
+    def histogram(self, name: str, help_text: str, buckets: tuple = DURATION_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def render(self, gauges: Optional[dict] = None) -> str:
+        """Returns every metric, plus optional point-in-time gauges ({name: (help, value)})."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for name, (help_text, value) in (gauges or {}).items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Returns the process-wide metrics registry."""
+    return _registry
+
+
+SPAN_SECONDS = _registry.histogram("pr_agent_span_duration_seconds", "Duration of review phases.")
+LLM_TOKENS = _registry.counter("pr_agent_llm_tokens_total", "LLM tokens used, by phase and token type.")
+LLM_CACHE = _registry.counter("pr_agent_llm_cache_lookups_total", "LLM result cache lookups, by phase and result.")
+LLM_CALLS = _registry.counter(
+    "pr_agent_llm_call_outcomes_total",
+    "LLM calls by phase and outcome "
+    "(ok, retry, hedged, hedge_won, timeout, error, fallback, fallback_failed, aborted, degraded)."
+)
+GITHUB_RETRIES = _registry.counter("pr_agent_github_retries_total", "Retried GitHub API requests, by phase.")
+GITHUB_THROTTLE = _registry.counter(
+    "pr_agent_github_throttle_seconds_total", "Seconds GitHub requests waited in the rate-limit scheduler, by phase."
+)
+TRACES = _registry.counter("pr_agent_runs_total", "Review and chatbot runs, by kind and status.")
+TRACE_SECONDS = _registry.histogram("pr_agent_run_duration_seconds", "End-to-end duration of review and chatbot runs.")
+
+
+class Span:
+    """One timed phase of a run; attributes hold counters such as tokens, retries and cache hits."""
+
+    def __init__(self, name: str, labels: dict):
+        self.name = name
+        self.labels = labels
+        self.attributes = {}
+        self.status = "ok"
+        self.started_at = time.time()
+        self.duration = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, key: str, amount: float = 1):
+        with self._lock:
+            self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def set(self, key: str, value):
+        with self._lock:
+            self.attributes[key] = value
+
+    def to_dict(self, trace_started_at: float) -> dict:
+        return {
+            "name": self.name,
+            **self.labels,
+            "offset": round(self.started_at - trace_started_at, 4),
+            "duration": round(self.duration, 4),
+            "status": self.status,
+            **self.attributes,
+        }
+
+
+class Trace:
+    """The spans of one review or chatbot run, written to TRACE_PATH when it finishes."""
+
+    def __init__(self, kind: str, attributes: dict):
+        self.trace_id = uuid.uuid4().hex
+        self.kind = kind
+        self.attributes = attributes
+        self.started_at = time.time()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add_span(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def timings(self) -> dict:
+        """Seconds spent so far in total and per span name (and persona), summed over repeated spans."""
+        timings = {"total": round(time.time() - self.started_at, 4)}
+        with self._lock:
+            for span in self.spans:
+                key = ":".join([span.name, *(str(v) for v in span.labels.values())])
+                timings[key] = round(timings.get(key, 0) + span.duration, 4)
+        return timings
+
+    def to_dict(self, duration: float, status: str) -> dict:
+        with self._lock:
+            spans = [span.to_dict(self.started_at) for span in self.spans]
+        return {
+            "trace_id": self.trace_id,
+            "kind": self.kind,
+            **self.attributes,
+            "started_at": self.started_at,
+            "duration": round(duration, 4),
+            "status": status,
+            "spans": spans,
+        }
+
+
+_current_trace = contextvars.ContextVar("pr_agent_trace", default=None)
+_current_span = contextvars.ContextVar("pr_agent_span", default=None)
+_trace_file_lock = threading.Lock()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def _write_trace(record: dict):
+    if not TRACE_PATH:
+        return
+    line = json.dumps(record, default=str)
+    with _trace_file_lock:
+        with open(TRACE_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+@contextmanager
+def trace(kind: str, **attributes):
+    """
+    Groups the spans of one run (e.g. a PR review) and records its outcome.
+
+    Works in sync and async code: spans opened in tasks started inside the block
+    attach to this trace through context variables.
+    """
+    run = Trace(kind, attributes)
+    token = _current_trace.set(run)
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield run
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        _current_trace.reset(token)
+        TRACES.inc(kind=kind, status=status)
+        TRACE_SECONDS.observe(duration, kind=kind)
+        try:
+            _write_trace(run.to_dict(duration, status))
+        except OSError as e:
+            print(f"--- Could not write trace record: {e} ---")
+
+
+@contextmanager
+def span(name: str, **labels):
+    """Times one phase (GitHub fetch, expert, synthesis, posting) and records it as metrics and in the current trace."""
+    current = Span(name, labels)
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException:
+        current.status = "error"
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        _current_span.reset(token)
+        SPAN_SECONDS.observe(current.duration, span=name, status=current.status, **labels)
+        run = _current_trace.get()
+        if run is not None:
+            run.add_span(current)
+
+
+def record_tokens(prompt_tokens: int, completion_tokens: int):
+    """Adds LLM token usage to the current span."""
+    current = _current_span.get()
+    labels = {"span": current.name, **current.labels} if current else {"span": "none"}
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, type="prompt", **labels)
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, type="completion", **labels)
+    if current is not None:
+        current.add("prompt_tokens", prompt_tokens)
+        current.add("completion_tokens", completion_tokens)
+
+
+def record_cache(hits: int, misses: int):
+    """Adds LLM result cache hits and misses to the current span."""
+    current = _current_span.get()
+    labels = {"span": current.name, **current.labels} if current else {"span": "none"}
+    if hits:
+        LLM_CACHE.inc(hits, result="hit", **labels)
+    if misses:
+        LLM_CACHE.inc(misses, result="miss", **labels)
+    if current is not None:
+        current.add("cache_hits", hits)
+        current.add("cache_misses", misses)
+
+
+def record_llm_outcome(outcome: str):
+    """Counts one LLM call outcome (retry, hedge, timeout, fallback, ...) against the current span."""
+    current = _current_span.get()
+    labels = {"span": current.name, **current.labels} if current else {"span": "none"}
+    LLM_CALLS.inc(outcome=outcome, **labels)
+    if current is not None and outcome != "ok":
+        current.add(f"llm_{outcome}")
+
+
+def record_retry():
+    """Counts one retried GitHub request against the current span."""
+    current = _current_span.get()
+    GITHUB_RETRIES.inc(span=current.name if current else "none")
+    if current is not None:
+        current.add("retries")
+
+
+def record_throttle(seconds: float):
+    """Adds time a GitHub request waited for the rate-limit scheduler to the current span."""
+    current = _current_span.get()
+    GITHUB_THROTTLE.inc(seconds, span=current.name if current else "none")
+    if current is not None:
+        current.add("throttled_seconds", round(seconds, 4))
@@ -0,0 +1,344 @@
+# harshith_pr_agent/services/review_checkpoints.py
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from langgraph.checkpoint.serde.types import TASKS
+
+# SQLite file holding the graph checkpoints of review runs; empty disables checkpointing.
+CHECKPOINT_PATH = os.getenv("REVIEW_CHECKPOINT_PATH", ".review_checkpoints.sqlite3")
+
+# Run statuses; failed and degraded runs can be resumed, running ones only once they are stale.
+RUN_COMPLETE = "complete"
+RUN_RUNNING = "running"
+RUN_FAILED = "failed"
+RUN_DEGRADED = "degraded"
+INCOMPLETE_STATUSES = (RUN_RUNNING, RUN_FAILED, RUN_DEGRADED)
+
+# A running run whose checkpoints have not moved for this long is taken to be dead (e.g. its process
+# was restarted) and may be resumed. Keep it well above REVIEW_SLA_SECONDS.
+RUN_STALE_SECONDS = float(os.getenv("REVIEW_RUN_STALE_SECONDS", "900"))
+
+_RUN_COLUMNS = "thread_id, pr_url, head_sha, kind, post_to_github, status, error, attempts, started_at, updated_at"
+
+
+class RunInProgressError(RuntimeError):
+    """Raised when a run is started for a PR and head SHA that another live run is already reviewing."""
+
+
+def run_thread_id(pr_url: str, head_sha: str) -> str:
+    """The checkpoint thread of the review of a PR at a head SHA."""
+    return f"{pr_url}@{head_sha}"
+
+
+class ReviewCheckpointStore(BaseCheckpointSaver):
+    """
+    SQLite-backed LangGraph checkpointer for review runs, plus a log of the runs.
+
+    The review graph is checkpointed after every step, with the results of
+    nodes that finished in a step whose other nodes failed kept as pending
+    writes, so a run that failed or was interrupted by a restart resumes from
+    the last completed node instead of repeating the LLM calls. The run log
+    records each run's PR, head SHA, status and progress for listing and
+    resuming; every checkpoint doubles as the run's heartbeat, so a run only
+    counts as abandoned once it is RUN_STALE_SECONDS old.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_PATH):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL, parent_id TEXT, "
+            "checkpoint_type TEXT NOT NULL, checkpoint BLOB NOT NULL, metadata_type TEXT NOT NULL, metadata BLOB NOT NULL, "
+            "PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint_writes ("
+            "thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL, task_id TEXT NOT NULL, "
+            "idx INTEGER NOT NULL, channel TEXT NOT NULL, value_type TEXT NOT NULL, value BLOB NOT NULL, "
+            "PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS review_runs ("
+            "thread_id TEXT PRIMARY KEY, pr_url TEXT NOT NULL, head_sha TEXT NOT NULL, kind TEXT NOT NULL, "
+            "post_to_github INTEGER NOT NULL, status TEXT NOT NULL, error TEXT, attempts INTEGER NOT NULL, "
+            "started_at REAL NOT NULL, updated_at REAL NOT NULL, step INTEGER, completed_nodes TEXT)"
+        )
+        self._db.commit()
+
+    # --- LangGraph checkpointer ---
+
+    def _writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str, channel: str = None) -> list:
+        query = (
+            "SELECT task_id, channel, value_type, value FROM checkpoint_writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?"
+        )
+        params = [thread_id, checkpoint_ns, checkpoint_id]
+        if channel is not None:
+            query += " AND channel = ?"
+            params.append(channel)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY task_id, idx", params).fetchall()
+        return [(task_id, channel, self.serde.loads_typed((value_type, value))) for task_id, channel, value_type, value in rows]
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, row) -> CheckpointTuple:
+        checkpoint_id, parent_id, checkpoint_type, checkpoint, metadata_type, metadata = row
+        # Sends made by the parent step are stored as its writes, like MemorySaver does.
+        sends = [value for _, _, value in self._writes(thread_id, checkpoint_ns, parent_id, TASKS)] if parent_id else []
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint={**self.serde.loads_typed((checkpoint_type, checkpoint)), "pending_sends": sends},
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config={
+                "configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}
+            } if parent_id else None,
+            pending_writes=self._writes(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Returns the checkpoint given by the config's checkpoint_id, or the thread's latest one."""
+        return next(self.list(config, limit=1), None)
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        """Yields the matching checkpoints, newest first."""
+        if limit is not None and limit <= 0:
+            return
+        configurable = (config or {}).get("configurable", {})
+        where = " WHERE 1 = 1"
+        params = []
+        if "thread_id" in configurable:
+            where += " AND thread_id = ? AND checkpoint_ns = ?"
+            params += [configurable["thread_id"], configurable.get("checkpoint_ns", "")]
+        if config and get_checkpoint_id(config):
+            where += " AND checkpoint_id = ?"
+            params.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            where += " AND checkpoint_id < ?"
+            params.append(get_checkpoint_id(before))
+        columns = "thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint_type, checkpoint, metadata_type, metadata"
+
+        if filter:
+            # Match on the metadata alone so only the checkpoints that are returned get loaded.
+            with self._lock:
+                candidates = self._db.execute(
+                    f"SELECT thread_id, checkpoint_ns, checkpoint_id, metadata_type, metadata FROM checkpoints{where} "
+                    "ORDER BY checkpoint_id DESC", params
+                ).fetchall()
+            keys = [
+                (thread_id, checkpoint_ns, checkpoint_id)
+                for thread_id, checkpoint_ns, checkpoint_id, metadata_type, metadata in candidates
+                if all(self.serde.loads_typed((metadata_type, metadata)).get(k) == v for k, v in filter.items())
+            ][:limit]
+            for key in keys:
+                with self._lock:
+                    row = self._db.execute(
+                        f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                        key
+                    ).fetchone()
+                if row is not None:
+                    yield self._tuple(row[0], row[1], row[2:])
+            return
+
+        query = f"SELECT {columns} FROM checkpoints{where} ORDER BY checkpoint_id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        for thread_id, checkpoint_ns, *row in rows:
+            yield self._tuple(thread_id, checkpoint_ns, row)
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        """Saves a checkpoint as the child of the config's checkpoint."""
+        checkpoint = checkpoint.copy()
+        checkpoint.pop("pending_sends", None)
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(metadata)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                    checkpoint_type, checkpoint_blob, metadata_type, metadata_blob
+                )
+            )
+            self._record_progress(thread_id, metadata)
+            self._db.commit()
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def _record_progress(self, thread_id: str, metadata: CheckpointMetadata):
+        """Heartbeat of the thread's running run: its latest step and the nodes finished so far."""
+        row = self._db.execute(
+            "SELECT completed_nodes FROM review_runs WHERE thread_id = ? AND status = ?", (thread_id, RUN_RUNNING)
+        ).fetchone()
+        if row is None:
+            return
+        nodes = set(filter(None, (row[0] or "").split(","))) | set(metadata.get("writes") or {})
+        self._db.execute(
+            "UPDATE review_runs SET step = ?, completed_nodes = ?, updated_at = ? WHERE thread_id = ?",
+            (metadata.get("step"), ",".join(sorted(nodes)), time.time(), thread_id)
+        )
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str) -> None:
+        """Saves the writes of one task of the step following the config's checkpoint."""
+        configurable = config["configurable"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, value_blob = self.serde.dumps_typed(value)
+            rows.append((
+                configurable["thread_id"], configurable.get("checkpoint_ns", ""), configurable["checkpoint_id"],
+                task_id, WRITES_IDX_MAP.get(channel, idx), channel, value_type, value_blob
+            ))
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO checkpoint_writes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    # Checkpoints carry the full diff and every persona's shards, so serializing and writing them takes
+    # long enough to stall the shared event loop; the async variants run on a worker thread instead.
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        checkpoint_tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint_tuple in checkpoint_tuples:
+            yield checkpoint_tuple
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id)
+
+    def delete_thread(self, thread_id: str):
+        """Drops every checkpoint of a thread, e.g. once its run finished or to start it over."""
+        with self._lock:
+            self._db.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            self._db.execute("DELETE FROM checkpoint_writes WHERE thread_id = ?", (thread_id,))
+            self._db.execute("UPDATE review_runs SET step = NULL, completed_nodes = NULL WHERE thread_id = ?", (thread_id,))
+            self._db.commit()
+
+    # --- Run log ---
+
+    @staticmethod
+    def _run(row) -> dict:
+        return dict(zip([column.strip() for column in _RUN_COLUMNS.split(",")], row), post_to_github=bool(row[4]))
+
+    def start_run(self, pr_url: str, head_sha: str, kind: str, post_to_github: bool) -> Optional[dict]:
+        """
+        Records that a run of the thread started (or resumed) and returns it, or returns None
+        when another run of the thread is still running and not yet stale.
+        """
+        thread_id = run_thread_id(pr_url, head_sha)
+        now = time.time()
+        with self._lock:
+            # Claim and check in one write transaction, so two processes can't both take over a stale run.
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                live = self._db.execute(
+                    "SELECT 1 FROM review_runs WHERE thread_id = ? AND status = ? AND updated_at > ?",
+                    (thread_id, RUN_RUNNING, now - RUN_STALE_SECONDS)
+                ).fetchone()
+                if live is None:
+                    self._db.execute(
+                        f"INSERT INTO review_runs ({_RUN_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, NULL, 1, ?, ?) "
+                        "ON CONFLICT (thread_id) DO UPDATE SET kind = excluded.kind, status = excluded.status, "
+                        "error = NULL, post_to_github = max(post_to_github, excluded.post_to_github), "
+                        "attempts = attempts + 1, updated_at = excluded.updated_at",
+                        (thread_id, pr_url, head_sha, kind, int(post_to_github), RUN_RUNNING, now, now)
+                    )
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+        return None if live else self.get_run(thread_id)
+
+    def finish_run(self, thread_id: str, status: str, error: str = None):
+        """Records the outcome of a run; the checkpoints of complete and degraded runs are dropped."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE review_runs SET status = ?, error = ?, updated_at = ? WHERE thread_id = ?",
+                (status, error, time.time(), thread_id)
+            )
+            self._db.commit()
+        if status in (RUN_COMPLETE, RUN_DEGRADED):
+            self.delete_thread(thread_id)
+
+    def get_run(self, thread_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(f"SELECT {_RUN_COLUMNS} FROM review_runs WHERE thread_id = ?", (thread_id,)).fetchone()
+        return self._run(row) if row else None
+
+    def list_runs(self, statuses: Sequence[str] = INCOMPLETE_STATUSES, limit: int = 100,
+                  resumable_only: bool = False) -> List[dict]:
+        """
+        Returns the runs with the given statuses, most recently updated first, with their checkpoint
+        progress. Each run says whether it is resumable; with `resumable_only`, live runs are left out.
+        """
+        stale_before = time.time() - RUN_STALE_SECONDS
+        query = (
+            f"SELECT {_RUN_COLUMNS}, step, completed_nodes FROM review_runs "
+            f"WHERE status IN ({', '.join('?' * len(statuses))})"
+        )
+        params = [*statuses]
+        if resumable_only:
+            query += " AND (status != ? OR updated_at <= ?)"
+            params += [RUN_RUNNING, stale_before]
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY updated_at DESC LIMIT ?", (*params, limit)).fetchall()
+            runs = []
+            for *row, step, completed_nodes in rows:
+                run = self._run(row)
+                run["resumable"] = run["status"] != RUN_RUNNING or run["updated_at"] <= stale_before
+                # Progress comes from the run log and the write keys; no checkpoint is loaded.
+                saved_task_results = self._db.execute(
+                    "SELECT COUNT(DISTINCT task_id) FROM checkpoint_writes WHERE thread_id = ? AND checkpoint_ns = '' "
+                    "AND checkpoint_id = (SELECT max(checkpoint_id) FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = '')",
+                    (run["thread_id"], run["thread_id"])
+                ).fetchone()[0]
+                run["checkpoint"] = None if step is None else {
+                    "step": step,
+                    "completed_nodes": [node for node in (completed_nodes or "").split(",") if node],
+                    "saved_task_results": saved_task_results,
+                }
+                runs.append(run)
+        return runs
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> Optional[ReviewCheckpointStore]:
+    """Returns the process-wide review checkpoint store, or None when checkpointing is disabled."""
+    global _default_store
+    if not CHECKPOINT_PATH:
+        return None
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ReviewCheckpointStore()
+        return _default_store
@@ -1,92 +1,576 @@
 
 
+import asyncio
 import os
+from contextlib import asynccontextmanager
+import httpx
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from harshith_pr_agent.connectors.github_connector import GitHubConnector
-from harshith_pr_agent.agents.review_graph import create_review_graph
+from harshith_pr_agent.connectors.async_github_connector import get_async_github_connector
+from harshith_pr_agent.connectors.rate_limiter import PRIORITY_INTERACTIVE, github_priority
+from harshith_pr_agent.agents.review_graph import (
+    EXPERT_FAST_MODEL, EXPERT_MODEL, SYNTHESIS_MODEL, get_review_graph, graph_run_config, merge_reviews
+)
 from harshith_pr_agent.agents.prompts import CHATBOT_PROMPT
+from harshith_pr_agent.agents.registry import get_chain
+from harshith_pr_agent.agents.resilience import review_deadline
+from harshith_pr_agent.agents.diff_sharding import CHARS_PER_TOKEN, parse_file_changes, remap_line
+from harshith_pr_agent.agents.diff_compaction import FETCH_TOKEN_BUDGET, compact_diff, ignore_reason
+from harshith_pr_agent.agents.diff_index import DiffIndex, build_inline_comments
+from harshith_pr_agent.services.review_store import get_review_store
+from harshith_pr_agent.services.review_checkpoints import (
+    RUN_COMPLETE, RUN_DEGRADED, RUN_FAILED, RunInProgressError, get_checkpoint_store, run_thread_id
+)
+from harshith_pr_agent.services.constants import BOT_SIGNATURE, REPORT_TITLE
+from harshith_pr_agent.services.chat_context import ChatContext, get_chat_context_cache
+from harshith_pr_agent.services.concurrency import iterate_async_sync, llm_semaphore, run_coroutine_sync
+from harshith_pr_agent.agents.token_usage import get_token_usage_handler
+from harshith_pr_agent.services.metrics import current_trace, span, trace
 
 load_dotenv()
 
 
-BOT_SIGNATURE = ""
+CHATBOT_MODEL = "gemini-2.0-flash"
+CHATBOT_TEMPERATURE = 0.3
 
-def format_review_as_markdown(review_result: dict) -> str:
-    """Helper function to format the entire review result into a single Markdown string."""
+def format_review_as_markdown(review_result: dict, inline_counts: dict = None) -> str:
+    """
+    Helper function to format the entire review result into a single Markdown string.
+
+    `inline_counts` gives, per expert, how many findings were posted as inline
+    review comments instead of being listed here.
+    """
     summary = review_result.get('synthesis', "No summary generated.")
     reviews = review_result.get('reviews', {})
+    inline_counts = inline_counts or {}
+    routed_personas = (review_result.get('routing') or {}).get('personas', {})
+    degraded = review_result.get('degraded') or {}
 
-    markdown_report = f"## Harshith PR Agent Review\n\n"
+    markdown_report = f"{REPORT_TITLE}\n\n"
     markdown_report += f"### 📜 Final Summary & Code Quality Score\n{summary}\n\n"
     markdown_report += "---\n\n### 🔬 Detailed Feedback from the Expert Panel\n\n"
 
     for expert, findings in reviews.items():
-        markdown_report += f"#### 🕵️‍♂️ {expert} Expert Feedback ({len(findings)} issues found)\n"
+        inline_count = inline_counts.get(expert, 0)
+        markdown_report += f"#### 🕵️‍♂️ {expert} Expert Feedback ({len(findings) + inline_count} issues found)\n"
+        if inline_count:
+            markdown_report += f"_{inline_count} finding(s) posted as inline comments on the diff._\n"
+        if degraded.get(expert):
+            markdown_report += f"_⚠️ Partial review: {degraded[expert]}._\n"
         if findings:
             for finding in findings:
                 markdown_report += f"- **File:** `{finding['file_path']}` (Line: {finding['line_number']})\n"
                 markdown_report += f"  - **Priority:** {finding['priority']}\n"
                 markdown_report += f"  - **Comment:** {finding['comment']}\n"
+                if finding.get('also_flagged_by'):
+                    markdown_report += f"  - **Also flagged by:** {', '.join(finding['also_flagged_by'])}\n"
                 if finding.get('suggestion'):
                     markdown_report += f"  - **Suggestion:**\n    ```suggestion\n    {finding['suggestion']}\n    ```\n"
             markdown_report += "\n"
+        elif inline_count:
+            markdown_report += "\n"
+        elif routed_personas.get(expert, {}).get('files') == 0:
+            markdown_report += "_Not run: no changed files in this expert's scope._\n\n"
         else:
             markdown_report += "_No issues found by this expert._\n\n"
+
+    findings_stats = review_result.get('findings_stats') or {}
+    if findings_stats.get('merged') or findings_stats.get('dropped'):
+        markdown_report += (
+            f"_{findings_stats.get('merged', 0)} duplicate finding(s) merged, "
+            f"{findings_stats.get('dropped', 0)} lower-priority finding(s) left out._\n\n"
+        )
     
+    skipped_files = review_result.get('skipped_files') or []
+    if skipped_files:
+        markdown_report += "<details>\n<summary>🙈 Not reviewed ({} file(s))</summary>\n\n".format(len(skipped_files))
+        for skipped in skipped_files:
+            markdown_report += f"- `{skipped['file_path']}`: {skipped['reason']}\n"
+        markdown_report += "\n</details>\n"
     
     markdown_report += f"\n{BOT_SIGNATURE}"
     return markdown_report
 
-def run_graph_review(pr_url: str, post_to_github: bool = False) -> dict:
+async def apost_review(connector, pr_url: str, review_result: dict, index: DiffIndex, head_sha: str = None):
+    """
+    Posts the review as one pull request review: findings on commentable lines
+    become inline comments, the rest and the summary go in the review body.
+    Falls back to a single issue comment if GitHub rejects the inline comments.
+    """
+    comments, remaining = build_inline_comments(review_result.get("reviews", {}), index)
+    inline_counts = {
+        expert: len(findings) - len(remaining.get(expert, []))
+        for expert, findings in review_result.get("reviews", {}).items()
+    }
+    with span("post_comment") as post_span:
+        post_span.set("inline_comments", len(comments))
+        if not comments:
+            await connector.apost_comment(pr_url, format_review_as_markdown(review_result))
+            return
+        body = format_review_as_markdown({**review_result, "reviews": remaining}, inline_counts)
+        try:
+            await connector.acreate_review(pr_url, body, comments, commit_id=head_sha)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 422:
+                raise
+            # The PR moved on or a line was rejected; don't lose the review.
+            print(f"--- GitHub rejected the inline review ({e.response.text[:200]}), posting a comment instead ---")
+            await connector.apost_comment(pr_url, format_review_as_markdown(review_result))
+
+async def asave_review_artifact(pr_url: str, head_sha: str, final_state: dict):
+    """
+    Stores the structured review with the models used and the phase timings of the current run.
+    Degraded reviews are not stored, so the next run for the head SHA reviews it again.
+    """
+    if final_state.get("degraded"):
+        print(f"--- Review degraded ({', '.join(final_state['degraded'])}), not storing it ---")
+        return
+    run = current_trace()
+    await get_review_store().asave_review(
+        pr_url, head_sha, final_state.get("reviews", {}), final_state.get("synthesis", ""),
+        skipped_files=final_state.get("skipped_files"),
+        models={"expert": EXPERT_MODEL, "expert_fast": EXPERT_FAST_MODEL, "synthesis": SYNTHESIS_MODEL},
+        timings=run.timings() if run is not None else {}
+    )
+
+def stored_review_state(stored: dict, metadata: dict = None) -> dict:
+    """Rebuilds the review result returned by the review functions from a stored artifact."""
+    metadata = metadata or {}
+    return {
+        "pr_url": stored["pr_url"],
+        "title": metadata.get("title"),
+        "description": metadata.get("description"),
+        "head_sha": stored["head_sha"],
+        "reviews": stored["reviews"],
+        "synthesis": stored["synthesis"],
+        "skipped_files": stored["skipped_files"],
+        "stored_at": stored["created_at"],
+    }
+
+def review_run_config(config: dict, pr_url: str, head_sha: str, deadline: float) -> dict:
+    """Graph config of a review run: checkpointed under the PR and head SHA, with the review deadline."""
+    config = dict(config or {})
+    config["configurable"] = {
+        **config.get("configurable", {}), "thread_id": run_thread_id(pr_url, head_sha), "review_deadline": deadline
+    }
+    return graph_run_config(config)
+
+async def aresumable_state(app, run_config: dict, kind: str, previous_run: dict, fresh: bool = False):
+    """
+    Returns the checkpointed state of an unfinished earlier run of the same kind to resume from, or None.
+    Checkpoints that can't be resumed (a finished run, another kind of run, or `fresh`) are dropped.
+    """
+    checkpoints = get_checkpoint_store()
+    if checkpoints is None:
+        return None
+    snapshot = await app.aget_state(run_config)
+    if snapshot.next and not fresh and previous_run is not None and previous_run["kind"] == kind:
+        return snapshot.values
+    if snapshot.values:
+        await asyncio.to_thread(checkpoints.delete_thread, run_config["configurable"]["thread_id"])
+    return None
+
+@asynccontextmanager
+async def areview_run(pr_url: str, head_sha: str, kind: str, post_to_github: bool):
+    """
+    Logs a checkpointed review run, marking it failed (and resumable) when the run raises.
+    Yields the log entry of the previous run of the PR at this head SHA, if any.
+    Raises RunInProgressError when another process is still running the review of
+    this PR at this head SHA. The run log is written on a worker thread, like the checkpoints.
+    """
+    checkpoints = get_checkpoint_store()
+    if checkpoints is None:
+        yield None
+        return
+    thread_id = run_thread_id(pr_url, head_sha)
+    previous_run = await asyncio.to_thread(checkpoints.get_run, thread_id)
+    if await asyncio.to_thread(checkpoints.start_run, pr_url, head_sha, kind, post_to_github) is None:
+        raise RunInProgressError(f"{pr_url} at {head_sha[:7]} is already being reviewed")
+    try:
+        yield previous_run
+    except Exception as e:
+        await asyncio.to_thread(checkpoints.finish_run, thread_id, RUN_FAILED, f"{type(e).__name__}: {e}")
+        raise
+
+async def afinish_review_run(pr_url: str, head_sha: str, final_state: dict):
+    """Marks a review run complete, or degraded so it can be re-run, and drops its checkpoints."""
+    checkpoints = get_checkpoint_store()
+    if checkpoints is None:
+        return
+    degraded = final_state.get("degraded") or {}
+    await asyncio.to_thread(
+        checkpoints.finish_run,
+        run_thread_id(pr_url, head_sha), RUN_DEGRADED if degraded else RUN_COMPLETE,
+        f"Degraded: {', '.join(degraded)}" if degraded else None
+    )
+
+async def afetch_pr_diff(connector, pr_url: str, changed_files: int) -> dict:
+    """
+    Fetches the PR diff file by file, leaving out ignored paths and stopping at
+    REVIEW_FETCH_TOKEN_BUDGET. `changed_files` (from the PR metadata) bounds the
+    pages requested. Returns {"diff", "skipped", "truncated", "files_seen"}.
+    """
+    fetched = await connector.aget_pr_files_diff(
+        pr_url, skip_path=ignore_reason, max_chars=FETCH_TOKEN_BUDGET * CHARS_PER_TOKEN, changed_files=changed_files
+    )
+    if fetched["truncated"]:
+        print(f"--- Diff fetch stopped at the size budget after {fetched['files_seen']} file(s) ---")
+    return fetched
+
+def compact_for_review(diff: str) -> dict:
+    """Compacts a diff for the experts and logs how much was saved."""
+    compaction = compact_diff(diff)
+    print(
+        f"--- Compacted diff from ~{compaction['original_tokens']} to ~{compaction['compacted_tokens']} tokens, "
+        f"{len(compaction['skipped'])} item(s) not reviewed ---"
+    )
+    return compaction
+
+async def arun_graph_review(pr_url: str, post_to_github: bool = False, config: dict = None,
+                            force: bool = False) -> dict:
+    """
+    Runs the full expert panel review of a PR on the running event loop.
+
+    `config` is merged into the graph's run config, e.g. to attach callbacks.
+    A head SHA that was already reviewed is served from the review store
+    unless `force` is set.
+    """
+    with trace("review", pr_url=pr_url):
+        return await _arun_graph_review(pr_url, post_to_github, config, force)
+
+async def _arun_graph_review(pr_url: str, post_to_github: bool, config: dict, force: bool = False) -> dict:
+    final_state = None
+    async for event in _astream_graph_review(pr_url, post_to_github, config, force):
+        if event["event"] == "done":
+            final_state = event["result"]
+    return final_state
+
+async def astream_graph_review(pr_url: str, post_to_github: bool = False, config: dict = None,
+                               force: bool = False):
+    """
+    Runs the full expert panel review of a PR, yielding results as the graph produces them:
+
+    - {"event": "stored", "head_sha": sha, "created_at": ts} first if the head SHA is served from the review store,
+    - {"event": "resumed", "head_sha": sha} first if an interrupted run of the head SHA is resumed from its
+      checkpoint, followed by the expert events of the nodes it had already completed,
+    - {"event": "expert", "expert": name, "findings": [...], "skipped": bool, "degraded": reason} as each
+      expert finishes (skipped experts had no files routed to them and are reported when the findings
+      are merged; degraded is None unless some of the expert's shards were not reviewed in time),
+    - {"event": "merged", "reviews": {...}, "merged": n, "dropped": n} once duplicate findings are merged,
+    - {"event": "synthesis", "synthesis": text} once the synthesizer is done,
+    - {"event": "done", "result": final_state} after the review is saved (and posted); the result's
+      "degraded" maps each expert (or "Synthesizer") that ran out of time to the reason, and
+      degraded reviews are not saved.
+    """
+    with trace("review", pr_url=pr_url):
+        async for event in _astream_graph_review(pr_url, post_to_github, config, force):
+            yield event
+
+async def _astream_graph_review(pr_url: str, post_to_github: bool, config: dict, force: bool = False):
     if not os.getenv("GOOGLE_API_KEY"): raise ValueError("GOOGLE_API_KEY not found.")
     
     print("--- Fetching PR Data from GitHub ---")
-    connector = GitHubConnector()
-    metadata = connector.get_pr_metadata(pr_url)
-    diff = connector.get_pr_diff(pr_url)
+    deadline = review_deadline()
+    connector = get_async_github_connector()
+    # The metadata comes first: its changed_files sizes the diff's page requests, and a head SHA
+    # that was already reviewed needs no diff at all.
+    with span("github_fetch"):
+        metadata = await connector.aget_pr_metadata(pr_url)
+    head_sha = metadata.get("head_sha", "")
+    stored = await get_review_store().aget_review(pr_url, head_sha) if head_sha and not force else None
+    if stored is not None:
+        async for event in _astream_stored_review(connector, pr_url, post_to_github, metadata, stored):
+            yield event
+        return
+    with span("github_fetch"):
+        fetched = await afetch_pr_diff(connector, pr_url, metadata.get("changed_files"))
     print("--- Data Fetched Successfully ---")
 
-    app = create_review_graph()
-    initial_state = {"pr_url": pr_url, "title": metadata.get("title"), "description": metadata.get("description"), "diff": diff}
-    final_state = app.invoke(initial_state)
+    diff = fetched["diff"]
+    # Built once from the full PR diff; used to snap findings onto lines GitHub can comment on.
+    index = DiffIndex.from_diff(diff)
+    app = get_review_graph()
+    run_config = review_run_config(config, pr_url, head_sha, deadline)
+    async with areview_run(pr_url, head_sha, "review", post_to_github) as previous_run:
+        async for event in _astream_review_run(app, run_config, previous_run, connector, pr_url, post_to_github,
+                                               metadata, fetched, index, head_sha, force):
+            yield event
+
+async def _astream_review_run(app, run_config: dict, previous_run: dict, connector, pr_url: str, post_to_github: bool,
+                              metadata: dict, fetched: dict, index: DiffIndex, head_sha: str, force: bool):
+    reported = set()
+    resumed = await aresumable_state(app, run_config, "review", previous_run, fresh=force or not head_sha)
+    if resumed is not None:
+        # Nodes that already finished are not run again; None tells the graph to continue from the checkpoint.
+        print(f"--- Resuming the interrupted review of {pr_url} at {head_sha[:7]} ---")
+        yield {"event": "resumed", "head_sha": head_sha}
+        final_state, graph_input = dict(resumed), None
+        for expert, findings in (resumed.get("reviews") or {}).items():
+            reported.add(expert)
+            yield {"event": "expert", "expert": expert, "findings": findings, "skipped": False,
+                   "degraded": (resumed.get("degraded") or {}).get(expert)}
+    else:
+        compaction = compact_for_review(fetched["diff"])
+        graph_input = {
+            "pr_url": pr_url,
+            "title": metadata.get("title"),
+            "description": metadata.get("description"),
+            "diff": compaction["diff"],
+            "skipped_files": fetched["skipped"] + compaction["skipped"]
+        }
+        final_state = dict(graph_input)
+
+    # Stream node updates instead of waiting for ainvoke so callers can show each expert as it finishes.
+    async for update in app.astream(graph_input, config=run_config, stream_mode="updates"):
+        for node, node_update in update.items():
+            if not node_update:
+                continue
+            for key, value in node_update.items():
+                if key == "reviews":
+                    value = {expert: index.snap_findings(findings) for expert, findings in value.items()}
+                    final_state["reviews"] = merge_reviews(final_state.get("reviews"), value)
+                    for expert, findings in value.items():
+                        # The merger also fills in the experts that routing skipped.
+                        if node != "merger" or expert not in reported:
+                            reported.add(expert)
+                            yield {"event": "expert", "expert": expert, "findings": findings,
+                                   "skipped": node == "merger",
+                                   "degraded": (node_update.get("degraded") or {}).get(expert)}
+                elif key == "degraded":
+                    final_state["degraded"] = merge_reviews(final_state.get("degraded"), value)
+                else:
+                    final_state[key] = value
+            if node == "merger":
+                yield {"event": "merged", "reviews": final_state["reviews"], **node_update.get("findings_stats", {})}
+            if "synthesis" in node_update:
+                yield {"event": "synthesis", "synthesis": node_update["synthesis"]}
+
+    final_state["head_sha"] = head_sha
+    await asave_review_artifact(pr_url, head_sha, final_state)
 
     if post_to_github:
-        full_report = format_review_as_markdown(final_state)
-        connector.post_comment(pr_url, full_report)
+        await apost_review(connector, pr_url, final_state, index, head_sha)
+        await get_review_store().amark_posted(pr_url, head_sha)
+    await afinish_review_run(pr_url, head_sha, final_state)
             
+    yield {"event": "done", "result": final_state}
+
+async def _astream_stored_review(connector, pr_url: str, post_to_github: bool, metadata: dict, stored: dict):
+    """Replays a stored review as stream events, posting it only if it never made it to GitHub."""
+    print(f"--- {pr_url} already reviewed at {stored['head_sha'][:7]}, serving the stored review ---")
+    yield {"event": "stored", "head_sha": stored["head_sha"], "created_at": stored["created_at"]}
+    for expert, findings in stored["reviews"].items():
+        yield {"event": "expert", "expert": expert, "findings": findings}
+    yield {"event": "synthesis", "synthesis": stored["synthesis"]}
+
+    final_state = stored_review_state(stored, metadata)
+    if post_to_github and not stored["posted_at"]:
+        with span("github_fetch"):
+            index = DiffIndex.from_diff((await afetch_pr_diff(connector, pr_url, metadata.get("changed_files")))["diff"])
+        await apost_review(connector, pr_url, final_state, index, stored["head_sha"])
+        await get_review_store().amark_posted(pr_url, stored["head_sha"])
+    # Completes a run that failed after its review was stored, e.g. while posting it.
+    await afinish_review_run(pr_url, stored["head_sha"], final_state)
+    yield {"event": "done", "result": final_state}
+
+def run_graph_review(pr_url: str, post_to_github: bool = False, config: dict = None, force: bool = False) -> dict:
+    return run_coroutine_sync(arun_graph_review(pr_url, post_to_github=post_to_github, config=config, force=force))
+
+def stream_graph_review(pr_url: str, post_to_github: bool = False, config: dict = None,
+                        heartbeat_seconds: float = None, force: bool = False):
+    """
+    Synchronous counterpart of astream_graph_review for callers such as Streamlit.
+
+    With heartbeat_seconds, {"event": "heartbeat"} is yielded while waiting for
+    the next result. Closing the generator cancels the review.
+    """
+    return iterate_async_sync(
+        astream_graph_review(pr_url, post_to_github=post_to_github, config=config, force=force),
+        idle_timeout=heartbeat_seconds, idle_item={"event": "heartbeat"}
+    )
+
+def carry_over_findings(prior_reviews: dict, compare_diff: str) -> dict:
+    """Keeps the prior findings that new commits did not touch, remapped to the new line numbers."""
+    changes = {change["old_path"]: change for change in parse_file_changes(compare_diff) if change["old_path"]}
+
+    carried = {}
+    for expert, findings in prior_reviews.items():
+        kept = []
+        for finding in findings:
+            change = changes.get(finding["file_path"])
+            if change is None:
+                kept.append(finding)
+                continue
+            if change["new_path"] is None:
+                continue
+            line_number = remap_line(finding["line_number"], change)
+            if line_number is not None:
+                kept.append({**finding, "file_path": change["new_path"], "line_number": line_number})
+        carried[expert] = kept
+    return carried
+
+async def arun_incremental_review(pr_url: str, post_to_github: bool = False) -> dict:
+    """
+    Re-reviews a PR after new commits by only sending the changes since the
+    last reviewed head SHA to the experts, falling back to a full review when
+    there is no usable previous review.
+    """
+    with trace("incremental_review", pr_url=pr_url):
+        return await _arun_incremental_review(pr_url, post_to_github)
+
+async def _arun_incremental_review(pr_url: str, post_to_github: bool) -> dict:
+    if not os.getenv("GOOGLE_API_KEY"): raise ValueError("GOOGLE_API_KEY not found.")
+
+    deadline = review_deadline()
+    connector = get_async_github_connector()
+    with span("github_fetch"):
+        metadata = await connector.aget_pr_metadata(pr_url)
+    head_sha = metadata.get("head_sha", "")
+    previous = await get_review_store().aget_last_review(pr_url)
+
+    if previous is None or not previous["head_sha"] or not head_sha:
+        print(f"--- No previous review for {pr_url}, running full review ---")
+        return await _arun_graph_review(pr_url, post_to_github, None)
+    if previous["head_sha"] == head_sha:
+        final_state = stored_review_state(previous, metadata)
+        if post_to_github and not previous["posted_at"]:
+            # An earlier run stored this review but failed to post it.
+            print(f"--- {pr_url} already reviewed at {head_sha[:7]}, posting the stored review ---")
+            async with areview_run(pr_url, head_sha, "incremental", post_to_github):
+                await _apost_incremental_review(connector, pr_url, final_state, metadata)
+                await afinish_review_run(pr_url, head_sha, final_state)
+        else:
+            print(f"--- {pr_url} already reviewed at {head_sha}, nothing to do ---")
+        return final_state
+
+    print(f"--- Fetching changes {previous['head_sha'][:7]}...{head_sha[:7]} from GitHub ---")
+    with span("github_compare"):
+        comparison = await connector.acompare_commits(pr_url, previous["head_sha"], head_sha)
+    if comparison["status"] not in ("ahead", "identical") or comparison["truncated"]:
+        # Force-pushes and very large pushes can't be mapped onto the previous findings.
+        print(f"--- Compare status '{comparison['status']}' is not incremental, running full review ---")
+        return await _arun_graph_review(pr_url, post_to_github, None)
+
+    prior_reviews = carry_over_findings(previous["reviews"], comparison["diff"])
+    async with areview_run(pr_url, head_sha, "incremental", post_to_github) as previous_run:
+        if not comparison["diff"].strip():
+            final_state = {"pr_url": pr_url, "reviews": prior_reviews, "synthesis": previous["synthesis"]}
+        else:
+            app = get_review_graph()
+            run_config = review_run_config(None, pr_url, head_sha, deadline)
+            resumed = await aresumable_state(app, run_config, "incremental", previous_run)
+            if resumed is not None:
+                print(f"--- Resuming the interrupted incremental review of {pr_url} at {head_sha[:7]} ---")
+                final_state = await app.ainvoke(None, config=run_config)
+            else:
+                print(f"--- Re-reviewing {len(comparison['files'])} changed file(s) ---")
+                compaction = compact_for_review(comparison["diff"])
+                initial_state = {
+                    "pr_url": pr_url,
+                    "title": metadata.get("title"),
+                    "description": metadata.get("description"),
+                    "diff": compaction["diff"],
+                    "skipped_files": compaction["skipped"],
+                    "prior_reviews": prior_reviews
+                }
+                final_state = await app.ainvoke(initial_state, config=run_config)
+        final_state["head_sha"] = head_sha
+        await asave_review_artifact(pr_url, head_sha, final_state)
+
+        if post_to_github:
+            await _apost_incremental_review(connector, pr_url, final_state, metadata)
+        await afinish_review_run(pr_url, head_sha, final_state)
+
     return final_state
 
-def run_chatbot_response(pr_url: str, question: str):
+async def _apost_incremental_review(connector, pr_url: str, final_state: dict, metadata: dict):
+    # Carried-over findings can sit anywhere in the PR, so place them against the full PR diff.
+    head_sha = metadata.get("head_sha", "")
+    with span("github_fetch"):
+        index = DiffIndex.from_diff((await afetch_pr_diff(connector, pr_url, metadata.get("changed_files")))["diff"])
+    await apost_review(connector, pr_url, final_state, index, head_sha)
+    await get_review_store().amark_posted(pr_url, head_sha)
+
+def run_incremental_review(pr_url: str, post_to_github: bool = False) -> dict:
+    return run_coroutine_sync(arun_incremental_review(pr_url, post_to_github=post_to_github))
+
+async def arun_chatbot_response(pr_url: str, question: str):
+    """Answers a follow-up question on a PR and posts the answer as a comment."""
+    # Someone is waiting for the answer, so its GitHub calls go ahead of bulk review fetches.
+    with trace("chatbot", pr_url=pr_url), github_priority(PRIORITY_INTERACTIVE):
+        await _arun_chatbot_response(pr_url, question)
+
+async def _afind_posted_report(connector, pr_url: str) -> str:
+    """Finds the latest bot report among the PR's issue comments and review bodies."""
+    comments, reviews = await asyncio.gather(connector.aget_pr_comments(pr_url), connector.aget_pr_reviews(pr_url))
+    posts = [(c.get('created_at') or '', c.get('body') or '') for c in comments]
+    posts += [(r.get('submitted_at') or '', r.get('body') or '') for r in reviews]
+    for _, body in reversed(sorted(posts, key=lambda post: post[0])):
+        # Chatbot answers carry the signature too; only reports start with the title.
+        if BOT_SIGNATURE in body and body.startswith(REPORT_TITLE):
+            return body
+    return ""
+
+async def _aget_chat_context(connector, pr_url: str) -> ChatContext:
+    """
+    Returns the cached chatbot context of a PR, rebuilding it only when the PR
+    has new commits or a newer stored review. Earlier Q&A carries over.
+    """
+    with span("github_fetch"):
+        metadata = await connector.aget_pr_metadata(pr_url)
+    head_sha = metadata.get("head_sha", "")
+    stored = await get_review_store().aget_last_review(pr_url)
+    report_version = stored["created_at"] if stored else None
+
+    cache = get_chat_context_cache()
+    context = cache.get(pr_url)
+    if context is not None and context.head_sha == head_sha and context.report_version == report_version:
+        return context
+
+    print(f"--- Building chatbot context for {pr_url} ---")
+    with span("github_fetch"):
+        diff = (await afetch_pr_diff(connector, pr_url, metadata.get("changed_files")))["diff"]
+        if stored:
+            report, reviews = stored["synthesis"], stored["reviews"]
+        else:
+            report, reviews = await _afind_posted_report(connector, pr_url), {}
+    context = ChatContext(
+        pr_url, head_sha, compact_diff(diff)["diff"],
+        report or "Could not find the initial report. Please answer based on the code changes alone.",
+        reviews, report_version=report_version, history=context.history if context is not None else None
+    )
+    cache.put(context)
+    return context
+
+async def _arun_chatbot_response(pr_url: str, question: str):
     if not os.getenv("GOOGLE_API_KEY"): raise ValueError("GOOGLE_API_KEY not found.")
     
     print(f"--- Running chatbot for question: '{question}' ---")
-    connector = GitHubConnector()
-    
-    diff = connector.get_pr_diff(pr_url)
-    comments = connector.get_pr_comments(pr_url)
-    
-    initial_report = ""
-    for comment in reversed(comments):
-        if BOT_SIGNATURE in comment.get('body', ''):
-            initial_report = comment['body']
-            break
-            
-    if not initial_report:
-        initial_report = "Could not find the initial report. Please answer based on the code changes alone."
+    connector = get_async_github_connector()
+    context = await _aget_chat_context(connector, pr_url)
+    # Only the hunks and findings relevant to the question go into the prompt.
+    selection = context.select(question)
+    print(f"--- Selected {selection['hunks_selected']} of {selection['hunks_total']} hunk(s) for the question ---")
 
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.3)
-    prompt_template = ChatPromptTemplate.from_template(CHATBOT_PROMPT)
-    chain = prompt_template | llm
+    chain = get_chain(CHATBOT_PROMPT, CHATBOT_MODEL, CHATBOT_TEMPERATURE)
     
-    answer = chain.invoke({
-        "diff": diff,
-        "initial_report": initial_report,
-        "question": question
-    }).content
+    with span("chatbot_answer") as answer_span:
+        answer_span.set("hunks_selected", selection["hunks_selected"])
+        answer_span.set("hunks_total", selection["hunks_total"])
+        async with llm_semaphore():
+            answer = (await chain.ainvoke({
+                "diff": selection["diff"],
+                "initial_report": context.report,
+                "findings": selection["findings"] or "No findings on these changes.",
+                "history": context.history_text(),
+                "question": question
+            }, config={"callbacks": [get_token_usage_handler()]})).content
+    context.add_exchange(question, answer)
     
     
     final_answer = f"{answer}\n\n{BOT_SIGNATURE}"
-    connector.post_comment(pr_url, final_answer)
-    print("--- Chatbot response posted successfully ---")
\ No newline at end of file
+    with span("post_comment"):
+        await connector.apost_comment(pr_url, final_answer)
+    print("--- Chatbot response posted successfully ---")
+
+def run_chatbot_response(pr_url: str, question: str):
+    return run_coroutine_sync(arun_chatbot_response(pr_url, question))
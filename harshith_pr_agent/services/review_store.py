@@ -0,0 +1,151 @@
+# harshith_pr_agent/services/review_store.py
+
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+STORE_PATH = os.getenv("REVIEW_STORE_PATH", ".review_store.sqlite3")
+
+PR_URL_RE = re.compile(r"github\.com/([^/]+)/([^/]+)/pull/(\d+)")
+
+_COLUMNS = (
+    "repo, pr_number, head_sha, pr_url, reviews, synthesis, skipped_files, models, timings, created_at, posted_at"
+)
+
+
+def parse_pr_key(pr_url: str) -> Tuple[str, int]:
+    """Returns ("owner/repo", PR number) for a GitHub PR URL."""
+    match = PR_URL_RE.search(pr_url or "")
+    if not match:
+        raise ValueError("Invalid GitHub PR URL format.")
+    return f"{match.group(1)}/{match.group(2)}", int(match.group(3))
+
+
+class ReviewStore:
+    """
+    SQLite-backed store of review artifacts keyed by repo, PR number and head SHA.
+
+    Each artifact holds the structured findings, synthesis, skipped files,
+    the models used and per-phase timings, so a reviewed commit can be served
+    again without calling the LLMs or parsing Markdown back out of GitHub.
+    """
+
+    def __init__(self, path: str = STORE_PATH):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS review_artifacts ("
+            "repo TEXT NOT NULL, pr_number INTEGER NOT NULL, head_sha TEXT NOT NULL, pr_url TEXT NOT NULL, "
+            "reviews TEXT NOT NULL, synthesis TEXT NOT NULL, skipped_files TEXT NOT NULL, "
+            "models TEXT NOT NULL, timings TEXT NOT NULL, created_at REAL NOT NULL, posted_at REAL, "
+            "PRIMARY KEY (repo, pr_number, head_sha))"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS review_artifacts_latest ON review_artifacts (repo, pr_number, created_at)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def _artifact(row) -> dict:
+        repo, pr_number, head_sha, pr_url, reviews, synthesis, skipped_files, models, timings, created_at, posted_at = row
+        return {
+            "repo": repo,
+            "pr_number": pr_number,
+            "head_sha": head_sha,
+            "pr_url": pr_url,
+            "reviews": json.loads(reviews),
+            "synthesis": synthesis,
+            "skipped_files": json.loads(skipped_files),
+            "models": json.loads(models),
+            "timings": json.loads(timings),
+            "created_at": created_at,
+            "posted_at": posted_at,
+        }
+
+    def get_review(self, pr_url: str, head_sha: str) -> Optional[dict]:
+        """Returns the review artifact of a PR at a given head SHA, or None."""
+        repo, pr_number = parse_pr_key(pr_url)
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {_COLUMNS} FROM review_artifacts WHERE repo = ? AND pr_number = ? AND head_sha = ?",
+                (repo, pr_number, head_sha)
+            ).fetchone()
+        return self._artifact(row) if row else None
+
+    def get_last_review(self, pr_url: str) -> Optional[dict]:
+        """Returns the most recent review artifact of a PR, or None if it was never reviewed."""
+        repo, pr_number = parse_pr_key(pr_url)
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {_COLUMNS} FROM review_artifacts WHERE repo = ? AND pr_number = ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (repo, pr_number)
+            ).fetchone()
+        return self._artifact(row) if row else None
+
+    def list_reviews(self, pr_url: str) -> List[dict]:
+        """Returns every stored review artifact of a PR, newest first."""
+        repo, pr_number = parse_pr_key(pr_url)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {_COLUMNS} FROM review_artifacts WHERE repo = ? AND pr_number = ? ORDER BY created_at DESC",
+                (repo, pr_number)
+            ).fetchall()
+        return [self._artifact(row) for row in rows]
+
+    def save_review(self, pr_url: str, head_sha: str, reviews: dict, synthesis: str,
+                    skipped_files: list = None, models: dict = None, timings: dict = None):
+        """Records the review of a PR at the given head SHA."""
+        repo, pr_number = parse_pr_key(pr_url)
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO review_artifacts ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)",
+                (
+                    repo, pr_number, head_sha, pr_url, json.dumps(reviews), synthesis or "",
+                    json.dumps(skipped_files or []), json.dumps(models or {}), json.dumps(timings or {}), time.time()
+                )
+            )
+            self._db.commit()
+
+    def mark_posted(self, pr_url: str, head_sha: str):
+        """Records that the review at this head SHA was posted to GitHub."""
+        repo, pr_number = parse_pr_key(pr_url)
+        with self._lock:
+            self._db.execute(
+                "UPDATE review_artifacts SET posted_at = ? WHERE repo = ? AND pr_number = ? AND head_sha = ?",
+                (time.time(), repo, pr_number, head_sha)
+            )
+            self._db.commit()
+
+    # Async counterparts for the review coroutines: the SQLite calls run on a worker thread,
+    # so they never stall the other reviews sharing the event loop.
+    async def aget_review(self, pr_url: str, head_sha: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.get_review, pr_url, head_sha)
+
+    async def aget_last_review(self, pr_url: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.get_last_review, pr_url)
+
+    async def asave_review(self, pr_url: str, head_sha: str, reviews: dict, synthesis: str,
+                           skipped_files: list = None, models: dict = None, timings: dict = None):
+        await asyncio.to_thread(self.save_review, pr_url, head_sha, reviews, synthesis, skipped_files, models, timings)
+
+    async def amark_posted(self, pr_url: str, head_sha: str):
+        await asyncio.to_thread(self.mark_posted, pr_url, head_sha)
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_review_store() -> ReviewStore:
+    """Returns the process-wide review store."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ReviewStore()
+        return _default_store
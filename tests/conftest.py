@@ -0,0 +1,8 @@
+# tests/conftest.py
+
+import os
+
+# Read at import time by the modules under test: no background pipeline load, no SQLite files in the repo.
+os.environ["WEBHOOK_WARMUP"] = "0"
+os.environ["REVIEW_CACHE_PATH"] = ""
+os.environ["REVIEW_CHECKPOINT_PATH"] = ""
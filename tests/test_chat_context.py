@@ -0,0 +1,92 @@
+from harshith_pr_agent.agents.diff_sharding import estimate_tokens
+from harshith_pr_agent.agents.retrieval import BM25Index, tokenize
+from harshith_pr_agent.services.chat_context import ChatContext, ChatContextCache
+
+PR_URL = "https://github.com/owner/repo/pull/7"
+
+
+def module_diff(name, body_lines=8):
+    body = "".join(f"+    {name}_step_{i} = compute_{name}({i})\n" for i in range(body_lines))
+    return (
+        f"diff --git a/{name}.py b/{name}.py\n--- a/{name}.py\n+++ b/{name}.py\n"
+        f"@@ -1,1 +1,{body_lines + 1} @@\n def {name}():\n{body}"
+    )
+
+
+def test_tokenize_splits_identifiers_and_drops_stop_words():
+    terms = tokenize("Why does parseHTTPResponse call retry_count in the loop?")
+
+    assert {"parsehttpresponse", "parse", "http", "response", "retry_count", "retry", "count", "loop"} <= set(terms)
+    assert not {"why", "does", "the", "in"} & set(terms)
+
+
+def test_bm25_ranks_the_matching_documents_first():
+    index = BM25Index(["def charge_card(amount): pass", "def send_email(to): pass", "charge fee on card refund"])
+
+    ranked = [doc_id for doc_id, _ in index.search("card charge")]
+
+    assert ranked[:2] == [0, 2] or ranked[:2] == [2, 0]
+    assert 1 not in ranked
+    assert index.search("unrelated words") == []
+
+
+def test_small_pr_is_returned_whole():
+    diff = module_diff("billing") + module_diff("mailer")
+    context = ChatContext(PR_URL, "abc", diff, "report", {})
+
+    selected = context.select("anything")
+
+    assert (selected["hunks_selected"], selected["hunks_total"]) == (2, 2)
+
+
+def test_relevant_hunks_are_picked_within_the_budget():
+    names = ["billing", "mailer", "search", "uploads", "sessions", "reports", "exports", "webhooks"]
+    reviews = {
+        "Security": [
+            {"file_path": f"{name}.py", "line_number": 2, "priority": "[SUGGESTION]",
+             "comment": f"Validate the input of compute_{name} before using it."}
+            for name in names
+        ],
+    }
+    context = ChatContext(PR_URL, "abc", "".join(module_diff(name) for name in names), "report", reviews)
+    budget = 300
+
+    selected = context.select("Why is compute_billing called in a loop in billing.py?", token_budget=budget)
+
+    assert 0 < selected["hunks_selected"] < selected["hunks_total"]
+    assert "+++ b/billing.py\n" in selected["diff"]
+    assert "compute_billing" in selected["findings"]
+    assert estimate_tokens(selected["diff"] + selected["findings"]) <= budget
+
+
+def test_file_headers_count_against_the_budget():
+    names = ["billing", "mailer", "search", "uploads", "sessions", "reports", "exports", "webhooks"]
+    context = ChatContext(PR_URL, "abc", "".join(module_diff(name, 1) for name in names), "report", {})
+
+    for budget in range(20, 200, 7):
+        selected = context.select("compute step", token_budget=budget)
+        assert estimate_tokens(selected["diff"] + selected["findings"]) <= budget
+
+
+def test_history_keeps_the_last_turns_and_truncates_answers():
+    context = ChatContext(PR_URL, "abc", "", "report", {})
+    assert context.history_text() == "No previous questions."
+    for i in range(5):
+        context.add_exchange(f"question {i}", "x" * 5000)
+
+    history = context.history_text()
+
+    assert "question 0" not in history and "question 4" in history
+    assert len(history) < 3 * 1600
+
+
+def test_context_cache_evicts_the_least_recently_used_pr():
+    cache = ChatContextCache(max_entries=2)
+    contexts = [ChatContext(f"{PR_URL}{i}", "abc", "", "", {}) for i in range(3)]
+    cache.put(contexts[0])
+    cache.put(contexts[1])
+    cache.get(contexts[0].pr_url)
+    cache.put(contexts[2])
+
+    assert cache.get(contexts[1].pr_url) is None
+    assert cache.get(contexts[0].pr_url) is contexts[0]
@@ -0,0 +1,144 @@
+from harshith_pr_agent.agents.diff_compaction import compact_diff, fit_to_budget, trim_hunk_context
+from harshith_pr_agent.agents.diff_sharding import estimate_tokens, parse_file_changes, split_file_into_hunks
+
+
+def file_diff(path, *hunks):
+    return f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n" + "".join(hunks)
+
+
+def kept_paths(result):
+    return [change["new_path"] for change in parse_file_changes(result["diff"])]
+
+
+def test_dedent_is_not_whitespace_only():
+    diff = file_diff("app.py", "@@ -1,3 +1,3 @@\n if ready:\n     run()\n-        return x\n+    return x\n")
+
+    result = compact_diff(diff, ignore_globs=[])
+
+    assert kept_paths(result) == ["app.py"]
+    assert result["skipped"] == []
+
+
+def test_whitespace_inside_a_string_is_not_whitespace_only():
+    diff = file_diff("app.py", '@@ -1 +1 @@\n-SEP = ", "\n+SEP = ","\n')
+
+    assert kept_paths(compact_diff(diff, ignore_globs=[])) == ["app.py"]
+
+
+def test_trailing_whitespace_and_blank_lines_are_collapsed():
+    trailing = "@@ -1,2 +1,2 @@\n-x = 1   \n+x = 1\n y = 2\n"
+    blank = "@@ -10,2 +10,3 @@\n a = 1\n+\n b = 2\n"
+    real = "@@ -20 +21 @@\n-z = 1\n+z = 2\n"
+    diff = file_diff("app.py", trailing, blank, real) + file_diff("style.py", trailing)
+
+    result = compact_diff(diff, ignore_globs=[])
+
+    assert kept_paths(result) == ["app.py"]
+    assert split_file_into_hunks(result["diff"])[1] == [real]
+    assert result["skipped"] == [
+        {"file_path": "app.py", "reason": "2 whitespace-only hunk(s)"},
+        {"file_path": "style.py", "reason": "whitespace-only changes"},
+    ]
+
+
+def test_ignored_binary_and_renamed_files_are_skipped():
+    change = "@@ -1 +1 @@\n-a\n+b\n"
+    diff = (
+        file_diff("package-lock.json", change)
+        + file_diff("docs/api.snap", change)
+        + "diff --git a/logo.bin b/logo.bin\nindex 1..2 100644\nBinary files a/logo.bin and b/logo.bin differ\n"
+        + "diff --git a/old.py b/new.py\nsimilarity index 100%\nrename from old.py\nrename to new.py\n"
+        + file_diff("app.py", change)
+    )
+
+    result = compact_diff(diff, ignore_globs=["package-lock.json", "*.snap"])
+
+    assert kept_paths(result) == ["app.py"]
+    assert result["skipped"] == [
+        {"file_path": "package-lock.json", "reason": "matches ignore pattern `package-lock.json`"},
+        {"file_path": "docs/api.snap", "reason": "matches ignore pattern `*.snap`"},
+        {"file_path": "logo.bin", "reason": "binary file"},
+        {"file_path": "new.py", "reason": "pure rename"},
+    ]
+    assert result["compacted_tokens"] < result["original_tokens"]
+    assert set(result["file_tokens"]) == {"app.py"}
+
+
+def test_generated_and_minified_files_are_skipped():
+    diff = (
+        file_diff("gen.py", "@@ -0,0 +1,2 @@\n+# Code generated by protoc. DO NOT EDIT.\n+x = 1\n")
+        + file_diff("bundle.js", "@@ -0,0 +1 @@\n+" + "a" * 1200 + "\n")
+    )
+
+    result = compact_diff(diff, ignore_globs=[])
+
+    assert result["diff"] == ""
+    assert [entry["reason"] for entry in result["skipped"]] == ["generated file", "minified content"]
+
+
+def test_trim_hunk_context_splits_long_context_runs():
+    context = "".join(f" line {i}\n" for i in range(2, 12))
+    hunk = "@@ -1,12 +1,12 @@ def main():\n-old 1\n+new 1\n" + context + "-old 12\n+new 12\n"
+
+    trimmed = trim_hunk_context(hunk, 1)
+
+    assert trimmed == (
+        "@@ -1,2 +1,2 @@ def main():\n-old 1\n+new 1\n line 2\n"
+        "@@ -11,2 +11,2 @@ def main():\n line 11\n-old 12\n+new 12\n"
+    )
+    assert trim_hunk_context(" line\n", 1) == " line\n"
+    assert trim_hunk_context("@@ -1,2 +1,2 @@\n a\n b\n", 3) == ""
+
+
+def test_trim_hunk_context_keeps_no_newline_markers():
+    hunk = "@@ -1,3 +1,3 @@\n a\n b\n-c\n\\ No newline at end of file\n+d\n\\ No newline at end of file\n"
+
+    assert trim_hunk_context(hunk, 0) == (
+        "@@ -3,1 +3,1 @@\n-c\n\\ No newline at end of file\n+d\n\\ No newline at end of file\n"
+    )
+
+
+def test_fit_to_budget_leaves_a_diff_that_fits_untouched():
+    diff = file_diff("app.py", "@@ -1,3 +1,3 @@\n a\n-b\n+c\n d\n")
+
+    assert fit_to_budget(diff, token_budget=1000) == {"diff": diff, "skipped": []}
+
+
+def test_fit_to_budget_trims_context_before_dropping_hunks():
+    context = "".join(f" context line {i}\n" for i in range(40))
+    diff = file_diff("app.py", f"@@ -1,81 +1,81 @@\n{context}-old\n+new\n{context}")
+    budget = estimate_tokens(diff) // 2
+
+    result = fit_to_budget(diff, token_budget=budget)
+
+    assert result["skipped"] == []
+    assert estimate_tokens(result["diff"]) <= budget
+    # Three context lines are left on either side of the change.
+    assert "@@ -38,7 +38,7 @@\n context line 37\n" in result["diff"]
+    assert result["diff"].count(" context line ") == 6
+
+
+def test_fit_to_budget_drops_last_hunks_of_large_files_first():
+    big = file_diff("big.py", *(f"@@ -{i * 10 + 1} +{i * 10 + 1} @@\n-{'x' * 200}\n+{'y' * 200}\n" for i in range(10)))
+    small = file_diff("small.py", "@@ -1 +1 @@\n-a\n+b\n")
+
+    budget = estimate_tokens(big) // 2
+
+    result = fit_to_budget(big + small, token_budget=budget)
+
+    assert kept_paths(result) == ["big.py", "small.py"]
+    [entry] = result["skipped"]
+    assert entry["file_path"] == "big.py"
+    assert entry["reason"].endswith("of 10 hunk(s) over the review token budget")
+    assert estimate_tokens(result["diff"]) <= budget
+    assert "@@ -1,1 +1,1 @@\n-" + "x" * 200 in result["diff"]
+
+
+def test_fit_to_budget_drops_a_file_whose_first_hunk_cannot_fit():
+    huge = file_diff("huge.py", f"@@ -1 +1 @@\n-{'x' * 4000}\n+{'y' * 4000}\n")
+    small = file_diff("small.py", "@@ -1 +1 @@\n-a\n+b\n")
+
+    result = fit_to_budget(huge + small, token_budget=200)
+
+    assert kept_paths(result) == ["small.py"]
+    assert result["skipped"] == [{"file_path": "huge.py", "reason": "exceeds the review token budget"}]
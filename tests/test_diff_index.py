@@ -0,0 +1,79 @@
+from harshith_pr_agent.agents.diff_index import DiffIndex, build_inline_comments, normalize_path
+
+DIFF = """diff --git a/app.py b/app.py
+index 1111111..2222222 100644
+--- a/app.py
++++ b/app.py
+@@ -1,3 +1,4 @@
+ import os
+-import sys
++import sys, json
++import re
+
+@@ -10,2 +11,3 @@ def main():
+     run()
+-    return 0
+\\ No newline at end of file
++    cleanup()
++    return 0
+\\ No newline at end of file
+"""
+
+
+def test_positions_count_from_first_hunk_header():
+    index = DiffIndex.from_diff(DIFF)
+
+    assert index.position("app.py", 1) == 1
+    assert index.position("app.py", 2) == 3
+    assert index.position("app.py", 3) == 4
+    assert index.position("app.py", 4) == 5
+
+
+def test_later_hunk_headers_and_no_newline_markers_take_a_position():
+    index = DiffIndex.from_diff(DIFF)
+
+    # Position 6 is the second hunk header, 8 is the removed line and 9 its marker.
+    assert index.position("app.py", 11) == 7
+    assert index.position("app.py", 12) == 10
+    assert index.position("app.py", 13) == 11
+    assert index.position("app.py", 14) is None
+
+
+def test_removed_lines_and_unknown_files_are_not_commentable():
+    index = DiffIndex.from_diff(DIFF)
+
+    assert index.position("app.py", 5) is None
+    assert index.position("other.py", 1) is None
+
+
+def test_paths_are_normalized():
+    index = DiffIndex.from_diff(DIFF)
+
+    assert normalize_path("`b/app.py`") == "app.py"
+    assert normalize_path("./app.py") == "app.py"
+    assert index.position("b/app.py", 1) == 1
+
+
+def test_snap_moves_to_nearest_line_within_range():
+    index = DiffIndex.from_diff(DIFF)
+
+    assert index.snap("app.py", 6) == ("app.py", 4)
+    assert index.snap("app.py", 9) == ("app.py", 11)
+    assert index.snap("app.py", 20) is None
+    assert index.snap("app.py", "not a line") is None
+
+
+def test_build_inline_comments_keeps_unplaceable_findings_in_body():
+    index = DiffIndex.from_diff(DIFF)
+    reviews = {
+        "Security": [
+            {"file_path": "app.py", "line_number": 2, "priority": "High", "comment": "Unused import."},
+            {"file_path": "app.py", "line_number": 40, "priority": "Low", "comment": "Far away."},
+        ],
+    }
+
+    comments, remaining = build_inline_comments(reviews, index)
+
+    assert [(c["path"], c["line"], c["side"]) for c in comments] == [("app.py", 2, "RIGHT")]
+    assert comments[0]["body"] == "**High** (Security Expert) Unused import."
+    assert remaining == {"Security": [reviews["Security"][1]]}
@@ -0,0 +1,103 @@
+from harshith_pr_agent.agents.diff_sharding import (
+    HUNK_HEADER_RE, _split_hunk, estimate_tokens, parse_file_changes, remap_line, shard_diff
+)
+
+
+def file_change(*hunks):
+    diff = "diff --git a/app.py b/app.py\n--- a/app.py\n+++ b/app.py\n" + "".join(hunks)
+    return parse_file_changes(diff)[0]
+
+
+def test_pure_insertion_shifts_only_lines_after_it():
+    change = file_change("@@ -5,0 +6,2 @@\n+first = 1\n+second = 2\n")
+
+    assert change["hunks"] == [(5, 0, 6, 2)]
+    assert remap_line(4, change) == 4
+    assert remap_line(5, change) == 5
+    assert remap_line(6, change) == 8
+
+
+def test_insertion_at_top_of_file_shifts_every_line():
+    change = file_change("@@ -0,0 +1,2 @@\n+import os\n+import sys\n")
+
+    assert remap_line(1, change) == 3
+    assert remap_line(10, change) == 12
+
+
+def test_removed_and_context_lines():
+    change = file_change(
+        "@@ -1,3 +1,2 @@\n keep = 1\n-drop = 2\n keep = 3\n",
+        "@@ -10,0 +10,1 @@\n+added = 4\n",
+    )
+
+    assert remap_line(1, change) == 1
+    assert remap_line(2, change) is None
+    assert remap_line(3, change) == 2
+    assert remap_line(10, change) == 9
+    assert remap_line(11, change) == 11
+
+
+def added_file(path, lines):
+    body = "".join(f"+line {i} of {path}\n" for i in range(1, lines + 1))
+    return f"diff --git a/{path} b/{path}\n--- /dev/null\n+++ b/{path}\n@@ -0,0 +1,{lines} @@\n{body}"
+
+
+def test_small_files_are_packed_into_one_shard():
+    diff = added_file("a.py", 3) + added_file("b.py", 3)
+
+    assert shard_diff(diff, token_budget=1000) == [diff]
+    assert shard_diff("  \n") == []
+
+
+def test_files_that_do_not_fit_together_go_to_separate_shards():
+    first, second = added_file("a.py", 20), added_file("b.py", 20)
+
+    shards = shard_diff(first + second, token_budget=estimate_tokens(first) + 5)
+
+    assert shards == [first, second]
+
+
+def test_oversized_hunk_is_split_into_valid_hunks_under_the_budget():
+    lines = ["@@ -10,20 +10,30 @@ def main():\n"]
+    for i in range(10):
+        lines += [f" context {i}\n", f"-old {i}\n", f"+new {i}a\n", f"+new {i}b\n"]
+    hunk = "".join(lines)
+
+    pieces = _split_hunk(hunk, token_budget=20)
+
+    assert len(pieces) > 1
+    assert all(estimate_tokens(piece.split("\n", 1)[1]) <= 20 for piece in pieces)
+    # Every piece has a header whose counts match its body, and the pieces continue each other's line numbers.
+    old_line, new_line = 10, 10
+    for piece in pieces:
+        header, *body = piece.splitlines()
+        match = HUNK_HEADER_RE.match(header)
+        assert match.group(5) == " def main():"
+        assert (int(match.group(1)), int(match.group(3))) == (old_line, new_line)
+        old_count = sum(1 for line in body if not line.startswith("+"))
+        new_count = sum(1 for line in body if not line.startswith("-"))
+        assert (int(match.group(2)), int(match.group(4))) == (old_count, new_count)
+        old_line, new_line = old_line + old_count, new_line + new_count
+    assert (old_line, new_line) == (30, 40)
+    assert "".join(piece.split("\n", 1)[1] for piece in pieces) == hunk.split("\n", 1)[1]
+
+
+def test_oversized_file_keeps_its_header_on_every_shard():
+    header = "diff --git a/big.py b/big.py\nindex 1111111..2222222 100644\n--- a/big.py\n+++ b/big.py\n"
+    hunks = "".join(
+        f"@@ -{i * 100 + 1},3 +{i * 100 + 1},3 @@\n a\n-{'x' * 80}\n+{'y' * 80}\n" for i in range(6)
+    )
+    big = header + hunks
+    budget = estimate_tokens(header) + 60
+
+    shards = shard_diff(big + added_file("small.py", 2), token_budget=budget)
+
+    assert len(shards) > 2
+    for shard in shards:
+        assert estimate_tokens(shard) <= budget
+    big_shards = [shard for shard in shards if "big.py" in shard]
+    assert all(shard.startswith(header) for shard in big_shards)
+    assert "".join(shard[len(header):] for shard in big_shards) == hunks
+    # Every shard still parses into changes with the original line numbers.
+    starts = [hunk[0] for shard in big_shards for change in parse_file_changes(shard) for hunk in change["hunks"]]
+    assert starts == [1, 101, 201, 301, 401, 501]
@@ -0,0 +1,74 @@
+from harshith_pr_agent.agents.findings import dedupe_findings
+
+
+def finding(line, comment, priority="[SUGGESTION]", file_path="app.py"):
+    return {"file_path": file_path, "line_number": line, "priority": priority, "comment": comment}
+
+
+def test_similar_nearby_findings_merge_across_experts():
+    security = finding(10, "SQL injection in the query built from user input", "[CRITICAL]")
+    performance = finding(12, "Query built from user input allows SQL injection")
+
+    result = dedupe_findings({"Performance": [performance], "Security": [security]})
+
+    assert result["merged"] == 1
+    assert result["dropped"] == 0
+    assert result["reviews"] == {
+        "Performance": [],
+        "Security": [{**security, "also_flagged_by": ["Performance"]}],
+    }
+
+
+def test_findings_far_apart_or_on_other_files_or_unrelated_stay_separate():
+    reviews = {
+        "Security": [
+            finding(10, "SQL injection in the query built from user input"),
+            finding(30, "SQL injection in the query built from user input"),
+            finding(10, "SQL injection in the query built from user input", file_path="b/db.py"),
+            finding(11, "Variable name is misleading"),
+        ],
+    }
+
+    result = dedupe_findings(reviews)
+
+    assert result["merged"] == 0
+    assert result["reviews"]["Security"] == reviews["Security"]
+
+
+def test_same_expert_duplicates_from_shards_merge_without_tagging():
+    first = finding(5, "Missing timeout on the HTTP request")
+    second = finding(6, "HTTP request has no timeout")
+
+    result = dedupe_findings({"Reliability": [first, second]})
+
+    assert result["merged"] == 1
+    assert result["reviews"]["Reliability"] == [first]
+
+
+def test_cap_keeps_highest_priority_then_most_agreed_in_report_order():
+    nitpick = finding(1, "Trailing whitespace", "[NITPICK]")
+    lone = finding(20, "Cache is never invalidated")
+    agreed = finding(40, "Retry loop never gives up on errors")
+    critical = finding(60, "Secret key logged in plain text", "[CRITICAL]")
+    reviews = {
+        "Style": [nitpick],
+        "Performance": [lone, agreed],
+        "Reliability": [{**agreed, "comment": "Retry loop never gives up"}],
+        "Security": [critical],
+    }
+
+    result = dedupe_findings(reviews, max_findings=2)
+
+    assert result["dropped"] == 2
+    assert result["reviews"] == {
+        "Style": [],
+        "Performance": [{**agreed, "also_flagged_by": ["Reliability"]}],
+        "Reliability": [],
+        "Security": [critical],
+    }
+
+
+def test_non_positive_cap_keeps_everything():
+    reviews = {"Style": [finding(line, f"Issue number {line}") for line in (1, 20, 40)]}
+
+    assert dedupe_findings(reviews, max_findings=0)["reviews"] == reviews
@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+
+from harshith_pr_agent.services.job_queue import PRIORITY_CHATBOT, QueueFullError, ReviewJobQueue
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def make_queue():
+    queues = []
+
+    def make(**kwargs):
+        queue = ReviewJobQueue(**kwargs)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.shutdown(wait=False)
+
+
+def block_worker(queue, key="blocker"):
+    """Occupies one worker until the returned event is set."""
+    started, release = threading.Event(), threading.Event()
+
+    def job():
+        started.set()
+        release.wait(5)
+
+    queue.submit(key, job)
+    assert started.wait(5)
+    return release
+
+
+def test_pending_triggers_for_a_key_coalesce_into_the_latest(make_queue):
+    queue = make_queue(worker_count=1)
+    runs = []
+    release = block_worker(queue)
+
+    assert queue.submit("pr", runs.append, "first") == "queued"
+    assert queue.submit("pr", runs.append, "second") == "coalesced"
+    release.set()
+    wait_until(lambda: queue.stats()["completed"] == 2)
+
+    assert runs == ["second"]
+    assert queue.stats()["coalesced"] == 1
+
+
+def test_coalescing_keeps_the_most_urgent_priority(make_queue):
+    queue = make_queue(worker_count=1)
+    runs = []
+    release = block_worker(queue)
+
+    queue.submit("review-a", runs.append, "a")
+    queue.submit("review-b", runs.append, "b")
+    queue.submit("review-b", runs.append, "b-chat", priority=PRIORITY_CHATBOT)
+    release.set()
+    wait_until(lambda: queue.stats()["completed"] == 3)
+
+    assert runs == ["b-chat", "a"]
+
+
+def test_a_running_key_is_deferred_until_its_run_finishes(make_queue):
+    queue = make_queue(worker_count=2)
+    runs = []
+    active = []
+    release = threading.Event()
+
+    def job(name, wait):
+        active.append(name)
+        assert len(active) == 1, "two runs of the same key overlapped"
+        if wait:
+            release.wait(5)
+        runs.append(name)
+        active.remove(name)
+
+    queue.submit("pr", job, "first", True)
+    wait_until(lambda: active == ["first"])
+    assert queue.submit("pr", job, "second", False) == "queued"
+    # The idle worker picks the job up but has to set it aside while "first" runs.
+    wait_until(lambda: "pr" in queue._deferred)
+    assert queue.submit("pr", job, "third", False) == "coalesced"
+    assert queue.stats()["queue_depth"] == 1
+
+    release.set()
+    wait_until(lambda: queue.stats()["completed"] == 2)
+
+    assert runs == ["first", "third"]
+    assert queue.stats()["failed"] == 0
+
+
+def test_full_queue_rejects_new_keys_but_still_coalesces(make_queue):
+    queue = make_queue(worker_count=1, max_queue_size=1)
+    release = block_worker(queue)
+
+    assert queue.submit("pr-1", lambda: None) == "queued"
+    with pytest.raises(QueueFullError):
+        queue.submit("pr-2", lambda: None)
+    assert queue.submit("pr-1", lambda: None) == "coalesced"
+    assert queue.stats()["rejected"] == 1
+    release.set()
+
+
+def test_failed_job_does_not_stop_the_worker(make_queue):
+    queue = make_queue(worker_count=1)
+    runs = []
+
+    def fail():
+        raise RuntimeError("boom")
+
+    queue.submit("bad", fail)
+    queue.submit("good", runs.append, "ok")
+    wait_until(lambda: queue.stats()["completed"] == 1)
+
+    assert runs == ["ok"]
+    assert queue.stats()["failed"] == 1
+    assert queue.stats()["busy_workers"] == 0
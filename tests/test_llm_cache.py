@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from harshith_pr_agent.agents import llm_cache
+from harshith_pr_agent.agents.llm_cache import LLMResultCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_key_depends_on_every_part():
+    key = LLMResultCache.make_key("model@0", "Security", "template", "diff")
+
+    assert key == LLMResultCache.make_key("model@0", "Security", "template", "diff")
+    assert len({
+        key,
+        LLMResultCache.make_key("model@0.3", "Security", "template", "diff"),
+        LLMResultCache.make_key("model@0", "Performance", "template", "diff"),
+        LLMResultCache.make_key("model@0", "Security", "template 2", "diff"),
+        LLMResultCache.make_key("model@0", "Security", "template", "diff 2"),
+    }) == 5
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = LLMResultCache(path=None, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = LLMResultCache(path=str(tmp_path / "cache.sqlite3"), ttl_seconds=60)
+    cache.set("key", {"findings": []})
+    clock[0] += 61
+
+    assert cache.get("key", "missing") == "missing"
+    assert cache.stats()["disk_entries"] == 0
+
+
+def test_disk_tier_survives_a_restart_and_promotes_hits(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    LLMResultCache(path=path).set("key", [{"comment": "cached"}])
+
+    cache = LLMResultCache(path=path)
+
+    assert cache.get("key") == [{"comment": "cached"}]
+    assert cache.get("key") == [{"comment": "cached"}]
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"], stats["hits"]) == (1, 1, 0, 2)
+
+
+def test_disk_tier_is_trimmed_to_its_size(tmp_path, clock):
+    cache = LLMResultCache(path=str(tmp_path / "cache.sqlite3"), max_disk_entries=10)
+    for i in range(100):
+        clock[0] += 1
+        cache.set(f"key-{i}", i)
+
+    stats = cache.stats()
+    assert stats["disk_entries"] == 10
+    assert stats["writes"] == 100
+    cache.clear()
+    assert cache.get("key-99") is None
+
+
+def test_async_access_counts_like_sync_access(tmp_path):
+    cache = LLMResultCache(path=str(tmp_path / "cache.sqlite3"))
+
+    async def main():
+        assert await cache.aget("key") is None
+        await cache.aset("key", "value")
+        return await cache.aget("key")
+
+    assert asyncio.run(main()) == "value"
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["misses"], stats["writes"]) == (1, 1, 1)
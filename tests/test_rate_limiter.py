@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+
+from harshith_pr_agent.connectors.rate_limiter import (
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_WRITE,
+    RateLimitScheduler,
+    github_priority,
+    request_priority,
+)
+
+
+def drained_scheduler(**kwargs) -> RateLimitScheduler:
+    """A one-token scheduler whose only burst slot is already used, so the next requests have to wait."""
+    scheduler = RateLimitScheduler(["token"], requests_per_second=20, burst=1, writes_per_minute=0, **kwargs)
+    scheduler.acquire()
+    return scheduler
+
+
+def test_request_priority_defaults_and_override():
+    assert request_priority("get") == PRIORITY_BULK
+    assert request_priority("POST") == PRIORITY_WRITE
+    with github_priority(PRIORITY_INTERACTIVE):
+        assert request_priority("GET") == PRIORITY_INTERACTIVE
+    assert request_priority("GET") == PRIORITY_BULK
+
+
+def test_waiting_requests_are_served_by_lane_then_fifo():
+    scheduler = drained_scheduler()
+    served = []
+
+    async def request(name, priority):
+        await scheduler.aacquire(priority)
+        served.append(name)
+
+    async def main():
+        await asyncio.gather(
+            request("bulk-1", PRIORITY_BULK),
+            request("interactive", PRIORITY_INTERACTIVE),
+            request("bulk-2", PRIORITY_BULK),
+            request("write", PRIORITY_WRITE),
+        )
+
+    asyncio.run(main())
+
+    assert served == ["write", "interactive", "bulk-1", "bulk-2"]
+    assert scheduler.stats()["waiting"] == 0
+
+
+def test_threads_and_coroutines_share_the_lanes():
+    scheduler = drained_scheduler()
+    served = []
+    bulk_thread = threading.Thread(target=lambda: served.append(("bulk", scheduler.acquire(PRIORITY_BULK)[0])))
+
+    async def main():
+        bulk_thread.start()
+        while scheduler.stats()["waiting"] == 0:
+            await asyncio.sleep(0.001)
+        await scheduler.aacquire(PRIORITY_WRITE)
+        served.append(("write", "token"))
+
+    asyncio.run(main())
+    bulk_thread.join(timeout=5)
+
+    assert served == [("write", "token"), ("bulk", "token")]
+
+
+def test_cancelled_waiter_does_not_hold_up_the_lanes_behind_it():
+    scheduler = drained_scheduler()
+
+    async def main():
+        write = asyncio.create_task(scheduler.aacquire(PRIORITY_WRITE))
+        await asyncio.sleep(0)
+        assert scheduler.stats()["waiting"] == 1
+        write.cancel()
+        await asyncio.gather(write, return_exceptions=True)
+        assert scheduler.stats()["waiting"] == 0
+
+        started = time.monotonic()
+        api_key, _ = await scheduler.aacquire(PRIORITY_BULK)
+        return api_key, time.monotonic() - started
+
+    api_key, waited = asyncio.run(main())
+
+    assert api_key == "token"
+    assert waited < 0.5
+    assert scheduler.stats()["waiting"] == 0
+
+
+def test_abandoned_waiter_in_the_middle_is_not_counted_ahead():
+    scheduler = drained_scheduler()
+    served = []
+
+    async def request(name, priority):
+        await scheduler.aacquire(priority)
+        served.append(name)
+
+    async def main():
+        first = asyncio.create_task(request("interactive", PRIORITY_INTERACTIVE))
+        abandoned = asyncio.create_task(scheduler.aacquire(PRIORITY_INTERACTIVE))
+        last = asyncio.create_task(request("bulk", PRIORITY_BULK))
+        await asyncio.sleep(0)
+        abandoned.cancel()
+        await asyncio.gather(first, abandoned, last, return_exceptions=True)
+
+    asyncio.run(main())
+
+    assert served == ["interactive", "bulk"]
+    assert scheduler.stats()["waiting"] == 0
+
+
+def test_reserve_is_kept_for_writes():
+    scheduler = RateLimitScheduler(["token"], reserve=5, writes_per_minute=0)
+    scheduler.record_response("token", 200, {
+        "X-RateLimit-Limit": "5000",
+        "X-RateLimit-Remaining": "5",
+        "X-RateLimit-Reset": str(time.time() + 600),
+    })
+
+    assert scheduler.estimated_wait(PRIORITY_WRITE) == 0.0
+    assert scheduler.estimated_wait(PRIORITY_BULK) > 500
+
+
+def test_secondary_rate_limit_pauses_the_token():
+    scheduler = RateLimitScheduler(["token"])
+    scheduler.record_response("token", 403, {"Retry-After": "30"}, "You have exceeded a secondary rate limit")
+
+    assert scheduler.estimated_wait(PRIORITY_WRITE) > 25
+    assert scheduler.stats()["rate_limited"] == 1
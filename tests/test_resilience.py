@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+import pytest
+
+from harshith_pr_agent.agents import resilience
+from harshith_pr_agent.agents.resilience import LatencyTracker, LLMCallAborted, LLMUnavailable, resilient_ainvoke
+from harshith_pr_agent.services.metrics import LLM_CALLS
+
+
+class FakeChain:
+    """Async chain whose calls follow a script: a value to return, an exception to raise, or ("sleep", seconds, value)."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+
+    async def ainvoke(self, input_data):
+        step = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        if isinstance(step, tuple) and step[0] == "sleep":
+            await asyncio.sleep(step[1])
+            step = step[2]
+        if isinstance(step, BaseException):
+            raise step
+        return step
+
+
+@pytest.fixture(autouse=True)
+def fast_settings(monkeypatch):
+    monkeypatch.setattr(resilience, "LLM_CALL_TIMEOUT_SECONDS", 5.0)
+    monkeypatch.setattr(resilience, "LLM_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(resilience, "LLM_RETRY_BACKOFF_SECONDS", 0.0)
+    monkeypatch.setattr(resilience, "LLM_HEDGE_DELAY_SECONDS", 10.0)
+    monkeypatch.setattr(resilience, "FALLBACK_RESERVE_SECONDS", 0.0)
+    monkeypatch.setattr(resilience, "_latency_tracker", LatencyTracker())
+
+
+def outcomes(*names):
+    return {name: LLM_CALLS.value(outcome=name, span="none") for name in names}
+
+
+def delta(before, after):
+    return {name: after[name] - before[name] for name in before}
+
+
+def invoke(chain, deadline_in=10.0, fallback_chain=None, fallback_key="fallback@0"):
+    return asyncio.run(resilient_ainvoke(
+        chain, {"diff": ""}, "primary@0", time.time() + deadline_in, fallback_chain, fallback_key
+    ))
+
+
+def test_hedge_answers_first_when_the_first_attempt_is_slow(monkeypatch):
+    monkeypatch.setattr(resilience, "LLM_HEDGE_DELAY_SECONDS", 0.05)
+    chain = FakeChain(("sleep", 5, "slow"), "fast")
+    before = outcomes("hedged", "hedge_won", "ok")
+    started = time.monotonic()
+
+    assert invoke(chain) == ("fast", "primary@0")
+    assert time.monotonic() - started < 1
+    assert chain.calls == 2
+    assert delta(before, outcomes("hedged", "hedge_won", "ok")) == {"hedged": 1, "hedge_won": 1, "ok": 1}
+
+
+def test_attempts_time_out_and_the_call_is_reported_unavailable(monkeypatch):
+    monkeypatch.setattr(resilience, "LLM_CALL_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(resilience, "LLM_MAX_ATTEMPTS", 2)
+    chain = FakeChain(("sleep", 5, "late"))
+    before = outcomes("timeout", "retry")
+
+    with pytest.raises(LLMUnavailable, match="timed out"):
+        invoke(chain)
+    assert chain.calls == 2
+    assert delta(before, outcomes("timeout", "retry")) == {"timeout": 2, "retry": 1}
+
+
+def test_aborted_calls_are_not_retried_or_sent_to_the_fallback():
+    chain = FakeChain(LLMCallAborted("budget spent"))
+    fallback = FakeChain("fallback answer")
+    before = outcomes("aborted", "retry")
+
+    with pytest.raises(LLMCallAborted):
+        invoke(chain, fallback_chain=fallback)
+    assert (chain.calls, fallback.calls) == (1, 0)
+    assert delta(before, outcomes("aborted", "retry")) == {"aborted": 1, "retry": 0}
+
+
+def test_fallback_answers_after_the_last_failed_attempt():
+    chain = FakeChain(RuntimeError("503"))
+    fallback = FakeChain("fallback answer")
+    before = outcomes("error", "retry", "fallback")
+
+    assert invoke(chain, fallback_chain=fallback) == ("fallback answer", "fallback@0")
+    assert (chain.calls, fallback.calls) == (3, 1)
+    assert delta(before, outcomes("error", "retry", "fallback")) == {"error": 3, "retry": 2, "fallback": 1}
+
+
+def test_retry_succeeds_before_the_fallback_is_needed():
+    chain = FakeChain(RuntimeError("503"), "answer")
+    fallback = FakeChain("fallback answer")
+
+    assert invoke(chain, fallback_chain=fallback) == ("answer", "primary@0")
+    assert fallback.calls == 0
+
+
+def test_fallback_reserve_is_kept_from_the_primary_attempts(monkeypatch):
+    monkeypatch.setattr(resilience, "FALLBACK_RESERVE_SECONDS", 0.3)
+    chain = FakeChain(("sleep", 5, "late"))
+    fallback = FakeChain(("sleep", 0.1, "fallback answer"))
+    started = time.monotonic()
+
+    # The primary model only gets the 0.1s left before the reserve; the fallback answers within the reserve.
+    assert invoke(chain, deadline_in=0.4, fallback_chain=fallback) == ("fallback answer", "fallback@0")
+    assert chain.calls == 1
+    assert time.monotonic() - started < 0.4
+
+
+def test_failed_fallback_is_counted_and_reported_unavailable():
+    before = outcomes("fallback_failed")
+
+    with pytest.raises(LLMUnavailable, match="RuntimeError: fallback down"):
+        invoke(FakeChain(RuntimeError("503")), fallback_chain=FakeChain(RuntimeError("fallback down")))
+    assert delta(before, outcomes("fallback_failed")) == {"fallback_failed": 1}
+
+
+def test_no_fallback_to_the_same_model():
+    fallback = FakeChain("fallback answer")
+
+    with pytest.raises(LLMUnavailable):
+        invoke(FakeChain(RuntimeError("503")), fallback_chain=fallback, fallback_key="primary@0")
+    assert fallback.calls == 0
@@ -0,0 +1,138 @@
+import time
+from typing import TypedDict
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.graph import END, StateGraph
+
+from harshith_pr_agent.services import review_checkpoints
+from harshith_pr_agent.services.review_checkpoints import (
+    RUN_FAILED, RUN_RUNNING, RUN_STALE_SECONDS, ReviewCheckpointStore, run_thread_id
+)
+
+PR_URL = "https://github.com/owner/repo/pull/7"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ReviewCheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+
+
+def put_checkpoints(store, thread_id, count):
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    ids = []
+    for step in range(count):
+        checkpoint = {**empty_checkpoint(), "channel_values": {"diff": "x" * 1000}}
+        config = store.put(config, checkpoint, {"step": step, "writes": {f"node_{step}": {}}}, {})
+        ids.append(config["configurable"]["checkpoint_id"])
+    return ids
+
+
+class State(TypedDict):
+    calls: list
+
+
+def build_graph(store, fail):
+    graph = StateGraph(State)
+    graph.add_node("fetch", lambda state: {"calls": state["calls"] + ["fetch"]})
+
+    def synthesize(state):
+        if fail:
+            raise RuntimeError("synthesizer down")
+        return {"calls": state["calls"] + ["synthesize"]}
+
+    graph.add_node("synthesize", synthesize)
+    graph.set_entry_point("fetch")
+    graph.add_edge("fetch", "synthesize")
+    graph.add_edge("synthesize", END)
+    return graph.compile(checkpointer=store)
+
+
+def test_get_tuple_loads_only_the_latest_checkpoint(store, monkeypatch):
+    ids = put_checkpoints(store, "thread", 5)
+    loaded = []
+    loads_typed = store.serde.loads_typed
+    monkeypatch.setattr(store.serde, "loads_typed", lambda data: loaded.append(data) or loads_typed(data))
+
+    latest = store.get_tuple({"configurable": {"thread_id": "thread"}})
+
+    assert latest.config["configurable"]["checkpoint_id"] == ids[-1]
+    assert latest.metadata["step"] == 4
+    # The checkpoint and its metadata, not every blob of the thread.
+    assert len(loaded) == 2
+
+
+def test_list_applies_before_limit_and_filter(store):
+    ids = put_checkpoints(store, "thread", 5)
+    put_checkpoints(store, "other", 2)
+    config = {"configurable": {"thread_id": "thread"}}
+
+    assert [t.metadata["step"] for t in store.list(config, limit=2)] == [4, 3]
+    before = {"configurable": {"thread_id": "thread", "checkpoint_id": ids[2]}}
+    assert [t.metadata["step"] for t in store.list(config, before=before)] == [1, 0]
+    assert [t.metadata["step"] for t in store.list(config, filter={"step": 1})] == [1]
+    assert list(store.list(config, limit=0)) == []
+    exact = {"configurable": {"thread_id": "thread", "checkpoint_id": ids[1]}}
+    assert store.get_tuple(exact).metadata["step"] == 1
+
+
+def test_failed_run_resumes_from_the_last_completed_node(store):
+    config = {"configurable": {"thread_id": "thread"}}
+    with pytest.raises(RuntimeError):
+        build_graph(store, fail=True).invoke({"calls": []}, config)
+
+    app = build_graph(store, fail=False)
+    assert app.get_state(config).next == ("synthesize",)
+    assert app.invoke(None, config)["calls"] == ["fetch", "synthesize"]
+
+
+def test_live_run_cannot_be_started_twice(store):
+    assert store.start_run(PR_URL, "abc", "review", True)["status"] == RUN_RUNNING
+
+    assert store.start_run(PR_URL, "abc", "review", True) is None
+    assert store.get_run(run_thread_id(PR_URL, "abc"))["attempts"] == 1
+
+
+def test_stale_or_failed_runs_can_be_taken_over(store, monkeypatch):
+    thread_id = run_thread_id(PR_URL, "abc")
+    store.start_run(PR_URL, "abc", "review", True)
+    later = time.time() + RUN_STALE_SECONDS + 1
+    monkeypatch.setattr(review_checkpoints.time, "time", lambda: later)
+
+    assert store.start_run(PR_URL, "abc", "review", False)["attempts"] == 2
+    store.finish_run(thread_id, RUN_FAILED, "boom")
+    assert store.start_run(PR_URL, "abc", "review", False)["attempts"] == 3
+
+
+def test_checkpoints_are_the_run_heartbeat(store, monkeypatch):
+    thread_id = run_thread_id(PR_URL, "abc")
+    store.start_run(PR_URL, "abc", "review", True)
+    later = time.time() + RUN_STALE_SECONDS + 1
+    monkeypatch.setattr(review_checkpoints.time, "time", lambda: later)
+
+    put_checkpoints(store, thread_id, 1)
+
+    assert store.start_run(PR_URL, "abc", "review", True) is None
+
+
+def test_list_runs_reports_progress_and_leaves_live_runs_out_of_resumes(store, monkeypatch):
+    live, stale, failed = (run_thread_id(PR_URL, sha) for sha in ("live", "stale", "failed"))
+    store.start_run(PR_URL, "stale", "review", True)
+    store.start_run(PR_URL, "failed", "incremental", True)
+    put_checkpoints(store, failed, 2)
+    store.finish_run(failed, RUN_FAILED, "boom")
+    later = time.time() + RUN_STALE_SECONDS + 1
+    monkeypatch.setattr(review_checkpoints.time, "time", lambda: later)
+    store.start_run(PR_URL, "live", "review", True)
+    monkeypatch.setattr(store.serde, "loads_typed", lambda data: pytest.fail("list_runs loaded a checkpoint"))
+
+    runs = {run["thread_id"]: run for run in store.list_runs()}
+
+    assert {thread_id: run["resumable"] for thread_id, run in runs.items()} == {
+        live: False, stale: True, failed: True
+    }
+    assert runs[failed]["checkpoint"] == {
+        "step": 1, "completed_nodes": ["node_0", "node_1"], "saved_task_results": 0
+    }
+    assert runs[stale]["checkpoint"] is None
+    assert {run["thread_id"] for run in store.list_runs(resumable_only=True)} == {stale, failed}
@@ -0,0 +1,69 @@
+import asyncio
+import re
+
+import pytest
+
+from benchmarks.fake_llm import FakeChatModel, _prompt_text
+from harshith_pr_agent.agents import registry
+from harshith_pr_agent.agents.llm_cache import LLMResultCache
+from harshith_pr_agent.agents.registry import set_chat_model_factory
+from harshith_pr_agent.agents.review_graph import create_review_graph, file_sections, graph_run_config
+
+PROMPTS = []
+
+
+class RecordingChatModel(FakeChatModel):
+    async def _agenerate(self, messages, *args, **kwargs):
+        PROMPTS.append(_prompt_text(messages))
+        return await super()._agenerate(messages, *args, **kwargs)
+
+
+@pytest.fixture
+def fake_llm():
+    PROMPTS.clear()
+    original = registry._chat_model_factory
+    set_chat_model_factory(lambda model, temperature: RecordingChatModel(
+        model=model, temperature=temperature, latency_seconds=0, latency_jitter=0
+    ))
+    yield PROMPTS
+    set_chat_model_factory(original)
+
+
+def file_diff(path, line):
+    return (
+        f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+        f"@@ -1,2 +1,2 @@\n def handler(request):\n-    return {line!r}\n+    return {line!r} + request.user\n"
+    )
+
+
+def reviewed_paths(prompts):
+    return sorted({path for prompt in prompts for path in re.findall(r"^\+\+\+ b/(.+)$", prompt, re.MULTILINE)})
+
+
+def review(app, description, diff):
+    state = {"pr_url": "https://github.com/owner/repo/pull/7", "title": "Handlers", "description": description,
+             "diff": diff, "skipped_files": []}
+    return asyncio.run(app.ainvoke(state, config=graph_run_config()))
+
+
+def test_file_sections_join_pieces_of_the_same_file():
+    first, second = file_diff("a.py", "a"), file_diff("b.py", "b")
+
+    assert file_sections(first + second + first) == [("a.py", first + first), ("b.py", second)]
+
+
+def test_expert_cache_only_sends_changed_files_again(fake_llm):
+    app = create_review_graph(cache=LLMResultCache(path=None))
+    review(app, "First version.", file_diff("a.py", "a") + file_diff("b.py", "b"))
+    assert reviewed_paths(fake_llm) == ["a.py", "b.py"]
+
+    fake_llm.clear()
+    # A new description and a change to b.py: only b.py is reviewed again.
+    result = review(app, "Edited description.", file_diff("a.py", "a") + file_diff("b.py", "b2"))
+
+    assert reviewed_paths(fake_llm) == ["b.py"]
+    assert result["reviews"]
+
+    fake_llm.clear()
+    review(app, "Edited again.", file_diff("a.py", "a") + file_diff("b.py", "b2"))
+    assert reviewed_paths(fake_llm) == []
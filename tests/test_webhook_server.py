@@ -0,0 +1,158 @@
+# tests/test_webhook_server.py
+
+import hashlib
+import hmac
+import json
+
+import pytest
+
+import webhook_server
+from harshith_pr_agent.services.constants import BOT_SIGNATURE
+from harshith_pr_agent.services.job_queue import PRIORITY_CHATBOT
+
+SECRET = "test-secret"
+PR_URL = "https://github.com/owner/repo/pull/7"
+
+
+class RecordingQueue:
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, key, func, *args, priority=None):
+        self.jobs.append({"key": key, "func": func, "args": args, "priority": priority})
+        return "queued"
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    queue = RecordingQueue()
+    monkeypatch.setattr(webhook_server, "job_queue", queue)
+    monkeypatch.setattr(webhook_server, "WEBHOOK_SECRET", SECRET)
+    return queue
+
+
+def deliver(event, payload, secret=SECRET):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    signature = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return webhook_server.app.test_client().post(
+        "/webhook", data=body, content_type="application/json",
+        headers={"X-GitHub-Event": event, "X-Hub-Signature-256": signature},
+    )
+
+
+def comment_event(body, comment_id=1):
+    return {
+        "action": "created",
+        "issue": {"number": 7, "pull_request": {"html_url": PR_URL}},
+        "comment": {"id": comment_id, "body": body},
+    }
+
+
+def test_trigger_comment_is_enqueued_in_the_chatbot_lane(queue):
+    response = deliver("issue_comment", comment_event("Hey harshith pr agent, why is this slow?", 42))
+
+    assert response.status_code == 200
+    [job] = queue.jobs
+    assert job["key"] == ("chatbot", PR_URL, 42)
+    assert job["func"] is webhook_server.chatbot_job
+    assert job["args"] == (PR_URL, "Hey harshith pr agent, why is this slow?")
+    assert job["priority"] == PRIORITY_CHATBOT
+
+
+def test_bot_report_mentioning_the_trigger_is_ignored(queue):
+    report = f"## Harshith PR Agent Review\n\nLooks fine.\n{BOT_SIGNATURE}"
+    response = deliver("issue_comment", comment_event(report))
+
+    assert response.status_code == 200
+    assert queue.jobs == []
+
+
+def test_comment_without_trigger_is_not_enqueued(queue):
+    response = deliver("issue_comment", comment_event("LGTM"))
+
+    assert response.status_code == 202
+    assert queue.jobs == []
+
+
+def test_comment_on_an_issue_is_not_enqueued(queue):
+    payload = comment_event("Harshith PR Agent, help")
+    del payload["issue"]["pull_request"]
+    response = deliver("issue_comment", payload)
+
+    assert response.status_code == 202
+    assert queue.jobs == []
+
+
+def pull_request_event(action):
+    return {"action": action, "number": 7, "pull_request": {"html_url": PR_URL}}
+
+
+def test_signature_valid_checks_the_raw_body(monkeypatch):
+    monkeypatch.setattr(webhook_server, "WEBHOOK_SECRET", SECRET)
+    body = b'{"action": "opened"}'
+    signature = "sha256=" + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+    assert webhook_server.signature_valid(body, signature)
+    assert not webhook_server.signature_valid(body + b" ", signature)
+    assert not webhook_server.signature_valid(body, signature.replace("sha256=", "sha1="))
+    assert not webhook_server.signature_valid(body, None)
+
+
+def test_delivery_with_a_bad_signature_is_rejected(queue):
+    response = deliver("pull_request", pull_request_event("opened"), secret="wrong-secret")
+
+    assert response.status_code == 401
+    assert queue.jobs == []
+
+
+@pytest.mark.parametrize("action, func", [
+    ("opened", "review_job"),
+    ("synchronize", "incremental_review_job"),
+])
+def test_pull_request_actions_are_enqueued_per_pr(queue, action, func):
+    response = deliver("pull_request", pull_request_event(action))
+
+    assert response.status_code == 200
+    [job] = queue.jobs
+    assert job["key"] == ("review", PR_URL)
+    assert job["func"] is getattr(webhook_server, func)
+    assert job["args"] == (PR_URL,)
+
+
+def test_unhandled_event_is_answered_without_reading_the_body(queue):
+    # Neither signed nor JSON: the X-GitHub-Event header alone decides.
+    response = webhook_server.app.test_client().post(
+        "/webhook", data=b"not json", headers={"X-GitHub-Event": "push"},
+    )
+
+    assert response.status_code == 202
+    assert queue.jobs == []
+
+
+@pytest.mark.parametrize("payload", [
+    pull_request_event("closed"),
+    {"number": 7, "pull_request": {"html_url": PR_URL}, "action": "labeled"},
+])
+def test_unhandled_actions_are_not_enqueued(queue, payload):
+    response = deliver("pull_request", payload)
+
+    assert response.status_code == 202
+    assert queue.jobs == []
+
+
+def test_malformed_payload_is_rejected(queue):
+    response = deliver("pull_request", b'{"action": "opened", "pull_request": ')
+
+    assert response.status_code == 400
+    assert queue.jobs == []
+
+
+def test_full_queue_answers_503(queue, monkeypatch):
+    def submit(*args, **kwargs):
+        raise webhook_server.QueueFullError("full")
+
+    monkeypatch.setattr(queue, "submit", submit)
+    response = deliver("pull_request", pull_request_event("opened"))
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
@@ -1,65 +1,344 @@
+import time
 
+_import_started = time.perf_counter()
 
-from flask import Flask, request, jsonify
-from harshith_pr_agent.services.review_service import run_graph_review, run_chatbot_response, BOT_SIGNATURE
-import threading
+import asyncio
+import hashlib
+import hmac
+import json
 import os
+import re
+import threading
+from flask import Flask, Response, request, jsonify
+from harshith_pr_agent.services.constants import BOT_SIGNATURE
+from harshith_pr_agent.services.job_queue import (
+    ReviewJobQueue, AsyncReviewJobQueue, QueueFullError, PRIORITY_CHATBOT, PRIORITY_REVIEW
+)
+from harshith_pr_agent.services.metrics import get_metrics_registry
+from harshith_pr_agent.services.review_store import get_review_store
+from harshith_pr_agent.agents.llm_cache import get_llm_cache
 from dotenv import load_dotenv
 
 load_dotenv()
 app = Flask(__name__)
 
 BOT_TRIGGER_PHRASE = "Harshith PR Agent"
+BOT_TRIGGER_BYTES = BOT_TRIGGER_PHRASE.lower().encode()
 
-def run_review_in_background(pr_url):
-    print(f"--- [Thread] Starting full analysis for {pr_url} ---")
+# Secret of the GitHub webhook; deliveries without a matching X-Hub-Signature-256 are rejected.
+# Unset, signatures are not checked.
+WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+if not WEBHOOK_SECRET:
+    print("--- GITHUB_WEBHOOK_SECRET is not set, webhook signatures are not verified ---")
+# X-GitHub-Event -> actions that start a job. Anything else is answered before the body is parsed.
+HANDLED_ACTIONS = {
+    'pull_request': ('opened', 'synchronize'),
+    'issue_comment': ('created',),
+}
+# GitHub serializes "action" as the first key, so the action can be read without parsing the payload.
+LEADING_ACTION_RE = re.compile(rb'\A\s*\{\s*"action"\s*:\s*"([a-z_]+)"')
+
+# With WEBHOOK_ASYNC=1 all jobs run as coroutines on one event loop instead of a thread pool.
+USE_ASYNC_ENGINE = os.getenv("WEBHOOK_ASYNC", "0") == "1"
+# Loads the review pipeline in the background right after boot instead of on the first job.
+WARMUP_ON_START = os.getenv("WEBHOOK_WARMUP", "1") == "1"
+# Re-queues the review runs a previous process left failed, degraded or interrupted (once stale, see
+# REVIEW_RUN_STALE_SECONDS) when the pipeline is loaded.
+RESUME_RUNS_ON_START = os.getenv("WEBHOOK_RESUME_RUNS", "0") == "1"
+# Bearer token required by the /admin endpoints and /reviews; they answer 404 when it is unset.
+ADMIN_TOKEN = os.getenv("WEBHOOK_ADMIN_TOKEN", "")
+
+# The review pipeline (langchain, langgraph, the Gemini client) takes over a second to import,
+# so it is only loaded when a job first needs it, keeping cold starts fast.
+_review_service = None
+_review_service_lock = threading.Lock()
+pipeline_load_seconds = None
+
+def review_service():
+    """Returns the review_service module, importing it on first use."""
+    global _review_service, pipeline_load_seconds
+    with _review_service_lock:
+        if _review_service is None:
+            started = time.perf_counter()
+            from harshith_pr_agent.services import review_service as module
+            pipeline_load_seconds = time.perf_counter() - started
+            print(f"--- Review pipeline loaded in {pipeline_load_seconds * 1000:.0f}ms ---")
+            _review_service = module
+        return _review_service
+
+def warm_up():
+    """Loads the review pipeline and builds the shared review graph before the first job arrives."""
     try:
-        run_graph_review(pr_url, post_to_github=True)
-        print(f"--- [Thread] Full analysis for {pr_url} completed. ---")
+        review_service().get_review_graph()
     except Exception as e:
-        print(f"--- [Thread] Error during full analysis for {pr_url}: {e} ---")
+        print(f"--- Warm-up failed, the first job will load the pipeline: {e} ---")
+        return
+    if RESUME_RUNS_ON_START:
+        from harshith_pr_agent.services.review_checkpoints import get_checkpoint_store
+
+        store = get_checkpoint_store()
+        if store is not None:
+            queued, rejected = queue_run_resumes(store.list_runs(resumable_only=True))
+            print(f"--- Resuming {len(queued)} incomplete review run(s), {len(rejected)} rejected by the queue ---")
+
+def run_review_in_background(pr_url, post_to_github=True):
+    print(f"--- [Thread] Starting full analysis for {pr_url} ---")
+    review_service().run_graph_review(pr_url, post_to_github=post_to_github)
+    print(f"--- [Thread] Full analysis for {pr_url} completed. ---")
+
+def run_incremental_review_in_background(pr_url, post_to_github=True):
+    print(f"--- [Thread] Starting incremental analysis for {pr_url} ---")
+    review_service().run_incremental_review(pr_url, post_to_github=post_to_github)
+    print(f"--- [Thread] Incremental analysis for {pr_url} completed. ---")
 
 def run_chatbot_in_background(pr_url, comment_body):
     print(f"--- [Thread] Starting chatbot response for {pr_url} ---")
+    review_service().run_chatbot_response(pr_url, comment_body)
+    print(f"--- [Thread] Chatbot response for {pr_url} completed. ---")
+
+# The async jobs run on the event loop, so the first import happens on a worker thread instead of blocking it.
+async def aload_review_service():
+    if _review_service is not None:
+        return _review_service
+    return await asyncio.to_thread(review_service)
+
+async def arun_review_in_background(pr_url, post_to_github=True):
+    print(f"--- [Async] Starting full analysis for {pr_url} ---")
+    await (await aload_review_service()).arun_graph_review(pr_url, post_to_github=post_to_github)
+    print(f"--- [Async] Full analysis for {pr_url} completed. ---")
+
+async def arun_incremental_review_in_background(pr_url, post_to_github=True):
+    print(f"--- [Async] Starting incremental analysis for {pr_url} ---")
+    await (await aload_review_service()).arun_incremental_review(pr_url, post_to_github=post_to_github)
+    print(f"--- [Async] Incremental analysis for {pr_url} completed. ---")
+
+async def arun_chatbot_in_background(pr_url, comment_body):
+    print(f"--- [Async] Starting chatbot response for {pr_url} ---")
+    await (await aload_review_service()).arun_chatbot_response(pr_url, comment_body)
+    print(f"--- [Async] Chatbot response for {pr_url} completed. ---")
+
+if USE_ASYNC_ENGINE:
+    job_queue = AsyncReviewJobQueue()
+    review_job, incremental_review_job, chatbot_job = (
+        arun_review_in_background, arun_incremental_review_in_background, arun_chatbot_in_background
+    )
+else:
+    job_queue = ReviewJobQueue()
+    review_job, incremental_review_job, chatbot_job = (
+        run_review_in_background, run_incremental_review_in_background, run_chatbot_in_background
+    )
+
+def enqueue_job(key, func, *args, priority=PRIORITY_REVIEW, accepted_status=''):
+    """Queues a background job, answering 503 when the worker pool is saturated."""
     try:
-        run_chatbot_response(pr_url, comment_body)
-        print(f"--- [Thread] Chatbot response for {pr_url} completed. ---")
-    except Exception as e:
-        print(f"--- [Thread] Error during chatbot response for {pr_url}: {e} ---")
+        outcome = job_queue.submit(key, func, *args, priority=priority)
+    except QueueFullError:
+        return jsonify({'status': 'Server busy, please retry later'}), 503, {'Retry-After': '30'}
+    if outcome == 'coalesced':
+        return jsonify({'status': f'{accepted_status} (merged with a pending run)'}), 200
+    return jsonify({'status': accepted_status}), 200
+
+def queue_run_resumes(runs):
+    """
+    Queues a job per incomplete review run; the job resumes the run from its checkpoint
+    if the PR's head SHA has not moved on. Returns the queued and rejected thread ids.
+    """
+    queued, rejected = [], []
+    for run in runs:
+        job = incremental_review_job if run['kind'] == 'incremental' else review_job
+        try:
+            job_queue.submit(('review', run['pr_url']), job, run['pr_url'], run['post_to_github'])
+        except QueueFullError:
+            rejected.append(run['thread_id'])
+            continue
+        queued.append(run['thread_id'])
+    return queued, rejected
+
+def admin_rejection():
+    """The response refusing an admin request, or None when it carries the admin token."""
+    if not ADMIN_TOKEN:
+        return jsonify({'status': 'Not found'}), 404
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {ADMIN_TOKEN}'.encode()):
+        return jsonify({'status': 'Unauthorized'}), 401
+    return None
+
+@app.route('/admin/runs', methods=['GET'])
+def review_runs():
+    """
+    Lists the review runs that failed, were interrupted, are still running or finished degraded,
+    with their checkpoint progress and whether they can be resumed.
+    """
+    rejection = admin_rejection()
+    if rejection:
+        return rejection
+    from harshith_pr_agent.services.review_checkpoints import get_checkpoint_store
+
+    store = get_checkpoint_store()
+    if store is None:
+        return jsonify({'status': 'Checkpointing is disabled'}), 404
+    return jsonify({'runs': store.list_runs(limit=request.args.get('limit', 100, type=int))}), 200
+
+@app.route('/admin/runs/resume', methods=['POST'])
+def resume_review_runs():
+    """
+    Resumes the failed, degraded or stale runs of {"pr_url": ..., "head_sha": ...} (head_sha optional),
+    or all of them; runs that are still alive are left alone.
+    """
+    rejection = admin_rejection()
+    if rejection:
+        return rejection
+    from harshith_pr_agent.services.review_checkpoints import get_checkpoint_store
+
+    store = get_checkpoint_store()
+    if store is None:
+        return jsonify({'status': 'Checkpointing is disabled'}), 404
+    body = request.get_json(silent=True) or {}
+    runs = [
+        run for run in store.list_runs(resumable_only=True)
+        if (not body.get('pr_url') or run['pr_url'] == body['pr_url'])
+        and (not body.get('head_sha') or run['head_sha'] == body['head_sha'])
+    ]
+    if not runs:
+        return jsonify({'status': 'No resumable runs'}), 404
+    queued, rejected = queue_run_resumes(runs)
+    if rejected and not queued:
+        return jsonify({'status': 'Server busy, please retry later', 'rejected': rejected}), 503, {'Retry-After': '30'}
+    return jsonify({'status': 'Resume queued', 'queued': queued, 'rejected': rejected}), 200
+
+@app.route('/queue/stats', methods=['GET'])
+def queue_stats():
+    return jsonify(job_queue.stats()), 200
+
+@app.route('/reviews', methods=['GET'])
+def stored_reviews():
+    """Returns the stored review of a PR: the latest one, or the one at ?head_sha=. Needs the admin token."""
+    rejection = admin_rejection()
+    if rejection:
+        return rejection
+    pr_url = request.args.get('pr_url')
+    if not pr_url:
+        return jsonify({'status': 'pr_url is required'}), 400
+    head_sha = request.args.get('head_sha')
+    try:
+        store = get_review_store()
+        artifact = store.get_review(pr_url, head_sha) if head_sha else store.get_last_review(pr_url)
+    except ValueError as e:
+        return jsonify({'status': str(e)}), 400
+    if artifact is None:
+        return jsonify({'status': 'No stored review'}), 404
+    return jsonify(artifact), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint: span histograms, token/retry/cache counters and queue gauges."""
+    from harshith_pr_agent.connectors.http_client import get_etag_cache
+    from harshith_pr_agent.connectors.rate_limiter import configured_api_keys, get_rate_limit_scheduler
+
+    queue = job_queue.stats()
+    cache = get_llm_cache().stats()
+    gauges = {
+        "pr_agent_queue_depth": ("Jobs waiting in the webhook queue.", queue["queue_depth"]),
+        "pr_agent_busy_workers": ("Webhook jobs currently running.", queue["busy_workers"]),
+        "pr_agent_llm_cache_hits": ("LLM result cache hits since start.", cache["hits"]),
+        "pr_agent_llm_cache_misses": ("LLM result cache misses since start.", cache["misses"]),
+        "pr_agent_github_etag_hits": ("GitHub responses served from the ETag cache since start.", get_etag_cache().hits),
+    }
+    gauges["pr_agent_startup_seconds"] = ("Seconds taken to import the webhook server.", startup_seconds)
+    if pipeline_load_seconds is not None:
+        gauges["pr_agent_pipeline_load_seconds"] = ("Seconds taken to import the review pipeline.", pipeline_load_seconds)
+    # The scheduler needs a GitHub token; without one there is no rate limit to report.
+    if configured_api_keys():
+        github = get_rate_limit_scheduler().stats()
+        gauges["pr_agent_github_waiting_requests"] = (
+            "GitHub requests waiting in the rate-limit scheduler.", github["waiting"]
+        )
+        gauges["pr_agent_github_rate_limited_responses"] = (
+            "Rate-limited GitHub responses since start.", github["rate_limited"]
+        )
+        if github["rate_limit_remaining"] is not None:
+            gauges["pr_agent_github_rate_limit_remaining"] = (
+                "Lowest primary rate-limit budget left across the configured tokens.", github["rate_limit_remaining"]
+            )
+    body = get_metrics_registry().render(gauges)
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+def signature_valid(body, signature):
+    """Checks an X-Hub-Signature-256 header against the raw body in constant time."""
+    expected = 'sha256=' + hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected.encode(), (signature or '').encode())
+
+def handle_pull_request_event(payload):
+    pr_url = (payload.get('pull_request') or {}).get('html_url')
+    if not pr_url:
+        return jsonify({'status': 'Event not processed'}), 202
+    if payload.get('action') == 'opened':
+        print(f"--- [Webhook] Received new PR: {pr_url} ---")
+        return enqueue_job(('review', pr_url), review_job, pr_url,
+                           accepted_status='Initial review process started')
+    print(f"--- [Webhook] New commits pushed to PR: {pr_url} ---")
+    return enqueue_job(('review', pr_url), incremental_review_job, pr_url,
+                       accepted_status='Incremental review process started')
+
+def handle_issue_comment_event(payload):
+    issue = payload.get('issue') or {}
+    comment = payload.get('comment') or {}
+    if 'pull_request' not in issue:
+        return jsonify({'status': 'Event not processed'}), 202
+    comment_body = comment.get('body') or ''
+
+    if BOT_SIGNATURE in comment_body:
+        return jsonify({'status': 'Comment from bot itself, ignoring'}), 200
+
+    pr_url = (issue.get('pull_request') or {}).get('html_url')
+    if BOT_TRIGGER_PHRASE.lower() not in comment_body.lower() or not pr_url:
+        return jsonify({'status': 'Event not processed'}), 202
+    print(f"--- [Webhook] Chatbot query received on PR: {pr_url} ---")
+    comment_id = comment.get('id', comment_body)
+    return enqueue_job(('chatbot', pr_url, comment_id), chatbot_job, pr_url, comment_body,
+                       priority=PRIORITY_CHATBOT, accepted_status='Chatbot response process started')
+
+EVENT_HANDLERS = {
+    'pull_request': handle_pull_request_event,
+    'issue_comment': handle_issue_comment_event,
+}
 
 @app.route('/webhook', methods=['POST'])
 def github_webhook():
-    payload = request.get_json()
-    if not payload:
+    """
+    Routes a GitHub delivery on its X-GitHub-Event header and action before
+    parsing it: push, check_run and other events we never act on are answered
+    without reading the body, and only handled actions are decoded.
+    """
+    event = request.headers.get('X-GitHub-Event', '')
+    actions = HANDLED_ACTIONS.get(event)
+    if actions is None:
+        return jsonify({'status': 'Event not processed'}), 202
+
+    body = request.get_data(cache=False)
+    if WEBHOOK_SECRET and not signature_valid(body, request.headers.get('X-Hub-Signature-256')):
+        return jsonify({'status': 'Invalid signature'}), 401
+
+    match = LEADING_ACTION_RE.match(body)
+    if match and match.group(1).decode() not in actions:
+        return jsonify({'status': 'Event not processed'}), 202
+    # A comment without the trigger phrase anywhere in the delivery cannot be a chatbot query.
+    if event == 'issue_comment' and BOT_TRIGGER_BYTES not in body.lower():
+        return jsonify({'status': 'Event not processed'}), 202
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict) or not payload:
         return jsonify({'status': 'Invalid payload'}), 400
+    if payload.get('action') not in actions:
+        return jsonify({'status': 'Event not processed'}), 202
+    return EVENT_HANDLERS[event](payload)
 
-    
-    if payload.get('action') == 'opened' and 'pull_request' in payload:
-        pr_url = payload.get('pull_request', {}).get('html_url')
-        if pr_url:
-            print(f"--- [Webhook] Received new PR: {pr_url} ---")
-            thread = threading.Thread(target=run_review_in_background, args=(pr_url,))
-            thread.start()
-            return jsonify({'status': 'Initial review process started'}), 200
-
-    
-    if payload.get('action') == 'created' and 'comment' in payload and 'issue' in payload:
-        if 'pull_request' in payload.get('issue', {}):
-            comment_body = payload.get('comment', {}).get('body', '')
-
-            
-            if BOT_SIGNATURE in comment_body:
-                return jsonify({'status': 'Comment from bot itself, ignoring'}), 200
-
-            if BOT_TRIGGER_PHRASE.lower() in comment_body.lower():
-                pr_url = payload.get('issue', {}).get('pull_request', {}).get('html_url')
-                if pr_url:
-                    print(f"--- [Webhook] Chatbot query received on PR: {pr_url} ---")
-                    thread = threading.Thread(target=run_chatbot_in_background, args=(pr_url, comment_body))
-                    thread.start()
-                    return jsonify({'status': 'Chatbot response process started'}), 200
-
-    return jsonify({'status': 'Event not processed'}), 202
+startup_seconds = time.perf_counter() - _import_started
+print(f"--- Webhook server imported in {startup_seconds * 1000:.0f}ms ---")
+if WARMUP_ON_START:
+    threading.Thread(target=warm_up, name="pipeline-warmup", daemon=True).start()
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5000))